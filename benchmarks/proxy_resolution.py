@@ -0,0 +1,88 @@
+import argparse
+import asyncio
+import os
+import tempfile
+from collections import Counter
+from random import Random, shuffle
+from time import perf_counter
+
+os.environ['GLOBAL_CONFIG_PATH'] = tempfile.mkdtemp()
+
+from loguru import logger
+
+from bot.config import settings
+from bot.utils import proxy_utils
+
+TIME_SCALE = 0.01
+DEAD_TIMEOUT = 15 * TIME_SCALE
+ALIVE_LATENCY = 1 * TIME_SCALE
+
+class FakeProxies:
+    def __init__(self, proxies: list[str], dead_ratio: float):
+        self.dead = set(Random(7).sample(proxies, int(len(proxies) * dead_ratio)))
+        self.probes = 0
+
+    async def check_proxy(self, proxy: str) -> bool:
+        self.probes += 1
+        if proxy in self.dead:
+            await asyncio.sleep(DEAD_TIMEOUT)
+            return False
+        await asyncio.sleep(ALIVE_LATENCY)
+        return True
+
+async def sequential(sessions: list[str], proxy_path: str) -> dict:
+    accounts_config = {}
+    for session in sessions:
+        unused = proxy_utils.get_unused_proxies(accounts_config, proxy_path)
+        shuffle(unused)
+        proxy = None
+        for candidate in unused:
+            if await proxy_utils.check_proxy(candidate):
+                proxy = candidate
+                break
+        accounts_config[session] = {'proxy': proxy}
+    return accounts_config
+
+async def concurrent(sessions: list[str], proxy_path: str) -> dict:
+    accounts_config = {}
+    allocator = proxy_utils.ProxyAllocator(accounts_config, proxy_path)
+
+    async def resolve(session: str) -> None:
+        accounts_config[session] = {'proxy': await allocator.allocate(None)}
+
+    await asyncio.gather(*map(resolve, sessions))
+    return accounts_config
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--proxies', type=int, default=400)
+    parser.add_argument('--dead', type=float, default=0.3)
+    parser.add_argument('--per-proxy', type=int, default=1)
+    args = parser.parse_args()
+
+    logger.remove()
+    settings.SESSIONS_PER_PROXY = args.per_proxy
+    proxies = [f"http://10.0.{index // 250}.{index % 250 + 1}:8080" for index in range(args.proxies)]
+    proxy_path = os.path.join(tempfile.mkdtemp(), 'proxies.txt')
+    with open(proxy_path, 'w') as file:
+        file.write('\n'.join(proxies))
+    sessions = [f'session{index}' for index in range(args.sessions)]
+
+    print(f"{args.sessions} sessions, {args.proxies} proxies ({args.dead:.0%} dead), "
+          f"SESSIONS_PER_PROXY={args.per_proxy}, probe timings scaled x{TIME_SCALE}")
+    for name, resolver in (('sequential', sequential), ('concurrent', concurrent)):
+        fake = FakeProxies(proxies, args.dead)
+        proxy_utils.check_proxy = fake.check_proxy
+        started = perf_counter()
+        accounts_config = await resolver(sessions, proxy_path)
+        elapsed = perf_counter() - started
+        usage = Counter(config['proxy'] for config in accounts_config.values() if config['proxy'])
+        assigned = sum(usage.values())
+        dead_assigned = sum(count for proxy, count in usage.items() if proxy in fake.dead)
+        print(f"{name:>10}: {elapsed:7.2f}s ({elapsed / TIME_SCALE / 60:6.1f} min unscaled), {fake.probes:4} probes, "
+              f"{assigned} sessions with a proxy, max {max(usage.values(), default=0)} per proxy, "
+              f"{dead_assigned} on dead proxies")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import tracemalloc
+from time import perf_counter
+
+from aiocfscrape import CloudflareScraper
+
+from bot.core.headers import SessionHeaders
+from bot.core.tapper import BaseBot
+
+USER_AGENT = ('Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/142.0.0.0 Mobile Safari/537.36')
+COOKIES = 'session=4f2a9c0e7d1b4b8a9e3f6c5d2a1b0c9d; yandexuid=1234567890123456789'
+
+def legacy_headers() -> dict:
+    headers = BaseBot.DEFAULT_HEADERS.copy()
+    headers['User-Agent'] = USER_AGENT
+    headers['Onboarding'] = '2'
+    if COOKIES:
+        headers['Cookie'] = COOKIES
+    return headers
+
+def measure(build, client: CloudflareScraper, iterations: int) -> tuple[float, float]:
+    for _ in range(1000):
+        client._prepare_headers(build())
+
+    started = perf_counter()
+    for _ in range(iterations):
+        client._prepare_headers(build())
+    elapsed = perf_counter() - started
+
+    allocated = 0
+    tracemalloc.start()
+    for _ in range(1000):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        client._prepare_headers(build())
+        allocated += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return elapsed / iterations * 1e6, allocated / 1000
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    templates = SessionHeaders(BaseBot.DEFAULT_HEADERS, USER_AGENT)
+    templates.set_cookies(COOKIES)
+
+    async with CloudflareScraper() as client:
+        for name, build in (('per-call dict copy', legacy_headers),
+                            ('session template', lambda: templates.get('2'))):
+            per_request, allocated = measure(build, client, args.iterations)
+            print(f"{name:>18}: {per_request:6.2f} us/request, {allocated:7.0f} B peak/request")
+
+if __name__ == "__main__":
+    asyncio.run(main())
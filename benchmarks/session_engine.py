@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import gc
+import os
+import tempfile
+import tracemalloc
+from collections import Counter
+from time import process_time, time
+from types import SimpleNamespace
+
+os.environ['GLOBAL_CONFIG_PATH'] = tempfile.mkdtemp()
+
+from loguru import logger
+
+from bot.config import settings
+from bot.core.engine import SessionEngine
+from bot.core.tapper import BaseBot
+from bot.utils import config_utils, CONFIG_PATH
+from bot.utils.startup_queue import startup_queue
+
+LATENCY = 0.02
+
+class Stats:
+    syncs = 0
+    workers = settings.ENGINE_WORKERS
+
+async def returns_true(self, *args, **kwargs) -> bool:
+    return True
+
+async def returns_none(self, *args, **kwargs) -> None:
+    return None
+
+async def returns_false(self, *args, **kwargs) -> bool:
+    return False
+
+async def auth_start(self, *args, **kwargs) -> bool:
+    await asyncio.sleep(LATENCY)
+    self._game_data = {'app': {'onboarding': 2},
+                       'game': {'currentEnergy': 120, 'maxEnergy': 500, 'energyPerSec': 3, 'lastSync': time()}}
+    return True
+
+async def sync_game(self, taps: int = 0) -> dict:
+    await asyncio.sleep(LATENCY)
+    Stats.syncs += 1
+    now = time()
+    energy = min(self.state.max_energy,
+                 self.state.energy - taps + (now - (self.state.last_sync or now)) * self.state.energy_per_sec)
+    response = {'currentEnergy': int(energy), 'lastSync': now}
+    self.state.apply(response)
+    return response
+
+def stub_network() -> None:
+    startup_queue.window = 3
+    for name, stub in (('initialize_session', returns_true), ('check_and_update_proxy', returns_true),
+                       ('auth_start', auth_start), ('reauthenticate', returns_true), ('sync_game', sync_game),
+                       ('restore_energy_if_needed', returns_false), ('_task_step', returns_none),
+                       ('_ticket_step', returns_none), ('save_snapshot', returns_none), ('close', returns_none)):
+        setattr(BaseBot, name, stub)
+    BaseBot._open_http_client = lambda self: None
+
+def make_bots(sessions: int) -> list:
+    return [BaseBot(SimpleNamespace(session_name=f'session{index}', set_proxy=lambda proxy: None))
+            for index in range(sessions)]
+
+async def task_per_session(bots: list, duration: float) -> dict:
+    tasks = [asyncio.create_task(bot.run()) for bot in bots]
+    await asyncio.sleep(duration)
+    result = {'tasks': len(asyncio.all_tasks()) - 1, 'timers': len(asyncio.get_running_loop()._scheduled)}
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return result
+
+async def engine(bots: list, duration: float) -> dict:
+    session_engine = SessionEngine(workers=Stats.workers)
+    for bot in bots:
+        session_engine.add(bot)
+    runner = asyncio.create_task(session_engine.run())
+    await asyncio.sleep(duration)
+    phases = Counter(entry['phase'] for entry in session_engine.snapshot())
+    result = {'tasks': len(asyncio.all_tasks()) - 1, 'timers': len(asyncio.get_running_loop()._scheduled),
+              'phases': dict(phases)}
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+    return result
+
+async def measure(model, sessions: int, duration: float) -> dict:
+    Stats.syncs = 0
+    bots = make_bots(sessions)
+    startup_queue.plan(sessions)
+    started = process_time()
+    result = await model(bots, duration)
+    result['cpu'] = process_time() - started
+    result['syncs'] = Stats.syncs
+
+    bots = make_bots(sessions)
+    startup_queue.plan(sessions)
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    await model(bots, duration)
+    result['memory'] = (tracemalloc.get_traced_memory()[1] - baseline) / sessions
+    tracemalloc.stop()
+    return result
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--workers', type=int, default=settings.ENGINE_WORKERS)
+    args = parser.parse_args()
+    Stats.workers = args.workers
+
+    logger.remove()
+    stub_network()
+    config_utils.get_config_store(CONFIG_PATH).put_many(
+        {f'session{index}': {'api': {}, 'user_agent': 'Mozilla/5.0'} for index in range(max(args.sessions))})
+
+    for sessions in args.sessions:
+        for name, model in (('task per session', task_per_session), ('timer-heap engine', engine)):
+            result = await measure(model, sessions, args.duration)
+            print(f"{sessions:>5} sessions | {name:>17}: {result['tasks']:5} live tasks, {result['timers']:5} timers, "
+                  f"{result['memory'] / 1024:5.1f} KiB peak/session, {result['cpu']:5.2f}s CPU, "
+                  f"{result['syncs']} syncs in {args.duration:.0f}s"
+                  + (f" | phases {result['phases']}" if 'phases' in result else ''))
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,91 @@
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from time import time
+from types import SimpleNamespace
+
+workdir = tempfile.mkdtemp()
+os.environ['GLOBAL_CONFIG_PATH'] = workdir
+
+from loguru import logger
+
+from bot.core.tapper import BaseBot
+from bot.utils import config_utils, CONFIG_PATH
+
+def auth_response(index: int) -> dict:
+    return {
+        'app': {'onboarding': 2},
+        'user': {'uid': index},
+        'game': {
+            'currentEnergy': 300 + index % 200, 'maxEnergy': 500, 'energyPerSec': 3, 'currentCoins': index * 7,
+            'coinsPerTap': 1, 'minePerHour': 0, 'minePerSec': 0, 'currentCandies': index % 50,
+            'currentTickets': 0, 'nextCheckpointPosition': 1000
+        },
+        'upgrades': {'list': [
+            {'id': f'upgrade{j}', 'kind': 'mine', 'title': f'Upgrade {j}', 'dayLimitation': 6,
+             'meta': {'description': 'Boosts your speed. ' * 6, 'icon': f'https://cdn.example/{j}.png'},
+             'level': index % 5, 'amount': j, 'upgradedAt': None,
+             'next': {'price': (index % 5 + 1) * 10, 'increment': j + 1}}
+            for j in range(40)
+        ]},
+        'tasks': [
+            {'id': f'task{j}', 'kind': 'actionCheck', 'title': f'Task {j}',
+             'meta': {'reward': 100, 'rewardType': 'candy', 'url': 'https://t.me/example', 'checkDelay': 60},
+             'time': 0}
+            for j in range(30)
+        ],
+        'sharedConfig': {'upgradeDelay': {str(level): level * 10 for level in range(50)},
+                         'dayLimitationUpgradeDelay': 3600}
+    }
+
+class LegacySession:
+    def __init__(self, response: dict):
+        self.__dict__.update({f"_field_{i}": 0 for i in range(35)})
+        self._game_data = response
+        self.UPGRADE_COOLDOWN = {int(level): int(delay)
+                                 for level, delay in response['sharedConfig']['upgradeDelay'].items()}
+        self._available_upgrades = {upgrade['id']: upgrade for upgrade in response['upgrades']['list']}
+        self._available_tasks = {task['id']: task for task in response['tasks']}
+
+def measure(factory, count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    sessions = [factory(i) for i in range(count)]
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del sessions
+    return used / count
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    args = parser.parse_args()
+    logger.remove()
+
+    session_config = {'api': {}, 'user_agent': 'Mozilla/5.0', 'proxy': None}
+    config_utils.get_config_store(CONFIG_PATH).put_many(
+        {f"session_{i}": session_config for i in range(max(args.sizes))})
+    payloads = [json.dumps(auth_response(i)) for i in range(max(args.sizes))]
+
+    def game_state_session(index: int) -> BaseBot:
+        bot = BaseBot(SimpleNamespace(session_name=f"session_{index}", set_proxy=lambda proxy: None))
+        bot._apply_auth_response(json.loads(payloads[index]))
+        return bot
+
+    def legacy_session(index: int) -> LegacySession:
+        return LegacySession(json.loads(payloads[index]))
+
+    for size in args.sizes:
+        started = time()
+        legacy = measure(legacy_session, size)
+        current = measure(game_state_session, size)
+        print(f"{size:>6} sessions | legacy dict model: {legacy / 1024:7.1f} KiB/session | "
+              f"GameState + shared catalog: {current / 1024:7.1f} KiB/session | {time() - started:.1f}s",
+              file=sys.stdout)
+
+if __name__ == "__main__":
+    main()
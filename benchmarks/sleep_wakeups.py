@@ -0,0 +1,82 @@
+import asyncio
+import os
+import tempfile
+from types import SimpleNamespace
+
+os.environ['GLOBAL_CONFIG_PATH'] = tempfile.mkdtemp()
+
+from loguru import logger
+
+from bot.core import tapper
+from bot.core.tapper import BaseBot
+from bot.utils import config_utils, CONFIG_PATH
+
+class VirtualClock:
+    def __init__(self):
+        self.now = 1_760_000_000.0
+        self.wakeups = 0
+
+    def time(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.wakeups += 1
+        self.now += seconds
+
+class SimulatedServer:
+    def __init__(self, bot: BaseBot, clock: VirtualClock, energy: int, max_energy: int, energy_per_sec: float):
+        self.bot, self.clock = bot, clock
+        self.energy, self.updated = energy, clock.now
+        self.max_energy, self.energy_per_sec = max_energy, energy_per_sec
+        self.syncs = 0
+
+    async def sync_game(self, taps: int = 0) -> dict:
+        self.syncs += 1
+        self.energy = min(self.max_energy, self.energy + (self.clock.now - self.updated) * self.energy_per_sec)
+        self.updated = self.clock.now
+        response = {'currentEnergy': int(self.energy), 'maxEnergy': self.max_energy,
+                    'energyPerSec': self.energy_per_sec, 'lastSync': int(self.clock.now)}
+        self.bot.state.apply(response)
+        return response
+
+async def legacy_sleep_phase(bot: BaseBot) -> None:
+    energy_to_restore = int(bot.state.max_energy * 0.8) - bot.state.energy
+    sleep_time = max(min(energy_to_restore / (bot.state.energy_per_sec or 3), 60 * 30), 60)
+    total_slept = 0
+    while total_slept < sleep_time:
+        await tapper.asyncio.sleep(60)
+        total_slept += 60
+        if total_slept % 300 == 0 or total_slept >= sleep_time:
+            if not await bot.sync_game(0):
+                continue
+            if bot.state.energy >= bot.state.max_energy * 0.8:
+                break
+
+async def simulate(phase, energy: int, energy_per_sec: float, max_energy: int = 500) -> tuple:
+    clock = VirtualClock()
+    tapper.time = clock.time
+    tapper.asyncio = SimpleNamespace(sleep=clock.sleep)
+    bot = BaseBot(SimpleNamespace(session_name='session', set_proxy=lambda proxy: None))
+    server = SimulatedServer(bot, clock, energy, max_energy, energy_per_sec)
+    bot.sync_game = server.sync_game
+    await server.sync_game(0)
+    server.syncs = 0
+    started = clock.now
+    await phase(bot)
+    return clock.wakeups, server.syncs, clock.now - started
+
+async def main() -> None:
+    logger.remove()
+    config_utils.get_config_store(CONFIG_PATH).put('session', {'api': {}, 'user_agent': 'Mozilla/5.0'})
+    scenarios = [(energy, rate) for rate in (0.25, 0.5, 1, 3) for energy in (0, 100, 200, 300, 380)]
+    for name, phase in (('legacy 60s polling', legacy_sleep_phase), ('predictive wake-up', BaseBot._sleep_phase)):
+        wakeups = syncs = slept = 0
+        for energy, rate in scenarios:
+            phase_wakeups, phase_syncs, phase_slept = await simulate(phase, energy, rate)
+            wakeups, syncs, slept = wakeups + phase_wakeups, syncs + phase_syncs, slept + phase_slept
+        hours = slept / 3600
+        print(f"{name:>19}: {wakeups / hours:6.1f} wake-ups and {syncs / hours:5.1f} syncs per sleeping session-hour "
+              f"({len(scenarios)} sleep phases, {hours:.1f}h asleep)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
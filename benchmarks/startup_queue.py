@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+import os
+import tempfile
+from collections import Counter
+from random import uniform
+from time import monotonic, time
+from types import SimpleNamespace
+
+os.environ['GLOBAL_CONFIG_PATH'] = tempfile.mkdtemp()
+
+from loguru import logger
+
+from bot.core.tapper import BaseBot
+from bot.utils import config_utils, CONFIG_PATH
+from bot.utils.startup_queue import startup_queue
+
+class Stats:
+    started = 0.0
+    in_flight = 0
+    peak_in_flight = 0
+    auth_seconds: Counter = Counter()
+    active: dict = {}
+    auth_latency = 0.5
+
+async def returns_true(self, *args, **kwargs) -> bool:
+    return True
+
+async def returns_none(self, *args, **kwargs) -> None:
+    return None
+
+async def authenticate(self, priority: int) -> bool:
+    Stats.in_flight += 1
+    Stats.peak_in_flight = max(Stats.peak_in_flight, Stats.in_flight)
+    Stats.auth_seconds[int(monotonic() - Stats.started)] += 1
+    try:
+        await asyncio.sleep(Stats.auth_latency)
+    finally:
+        Stats.in_flight -= 1
+    self._game_data = {'app': {'onboarding': 2},
+                       'game': {'currentEnergy': 0, 'maxEnergy': 500, 'energyPerSec': 3, 'lastSync': time()}}
+    return True
+
+async def sync_game(self, taps: int = 0) -> dict:
+    await asyncio.sleep(0.05)
+    Stats.active.setdefault(self.session_name, monotonic() - Stats.started)
+    return {'currentEnergy': 0}
+
+def stub_network() -> None:
+    for name, stub in (('initialize_session', returns_true), ('check_and_update_proxy', returns_true),
+                       ('_authenticate', authenticate), ('sync_game', sync_game), ('_task_step', returns_none),
+                       ('_ticket_step', returns_none), ('save_snapshot', returns_none), ('close', returns_none)):
+        setattr(BaseBot, name, stub)
+    BaseBot._open_http_client = lambda self: None
+
+async def run_fleet(sessions: int) -> dict:
+    Stats.started, Stats.in_flight, Stats.peak_in_flight = monotonic(), 0, 0
+    Stats.auth_seconds, Stats.active = Counter(), {}
+    bots = [BaseBot(SimpleNamespace(session_name=f'session{index}', set_proxy=lambda proxy: None))
+            for index in range(sessions)]
+    tasks = [asyncio.create_task(bot.run()) for bot in bots]
+    while len(Stats.active) < sessions:
+        await asyncio.sleep(0.1)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {'fleet': max(Stats.active.values()), 'peak_in_flight': Stats.peak_in_flight,
+            'peak_per_second': max(Stats.auth_seconds.values())}
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--window', type=float, default=20)
+    parser.add_argument('--max-auth', type=int, default=60)
+    args = parser.parse_args()
+
+    logger.remove()
+    stub_network()
+    config_utils.get_config_store(CONFIG_PATH).put_many(
+        {f'session{index}': {'api': {}, 'user_agent': 'Mozilla/5.0'} for index in range(args.sessions)})
+
+    startup_queue.window, startup_queue.max_auth = args.window, args.sessions
+    reserve = startup_queue.reserve
+    startup_queue.plan(args.sessions)
+    startup_queue.reserve = lambda session_name: uniform(1, args.window)
+    legacy = await run_fleet(args.sessions)
+
+    startup_queue.reserve, startup_queue.max_auth = reserve, args.max_auth
+    startup_queue.plan(args.sessions)
+    queued = await run_fleet(args.sessions)
+
+    for name, result in (('random start delay', legacy), ('admission queue', queued)):
+        print(f"{name:>18}: fleet active in {result['fleet']:5.1f}s "
+              f"({args.sessions / result['fleet']:6.1f} sessions/s), "
+              f"peak {result['peak_in_flight']:4} auths in flight, {result['peak_per_second']:4} auths in the busiest second")
+
+if __name__ == "__main__":
+    asyncio.run(main())
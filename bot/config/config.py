@@ -12,19 +12,42 @@ class Settings(BaseSettings):
     FIX_CERT: bool = False
 
     SESSION_START_DELAY: int = 360
+    STARTUP_RATE: float = 0
+    STARTUP_MAX_AUTH: int = 20
+    SESSION_ENGINE: bool = False
+    ENGINE_WORKERS: int = 50
+    MULTIPROCESS: bool = False
+    WORKER_PROCESSES: int = 0
 
     REF_ID: str = 'bro-228618799'
     SESSIONS_PER_PROXY: int = 1
     USE_PROXY: bool = True
     DISABLE_PROXY_REPLACE: bool = False
+    PROXY_CHECK_CONCURRENCY: int = 50
+    PROXY_PROBE_PARALLEL: int = 3
+    PROXY_HEALTH_TTL: int = 300
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_IDLE_TIMEOUT: int = 300
+    CIRCUIT_BREAKER_THRESHOLD: int = 20
+    CIRCUIT_BREAKER_COOLDOWN: int = 30
+    RATE_LIMIT_RPS: float = 0
+    RATE_LIMIT_PER_PROXY_RPS: float = 0
 
     DEVICE_PARAMS: bool = False
+    TELEGRAM_MAX_CONNECTIONS: int = 10
+    TELEGRAM_MAX_FLOOD_WAITS: int = 5
 
     DEBUG_LOGGING: bool = False
+    METRICS_LOG_INTERVAL: int = 0
+    SNAPSHOT_INTERVAL: int = 60
+    INIT_DATA_TTL: int = 86400
+    JSON_CODEC: str = "auto"
 
     AUTO_UPDATE: bool = True
     CHECK_UPDATE_INTERVAL: int = 60
     BLACKLISTED_SESSIONS: str = ""
+    WATCH_SESSIONS: bool = True
+    SESSIONS_WATCH_INTERVAL: int = 30
     
     SUBSCRIBE_TELEGRAM: bool = True
 
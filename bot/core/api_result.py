@@ -0,0 +1,50 @@
+import asyncio
+from enum import Enum
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+AUTH_STATUSES = frozenset({401, 403})
+TRANSIENT_STATUSES = frozenset({408, 425, 429})
+
+class Outcome(str, Enum):
+    OK = 'ok'
+    AUTH_EXPIRED = 'auth_expired'
+    TRANSIENT = 'transient'
+    CLIENT_ERROR = 'client_error'
+    NETWORK = 'network'
+
+REJECTED_OUTCOMES = frozenset({Outcome.AUTH_EXPIRED, Outcome.CLIENT_ERROR})
+
+def classify(status: Optional[int] = None, error: Optional[BaseException] = None) -> Outcome:
+    if status is not None:
+        if status == 200:
+            return Outcome.OK
+        if status in AUTH_STATUSES:
+            return Outcome.AUTH_EXPIRED
+        if status >= 500 or status in TRANSIENT_STATUSES:
+            return Outcome.TRANSIENT
+        return Outcome.CLIENT_ERROR
+    if isinstance(error, (asyncio.TimeoutError, aiohttp.ServerDisconnectedError)):
+        return Outcome.TRANSIENT
+    if isinstance(error, aiohttp.ClientError):
+        return Outcome.NETWORK
+    return Outcome.TRANSIENT
+
+class ApiResult:
+    __slots__ = ('outcome', 'data', 'status')
+
+    def __init__(self, outcome: Outcome, data: Optional[Dict[str, Any]] = None, status: Optional[int] = None):
+        self.outcome = outcome
+        self.data = data
+        self.status = status
+
+    @property
+    def ok(self) -> bool:
+        return self.outcome is Outcome.OK
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def __repr__(self) -> str:
+        return f"ApiResult({self.outcome.value}, status={self.status})"
@@ -0,0 +1,107 @@
+import hashlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, Mapping, Optional
+
+from bot.utils.metrics import metrics
+from bot.utils import json_codec
+
+UPGRADE_STATE_KEYS = frozenset({'level', 'amount', 'upgradedAt', 'next'})
+TASK_STATE_KEYS = frozenset({'time', 'completed', 'isCompleted', 'status', 'progress', 'claimed', 'done'})
+CATALOG_KEYS = frozenset({'upgrades', 'tasks', 'sharedConfig'})
+
+class CatalogEntry(MutableMapping):
+    __slots__ = ('_state', '_shared')
+
+    def __init__(self, state: Dict[str, Any], shared: Mapping[str, Any]):
+        self._state = state
+        self._shared = shared
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self._state:
+            return self._state[key]
+        return self._shared[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._state[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._state[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._state or key in self._shared
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._state
+        yield from (key for key in self._shared if key not in self._state)
+
+    def __len__(self) -> int:
+        return len(self._state) + sum(1 for key in self._shared if key not in self._state)
+
+    def __repr__(self) -> str:
+        return f"CatalogEntry({dict(self)!r})"
+
+class CatalogCache:
+    MAX_ENTRIES = 4096
+
+    def __init__(self):
+        self._entries: OrderedDict[str, Mapping[str, Any]] = OrderedDict()
+        self._cooldowns: OrderedDict[str, Dict] = OrderedDict()
+        self._hits = metrics.counter('catalog_cache_hits_total')
+        self._misses = metrics.counter('catalog_cache_misses_total')
+        self._size = metrics.gauge('catalog_cache_entries')
+
+    @staticmethod
+    def _digest(value: Any) -> str:
+        return hashlib.blake2b(json_codec.encode(value, sort_keys=True), digest_size=16).hexdigest()
+
+    def _lookup(self, entries: OrderedDict, key: str) -> Optional[Any]:
+        value = entries.get(key)
+        if value is None:
+            self._misses.inc()
+        else:
+            self._hits.inc()
+            entries.move_to_end(key)
+        return value
+
+    def _store(self, entries: OrderedDict, key: str, value: Any) -> Any:
+        entries[key] = value
+        if len(entries) > self.MAX_ENTRIES:
+            entries.popitem(last=False)
+        self._size.set(len(self._entries) + len(self._cooldowns))
+        return value
+
+    def intern(self, kind: str, value: Dict[str, Any]) -> Mapping[str, Any]:
+        key = f"{kind}:{self._digest(value)}"
+        shared = self._lookup(self._entries, key)
+        if shared is None:
+            shared = self._store(self._entries, key, MappingProxyType(value))
+        return shared
+
+    def split(self, kind: str, item: Dict[str, Any], state_keys: FrozenSet[str]) -> CatalogEntry:
+        state = {key: value for key, value in item.items() if key in state_keys}
+        static = {key: value for key, value in item.items() if key not in state_keys}
+        return CatalogEntry(state, self.intern(kind, static))
+
+    def upgrades(self, upgrades_list: Iterable[Dict[str, Any]]) -> Dict[str, CatalogEntry]:
+        return {upgrade['id']: self.split('upgrade', upgrade, UPGRADE_STATE_KEYS)
+                for upgrade in upgrades_list if upgrade.get('id')}
+
+    def tasks(self, tasks_list: Iterable[Dict[str, Any]]) -> Dict[str, CatalogEntry]:
+        return {task['id']: self.split('task', task, TASK_STATE_KEYS)
+                for task in tasks_list if task.get('id')}
+
+    def upgrade_cooldowns(self, shared_config: Dict[str, Any]) -> Dict:
+        key = self._digest(shared_config)
+        cooldowns = self._lookup(self._cooldowns, key)
+        if cooldowns is None:
+            cooldowns = {int(level): int(delay) for level, delay in shared_config['upgradeDelay'].items()}
+            cooldowns['restoreEnergy'] = shared_config.get('dayLimitationUpgradeDelay', 3600)
+            self._store(self._cooldowns, key, cooldowns)
+        return cooldowns
+
+def without_catalog(response: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in response.items() if key not in CATALOG_KEYS}
+
+catalog = CatalogCache()
@@ -0,0 +1,296 @@
+import asyncio
+import heapq
+from enum import Enum
+from itertools import count
+from time import monotonic, time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from bot.core.tapper import BaseBot
+from bot.exceptions import InvalidSession, Deferred
+from bot.utils import logger
+from bot.utils.metrics import metrics
+from bot.utils.startup_queue import startup_queue
+
+class Phase(str, Enum):
+    START = 'start'
+    AUTH = 'auth'
+    ONBOARDING = 'onboarding'
+    ACTIVE = 'active'
+    TASKS = 'tasks'
+    TICKETS = 'tickets'
+    SLEEP = 'sleep'
+    STOPPED = 'stopped'
+
+PHASE_GAUGES = {phase: metrics.gauge('engine_sessions', phase=phase.value) for phase in Phase}
+STEP_HISTOGRAMS = {phase: metrics.histogram('engine_step_seconds', phase=phase.value) for phase in Phase}
+
+class SessionMachine:
+    __slots__ = ('bot', 'phase', 'wake_at', 'entry', 'running', 'sleeping')
+
+    def __init__(self, bot: BaseBot):
+        self.bot = bot
+        self.phase = Phase.START
+        self.wake_at: Optional[float] = None
+        self.entry: Optional[int] = None
+        self.running = False
+        self.sleeping = False
+        bot._defer_waits = True
+        PHASE_GAUGES[self.phase].inc()
+
+    @property
+    def session_name(self) -> str:
+        return self.bot.session_name
+
+    def enter(self, phase: Phase) -> None:
+        PHASE_GAUGES[self.phase].dec()
+        PHASE_GAUGES[phase].inc()
+        self.phase = phase
+        self.bot._deferred_attempts.clear()
+
+    async def step(self) -> float:
+        try:
+            return await getattr(self, f'_{self.phase.value}')()
+        except InvalidSession:
+            raise
+        except Deferred as deferred:
+            logger.info(f"{self.session_name} | {deferred}, rescheduling {self.phase.value} phase")
+            return time() + deferred.delay
+        except Exception as error:
+            delay = self.bot._error_backoff.next()
+            logger.error(f"{self.session_name} | Error in {self.phase.value} phase: {error}. "
+                         f"Retrying in {int(delay)}s")
+            return time() + delay
+
+    async def _start(self) -> float:
+        if not await self.bot.initialize_session():
+            raise InvalidSession("Failed to initialize session")
+        self.bot._open_http_client()
+        self.enter(Phase.AUTH)
+        delay = startup_queue.reserve(self.session_name)
+        logger.info(f"{self.session_name} | Bot will start in {int(delay)}s")
+        return time() + delay
+
+    async def _auth(self) -> float:
+        bot = self.bot
+        delay = await bot._ensure_proxy()
+        if delay is not None:
+            return time() + delay
+
+        if not bot._game_data and not await bot.auth_start():
+            logger.error(f"{self.session_name} | Failed to authenticate")
+            return time() + bot._error_backoff.next()
+
+        onboarding_level = bot._game_data.get('app', {}).get('onboarding', 0)
+        if onboarding_level == 0 and not bot._onboarding_completed:
+            logger.info(f"{self.session_name} | Current onboarding level: {onboarding_level}")
+            self.enter(Phase.ONBOARDING)
+            return time()
+
+        delay = await bot._start_game()
+        if delay is not None:
+            return time() + delay
+        self._begin_active()
+        return time()
+
+    async def _onboarding(self) -> float:
+        if not await self.bot.game_onboarding():
+            logger.error(f"{self.session_name} | Failed to complete onboarding")
+            return time() + self.bot._error_backoff.next()
+        self.enter(Phase.AUTH)
+        return time()
+
+    def _begin_active(self) -> None:
+        logger.info(f"{self.session_name} | ▶️ Starting active phase with ⚡ "
+                    f"{self.bot.state.energy}/{self.bot.state.max_energy}")
+        self.bot._begin_active_phase()
+        self.enter(Phase.ACTIVE)
+
+    async def _active(self) -> float:
+        delay = await self.bot._active_step()
+        if delay is not None:
+            return time() + delay
+        self.bot._end_active_phase()
+        self.bot._begin_task_phase()
+        self.enter(Phase.TASKS)
+        return time()
+
+    async def _tasks(self) -> float:
+        delay = await self.bot._task_step()
+        if delay is not None:
+            return time() + delay
+        self.bot._end_task_phase()
+        self.bot._begin_ticket_phase()
+        self.enter(Phase.TICKETS)
+        return time()
+
+    async def _tickets(self) -> float:
+        delay = await self.bot._ticket_step()
+        if delay is not None:
+            return time() + delay
+        self.bot._end_ticket_phase()
+        await self.bot.save_snapshot(force=True)
+        self.enter(Phase.SLEEP)
+        self.sleeping = False
+        return time()
+
+    async def _sleep(self) -> float:
+        bot = self.bot
+        if not self.sleeping:
+            logger.info(f"{self.session_name} | ▶️ Starting sleep phase with ⚡ "
+                        f"{bot.state.energy}/{bot.state.max_energy}")
+            wake_at = bot._begin_sleep_phase()
+            self.sleeping = wake_at is not None
+            if self.sleeping:
+                return wake_at
+        else:
+            wake_at = await bot._sleep_step()
+            if wake_at is not None:
+                return wake_at
+            bot._end_sleep_phase()
+            self.sleeping = False
+
+        logger.info(f"{self.session_name} | 🔑 Re-authenticating after sleep phase")
+        if not await bot.reauthenticate('sleep_phase'):
+            delay = bot._error_backoff.next()
+            logger.error(f"{self.session_name} | 🔑 Re-authentication failed, retrying in {int(delay)} seconds")
+            self._begin_active()
+            return time() + delay
+        self._begin_active()
+        return time()
+
+class SessionEngine:
+    def __init__(self, workers: int = 50,
+                 on_invalid: Optional[Callable[[str, BaseException], Awaitable[None]]] = None):
+        self.workers = workers
+        self._on_invalid = on_invalid
+        self._machines: Dict[str, SessionMachine] = {}
+        self._timers: List[Tuple[float, int, SessionMachine]] = []
+        self._sequence = count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_at = float('inf')
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._worker_tasks: List[asyncio.Task] = []
+        self._queue_depth = metrics.gauge('engine_ready_depth')
+        self._timers_gauge = metrics.gauge('engine_timers')
+        self._lag = metrics.histogram('engine_wake_lag_seconds')
+
+    def __contains__(self, session_name: str) -> bool:
+        return session_name in self._machines
+
+    def __len__(self) -> int:
+        return len(self._machines)
+
+    def add(self, bot: BaseBot) -> None:
+        if bot.session_name in self._machines:
+            return
+        machine = self._machines[bot.session_name] = SessionMachine(bot)
+        self._schedule(machine, time())
+
+    async def remove(self, session_name: str) -> None:
+        machine = self._machines.pop(session_name, None)
+        if machine is None:
+            return
+        machine.entry = None
+        machine.wake_at = None
+        if not machine.running:
+            await self._stop(machine)
+
+    async def _stop(self, machine: SessionMachine) -> None:
+        if machine.phase is Phase.STOPPED:
+            return
+        PHASE_GAUGES[machine.phase].dec()
+        machine.phase = Phase.STOPPED
+        await machine.bot.close()
+        logger.info(f"{machine.session_name} | Session ended")
+
+    def snapshot(self) -> List[Dict]:
+        now = time()
+        return [{
+            'session': machine.session_name,
+            'phase': machine.phase.value,
+            'running': machine.running,
+            'wakes_in': None if machine.wake_at is None else max(0.0, machine.wake_at - now)
+        } for machine in self._machines.values()]
+
+    def next_wake(self, session_name: str) -> Optional[float]:
+        machine = self._machines.get(session_name)
+        return machine.wake_at if machine else None
+
+    def _schedule(self, machine: SessionMachine, wake_at: float) -> None:
+        machine.wake_at = wake_at
+        if wake_at <= time():
+            machine.entry = None
+            self._ready.put_nowait(machine)
+            return
+        machine.entry = next(self._sequence)
+        heapq.heappush(self._timers, (wake_at, machine.entry, machine))
+        self._timers_gauge.set(len(self._timers))
+        if wake_at < self._timer_at:
+            self._arm()
+
+    def _arm(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._timer_at = float('inf')
+        if not self._timers:
+            return
+        self._timer_at = self._timers[0][0]
+        self._timer = asyncio.get_running_loop().call_later(max(0.0, self._timer_at - time()), self._fire)
+
+    def _fire(self) -> None:
+        self._timer = None
+        now = time()
+        while self._timers and self._timers[0][0] <= now:
+            wake_at, entry, machine = heapq.heappop(self._timers)
+            if machine.entry != entry:
+                continue
+            machine.entry = None
+            self._lag.observe(now - wake_at)
+            self._ready.put_nowait(machine)
+        self._timers_gauge.set(len(self._timers))
+        self._queue_depth.set(self._ready.qsize())
+        self._arm()
+
+    async def _worker(self) -> None:
+        while True:
+            machine = await self._ready.get()
+            self._queue_depth.set(self._ready.qsize())
+            if self._machines.get(machine.session_name) is not machine:
+                continue
+
+            phase = machine.phase
+            started = monotonic()
+            machine.running = True
+            try:
+                wake_at = await machine.step()
+            except InvalidSession as error:
+                self._machines.pop(machine.session_name, None)
+                logger.error(f"{machine.session_name} | Invalid session: {error}")
+                await self._stop(machine)
+                if self._on_invalid:
+                    await self._on_invalid(machine.session_name, error)
+                continue
+            finally:
+                machine.running = False
+                STEP_HISTOGRAMS[phase].observe(monotonic() - started)
+
+            if self._machines.get(machine.session_name) is machine:
+                self._schedule(machine, wake_at)
+            else:
+                await self._stop(machine)
+
+    async def run(self) -> None:
+        self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            await asyncio.gather(*self._worker_tasks)
+        finally:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            for task in self._worker_tasks:
+                task.cancel()
+            await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+            machines = list(self._machines.values())
+            self._machines.clear()
+            await asyncio.gather(*(self._stop(machine) for machine in machines), return_exceptions=True)
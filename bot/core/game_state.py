@@ -0,0 +1,53 @@
+from time import time
+from typing import Any, Dict, Optional
+
+class GameState:
+    __slots__ = (
+        'energy', 'max_energy', 'energy_per_sec', 'coins', 'coins_per_tap', 'mine_per_hour', 'mine_per_sec',
+        'candies', 'tickets', 'next_checkpoint', 'last_sync',
+        'restores_used', 'restores_max', 'last_restore_date', 'restore_attempts'
+    )
+
+    API_FIELDS = {
+        'currentEnergy': 'energy',
+        'maxEnergy': 'max_energy',
+        'energyPerSec': 'energy_per_sec',
+        'currentCoins': 'coins',
+        'coinsPerTap': 'coins_per_tap',
+        'minePerHour': 'mine_per_hour',
+        'minePerSec': 'mine_per_sec',
+        'currentCandies': 'candies',
+        'currentTickets': 'tickets',
+        'nextCheckpointPosition': 'next_checkpoint',
+        'lastSync': 'last_sync'
+    }
+    API_KEYS = frozenset(API_FIELDS)
+
+    def __init__(self):
+        self.energy: int = 500
+        self.max_energy: int = 500
+        self.energy_per_sec: float = 3
+        self.coins: int = 0
+        self.coins_per_tap: int = 1
+        self.mine_per_hour: int = 0
+        self.mine_per_sec: int = 0
+        self.candies: int = 0
+        self.tickets: int = 0
+        self.next_checkpoint: int = 0
+        self.last_sync: int = int(time())
+        self.restores_used: int = 0
+        self.restores_max: int = 6
+        self.last_restore_date: Optional[str] = None
+        self.restore_attempts: int = 0
+
+    def apply(self, data: Dict[str, Any]) -> None:
+        for key in self.API_KEYS.intersection(data):
+            setattr(self, self.API_FIELDS[key], data[key])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def update_from_dict(self, data: Dict[str, Any]) -> None:
+        for field in self.__slots__:
+            if field in data:
+                setattr(self, field, data[field])
@@ -1,4 +1,6 @@
-from typing import Dict
+from typing import Dict, Mapping, Optional, Tuple
+
+from multidict import CIMultiDict, CIMultiDictProxy
 
 HEADERS = {
     'accept': 'application/json',
@@ -25,4 +27,40 @@ def get_auth_headers(token: str) -> Dict[str, str]:
     auth_headers = HEADERS.copy()
     auth_headers['authorization'] = f'Bearer {token}'
     auth_headers['lang'] = 'en'
-    return auth_headers
\ No newline at end of file
+    return auth_headers
+
+class SessionHeaders:
+    __slots__ = ('_base', '_cookies', '_templates', '_proxies')
+
+    def __init__(self, base: Mapping[str, str], user_agent: Optional[str]):
+        self._base = CIMultiDict(base)
+        if user_agent:
+            self._base['User-Agent'] = user_agent
+        self._cookies: Optional[str] = None
+        self._templates: Dict[Tuple[str, Optional[str], bool], CIMultiDict] = {}
+        self._proxies: Dict[Tuple[str, Optional[str], bool], CIMultiDictProxy] = {}
+
+    def get(self, onboarding: str, referer: Optional[str] = None, cookies: bool = True) -> CIMultiDictProxy:
+        key = (onboarding, referer, cookies)
+        proxy = self._proxies.get(key)
+        if proxy is None:
+            template = self._templates[key] = self._base.copy()
+            template['Onboarding'] = onboarding
+            if referer:
+                template['Referer'] = referer
+            if cookies and self._cookies:
+                template['Cookie'] = self._cookies
+            proxy = self._proxies[key] = CIMultiDictProxy(template)
+        return proxy
+
+    def set_cookies(self, cookies: Optional[str]) -> None:
+        if cookies == self._cookies:
+            return
+        self._cookies = cookies
+        for (_, _, with_cookies), template in self._templates.items():
+            if not with_cookies:
+                continue
+            if cookies:
+                template['Cookie'] = cookies
+            else:
+                template.popall('Cookie', None)
@@ -5,19 +5,27 @@ import os
 import subprocess
 import signal
 from copy import deepcopy
+from better_proxy import Proxy
 from random import uniform
 from colorama import init, Fore, Style
 import shutil
-from typing import Optional
+from functools import partial
+from typing import Dict, Optional
 
 from bot.utils.universal_telegram_client import UniversalTelegramClient
 from bot.utils.web import run_web_and_tunnel, stop_web_and_tunnel
 from bot.config import settings
 from bot.core.agents import generate_random_user_agent
-from bot.utils import logger, config_utils, proxy_utils, CONFIG_PATH, SESSIONS_PATH, PROXIES_PATH
-from bot.core.tapper import run_tapper
+from bot.utils import logger, config_utils, proxy_utils, migrations, CONFIG_PATH, SESSIONS_PATH, PROXIES_PATH
+from bot.core.tapper import BaseBot, run_tapper
+from bot.core.engine import SessionEngine
+from bot.core.supervisor import Supervisor, Shard, in_shard
 from bot.core.registrator import register_sessions
 from bot.utils.updater import UpdateManager
+from bot.utils.metrics import report_metrics, StageTimer
+from bot.utils.http_pool import http_pool
+from bot.utils.startup_queue import startup_queue
+from bot.utils.session_watcher import SessionWatcher
 from bot.exceptions import InvalidSession
 
 from telethon.errors import (
@@ -78,8 +86,21 @@ async def process() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("-a", "--action", type=int, help="Action to perform")
     parser.add_argument("--update-restart", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--import-config", action="store_true",
+                        help="Re-import accounts_config.json into the session config database")
+    parser.add_argument("--export-config", action="store_true",
+                        help="Export the session config database to accounts_config.json")
     args = parser.parse_args()
 
+    if args.import_config:
+        count = config_utils.import_config_file(CONFIG_PATH)
+        logger.info(f"Imported {count} session configs from `{CONFIG_PATH}`")
+        return
+    if args.export_config:
+        count = await config_utils.export_config_file(CONFIG_PATH)
+        logger.info(f"Exported {count} session configs to `{CONFIG_PATH}`")
+        return
+
     if not settings.USE_PROXY:
         logger.info(f"Detected {len(get_sessions(SESSIONS_PATH))} sessions | USE_PROXY=False")
     else:
@@ -93,7 +114,10 @@ async def process() -> None:
     if action == 1:
         if not API_ID or not API_HASH:
             raise ValueError("API_ID and API_HASH not found in the .env file.")
-        await run_tasks()
+        if settings.MULTIPROCESS:
+            await run_supervisor()
+        else:
+            await run_tasks()
     elif action == 2:
         await register_sessions()
     elif action == 3:
@@ -145,127 +169,279 @@ async def move_invalid_session_to_inactive_folder(session_name: str) -> None:
     if not found:
         logger.error(f"Session {session_name} not found when attempting to move to inactive folder")
 
-def get_sessions(sessions_folder: str) -> list[str]:
+def get_sessions(sessions_folder: str, shard: Optional[Shard] = None) -> list[str]:
     session_names = glob.glob(f"{sessions_folder}/*.session")
     session_names += glob.glob(f"{sessions_folder}/telethon/*.session")
     session_names += glob.glob(f"{sessions_folder}/pyrogram/*.session")
-    return [file.replace('.session', '') for file in sorted(session_names)]
+    return [file.replace('.session', '') for file in sorted(session_names)
+            if in_shard(os.path.basename(file)[:-len('.session')], shard)]
 
-async def get_tg_clients() -> list[UniversalTelegramClient]:
-    session_paths = get_sessions(SESSIONS_PATH)
+SESSION_INIT_ERRORS = (AuthKeyUnregisteredError, AuthKeyDuplicatedError, AuthKeyError,
+                       SessionPasswordNeededError, PyrogramAuthKeyUnregisteredError,
+                       PyrogramSessionPasswordNeededError, PyrogramSessionRevoked, InvalidSession)
 
-    if not session_paths:
-        raise FileNotFoundError("Session files not found")
-    tg_clients = []
-    for session in session_paths:
-        session_name = os.path.basename(session)
+def get_client_params(session: str, api_config: dict) -> dict:
+    api = None
+    if api_config.get('api_id') in [4, 6, 2040, 10840, 21724]:
+        api = config_utils.get_api(api_config)
+
+    if api:
+        return {
+            "session": session,
+            "api": api
+        }
+
+    client_params = {
+        "api_id": api_config.get("api_id", API_ID),
+        "api_hash": api_config.get("api_hash", API_HASH),
+        "session": session,
+        "lang_code": api_config.get("lang_code", "en"),
+        "system_lang_code": api_config.get("system_lang_code", "en-US")
+    }
+
+    for key in ("device_model", "system_version", "app_version"):
+        if api_config.get(key):
+            client_params[key] = api_config[key]
+    return client_params
 
-        if session_name in settings.blacklisted_sessions:
-            logger.warning(f"{session_name} | Session is blacklisted | Skipping")
+def import_session_files(session_paths: list[str], accounts_config: dict) -> list[str]:
+    sidecars = {json_path[:-len('.json')]
+                for directory in {os.path.dirname(session) for session in session_paths}
+                for json_path in glob.glob(f"{directory}/*.json")}
+    imported = []
+    for session in session_paths:
+        if session not in sidecars:
             continue
+        parsed_json = config_utils.import_session_json(session)
+        if parsed_json:
+            session_config = accounts_config.setdefault(os.path.basename(session), {})
+            session_config['user_agent'] = session_config.get('user_agent', generate_random_user_agent())
+            session_config['api'] = parsed_json
+            imported.append(session)
+    return imported
 
-        accounts_config = config_utils.read_config_file(CONFIG_PATH)
-        session_config: dict = deepcopy(accounts_config.get(session_name, {}))
-        if 'api' not in session_config:
-            session_config['api'] = {}
-        api_config = session_config.get('api', {})
-        api = None
-        if api_config.get('api_id') in [4, 6, 2040, 10840, 21724]:
-            api = config_utils.get_api(api_config)
-
-        if api:
-            client_params = {
-                "session": session,
-                "api": api
-            }
+async def save_config_changes(stored_config: dict, accounts_config: dict, meta: Optional[dict] = None) -> int:
+    changed = {name: config for name, config in accounts_config.items() if stored_config.get(name) != config}
+    if changed or meta:
+        await config_utils.write_config_file(changed, CONFIG_PATH, meta=meta)
+        stored_config.update(deepcopy(changed))
+    return len(changed)
+
+async def resolve_session_config(session: str, accounts_config: dict,
+                                 allocator: Optional[proxy_utils.ProxyAllocator] = None) -> Optional[dict]:
+    session_name = os.path.basename(session)
+    session_config: dict = deepcopy(accounts_config.get(session_name, {}))
+    if 'api' not in session_config:
+        session_config['api'] = {}
+    api_config = session_config['api']
+    client_params = get_client_params(session, api_config)
+
+    session_config['user_agent'] = session_config.get('user_agent', generate_random_user_agent())
+    api_config.update(api_id=client_params.get('api_id') or client_params.get('api').api_id,
+                      api_hash=client_params.get('api_hash') or client_params.get('api').api_hash)
+
+    session_proxy = session_config.get('proxy')
+    if session_proxy or 'proxy' not in session_config.keys():
+        allocator = allocator or proxy_utils.ProxyAllocator(accounts_config, PROXIES_PATH)
+        if settings.DISABLE_PROXY_REPLACE:
+            proxy = session_proxy or allocator.take_unused()
         else:
-            client_params = {
-                "api_id": api_config.get("api_id", API_ID),
-                "api_hash": api_config.get("api_hash", API_HASH),
-                "session": session,
-                "lang_code": api_config.get("lang_code", "en"),
-                "system_lang_code": api_config.get("system_lang_code", "en-US")
-            }
-
-            for key in ("device_model", "system_version", "app_version"):
-                if api_config.get(key):
-                    client_params[key] = api_config[key]
-
-        session_config['user_agent'] = session_config.get('user_agent', generate_random_user_agent())
-        api_config.update(api_id=client_params.get('api_id') or client_params.get('api').api_id,
-                          api_hash=client_params.get('api_hash') or client_params.get('api').api_hash)
-
-        session_proxy = session_config.get('proxy')
-        if not session_proxy and 'proxy' in session_config.keys():
+            proxy = await allocator.allocate(session_proxy) if session_proxy or settings.USE_PROXY else None
+
+        if not proxy and (settings.USE_PROXY or session_proxy):
+            logger.warning(f"{session_name} | Didn't find a working unused proxy for session | Skipping")
+            return None
+        if proxy:
             try:
-                tg_clients.append(UniversalTelegramClient(**client_params))
-                if accounts_config.get(session_name) != session_config:
-                    await config_utils.update_session_config_in_file(session_name, session_config, CONFIG_PATH)
-            except (AuthKeyUnregisteredError, AuthKeyDuplicatedError, AuthKeyError,
-                   SessionPasswordNeededError, PyrogramAuthKeyUnregisteredError,
-                    PyrogramSessionPasswordNeededError,
-                   PyrogramSessionRevoked, InvalidSession) as e:
-                logger.error(f"{session_name} | Session initialization error: {e}")
-                await move_invalid_session_to_inactive_folder(session_name)
-            continue
+                Proxy.from_str(proxy)
+            except ValueError:
+                allocator.release(proxy)
+                logger.warning(f"{session_name} | Invalid proxy {proxy} | Skipping")
+                return None
+        session_config['proxy'] = proxy
 
-        else:
-            if settings.DISABLE_PROXY_REPLACE:
-                proxy = session_proxy or next(iter(proxy_utils.get_unused_proxies(accounts_config, PROXIES_PATH)), None)
-            else:
-                proxy = await proxy_utils.get_working_proxy(accounts_config, session_proxy) \
-                    if session_proxy or settings.USE_PROXY else None
-
-            if not proxy and (settings.USE_PROXY or session_proxy):
-                logger.warning(f"{session_name} | Didn't find a working unused proxy for session | Skipping")
+    accounts_config[session_name] = session_config
+    return session_config
+
+def stored_session_config(session_name: str, accounts_config: dict) -> Optional[dict]:
+    session_config = accounts_config.get(session_name)
+    if not session_config or not all(key in session_config for key in ('api', 'user_agent', 'proxy')):
+        return None
+    return session_config
+
+async def create_client(session: str, session_config: dict) -> Optional[UniversalTelegramClient]:
+    session_name = os.path.basename(session)
+    try:
+        return UniversalTelegramClient(**get_client_params(session, session_config['api']))
+    except SESSION_INIT_ERRORS as e:
+        logger.error(f"{session_name} | Session initialization error: {e}")
+        await release_session_proxy(session_name)
+        await move_invalid_session_to_inactive_folder(session_name)
+        return None
+
+async def release_session_proxy(session_name: str) -> None:
+    session_config = config_utils.read_config_file(CONFIG_PATH).get(session_name)
+    if session_config and session_config.pop('proxy', None):
+        await config_utils.write_config_file({session_name: session_config}, CONFIG_PATH)
+
+async def prepare_configs(session_paths: list[str], timer: Optional[StageTimer] = None,
+                          stats: Optional[dict] = None) -> Dict[str, dict]:
+    timer = timer or StageTimer('config')
+    stats = {} if stats is None else stats
+    with timer.stage('read'):
+        stored_config = config_utils.read_config_file(CONFIG_PATH)
+        accounts_config = deepcopy(stored_config)
+
+    with timer.stage('migrate'):
+        schema_version = config_utils.get_schema_version(CONFIG_PATH)
+        migrations_meta = {}
+        if schema_version < migrations.latest_version():
+            schema_version, _, migrations_meta = migrations.apply_migrations(accounts_config, schema_version)
+        imported = import_session_files(session_paths, accounts_config)
+        stats['migrated_configs'] = await save_config_changes(stored_config, accounts_config, migrations_meta)
+        for session in imported:
+            config_utils.remove_session_json(session)
+
+    with timer.stage('resolve'):
+        allocator = proxy_utils.ProxyAllocator(accounts_config, PROXIES_PATH)
+        resolve = partial(resolve_session_config, accounts_config=accounts_config, allocator=allocator)
+
+        active_sessions = []
+        for session in session_paths:
+            session_name = os.path.basename(session)
+            if session_name in settings.blacklisted_sessions:
+                logger.warning(f"{session_name} | Session is blacklisted | Skipping")
                 continue
-            else:
-                try:
-                    tg_clients.append(UniversalTelegramClient(**client_params))
-                    session_config['proxy'] = proxy
-                    if accounts_config.get(session_name) != session_config:
-                        await config_utils.update_session_config_in_file(session_name, session_config, CONFIG_PATH)
-                except (AuthKeyUnregisteredError, AuthKeyDuplicatedError, AuthKeyError,
-                      SessionPasswordNeededError, PyrogramAuthKeyUnregisteredError,
-                       PyrogramSessionPasswordNeededError,
-                      PyrogramSessionRevoked, InvalidSession) as e:
-                    logger.error(f"{session_name} | Session initialization error: {e}")
-                    await move_invalid_session_to_inactive_folder(session_name)
+            active_sessions.append(session)
 
-    return tg_clients
+        resolved = {os.path.basename(session): session_config for session, session_config
+                    in zip(active_sessions, await asyncio.gather(*map(resolve, active_sessions))) if session_config}
 
-async def init_config_file() -> None:
-    session_paths = get_sessions(SESSIONS_PATH)
+    with timer.stage('commit'):
+        stats['updated_configs'] = await save_config_changes(stored_config, accounts_config)
+    return resolved
 
-    if not session_paths:
+async def get_tg_clients(shard: Optional[Shard] = None) -> list[UniversalTelegramClient]:
+    timer = StageTimer('bootstrap')
+    with timer.stage('scan'):
+        session_paths = get_sessions(SESSIONS_PATH, shard)
+
+    if not session_paths and shard is None:
         raise FileNotFoundError("Session files not found")
-    for session in session_paths:
-        session_name = os.path.basename(session)
-        parsed_json = config_utils.import_session_json(session)
-        if parsed_json:
+
+    stats = {}
+    if shard is None:
+        session_configs = await prepare_configs(session_paths, timer, stats)
+    else:
+        with timer.stage('read'):
             accounts_config = config_utils.read_config_file(CONFIG_PATH)
-            session_config: dict = deepcopy(accounts_config.get(session_name, {}))
-            session_config['user_agent'] = session_config.get('user_agent', generate_random_user_agent())
-            session_config['api'] = parsed_json
-            if accounts_config.get(session_name) != session_config:
-                await config_utils.update_session_config_in_file(session_name, session_config, CONFIG_PATH)
+            session_configs = {}
+            for session in session_paths:
+                session_name = os.path.basename(session)
+                if session_name in settings.blacklisted_sessions:
+                    continue
+                session_config = stored_session_config(session_name, accounts_config)
+                if session_config:
+                    session_configs[session_name] = session_config
+                else:
+                    logger.warning(f"{session_name} | Session config is not resolved yet | Skipping")
 
-async def run_tasks() -> None:
-    await config_utils.restructure_config(CONFIG_PATH)
-    await init_config_file()
-    
+    with timer.stage('clients'):
+        tg_clients = []
+        for session in session_paths:
+            session_config = session_configs.get(os.path.basename(session))
+            tg_client = session_config and await create_client(session, session_config)
+            if tg_client:
+                tg_clients.append(tg_client)
+
+    timer.report(sessions=len(session_paths), clients=len(tg_clients), **stats)
+    return tg_clients
+
+async def add_session(session: str, session_tasks: Dict[str, asyncio.Task],
+                      engine: Optional[SessionEngine] = None, shard: Optional[Shard] = None) -> bool:
+    session_name = os.path.basename(session)
+    if session_name in session_tasks and not session_tasks[session_name].done():
+        return True
+    if engine is not None and session_name in engine:
+        return True
+
+    if shard is None:
+        session_config = (await prepare_configs([session])).get(session_name)
+    else:
+        session_config = stored_session_config(session_name, config_utils.read_config_file(CONFIG_PATH))
+    tg_client = session_config and await create_client(session, session_config)
+    if not tg_client:
+        return False
+    logger.info(f"{session_name} | New session detected")
+    if engine is not None:
+        engine.add(BaseBot(tg_client=tg_client))
+    else:
+        session_tasks[session_name] = asyncio.create_task(handle_tapper_session(tg_client=tg_client))
+    return True
+
+async def resolve_new_session(session: str) -> bool:
+    return os.path.basename(session) in await prepare_configs([session])
+
+async def remove_session(session: str, session_tasks: Dict[str, asyncio.Task],
+                         engine: Optional[SessionEngine] = None) -> None:
+    session_name = os.path.basename(session)
+    if engine is not None and session_name in engine:
+        logger.info(f"{session_name} | Session removed or blacklisted | Stopping")
+        await engine.remove(session_name)
+        return
+    task = session_tasks.pop(session_name, None)
+    if task and not task.done():
+        logger.info(f"{session_name} | Session removed or blacklisted | Stopping")
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+async def run_tasks(shard: Optional[Shard] = None) -> None:
     base_tasks = []
     
-    if settings.AUTO_UPDATE:
+    if settings.AUTO_UPDATE and shard is None:
         update_manager = UpdateManager()
         base_tasks.append(asyncio.create_task(update_manager.run()))
-    
-    tg_clients = await get_tg_clients()
-    client_tasks = [asyncio.create_task(handle_tapper_session(tg_client=tg_client)) for tg_client in tg_clients]
+
+    if settings.METRICS_LOG_INTERVAL > 0 and shard is None:
+        base_tasks.append(asyncio.create_task(report_metrics(settings.METRICS_LOG_INTERVAL)))
+
+    base_tasks.append(asyncio.create_task(http_pool.run_evictor()))
+    if settings.USE_PROXY:
+        base_tasks.append(asyncio.create_task(proxy_utils.proxy_health.run_prober()))
+
+    tg_clients = await get_tg_clients(shard)
+    started = {tg_client.session_name for tg_client in tg_clients}
+    initial_sessions = [session for session in get_sessions(SESSIONS_PATH, shard)
+                        if os.path.basename(session) in started]
+    startup_queue.plan(len(tg_clients), share=1 / shard[1] if shard else 1)
+    session_tasks: Dict[str, asyncio.Task] = {}
+    engine = None
+    if settings.SESSION_ENGINE:
+        engine = SessionEngine(workers=settings.ENGINE_WORKERS, on_invalid=handle_invalid_session)
+        for tg_client in tg_clients:
+            logger.info(f"{tg_client.session_name} | Starting session")
+            engine.add(BaseBot(tg_client=tg_client))
+        base_tasks.append(asyncio.create_task(engine.run()))
+    else:
+        session_tasks.update({
+            tg_client.session_name: asyncio.create_task(handle_tapper_session(tg_client=tg_client))
+            for tg_client in tg_clients
+        })
     
     try:
-        if client_tasks:
-            await asyncio.gather(*client_tasks, return_exceptions=True)
+        if settings.WATCH_SESSIONS:
+            watcher = SessionWatcher(
+                SESSIONS_PATH,
+                scan=lambda: get_sessions(SESSIONS_PATH, shard),
+                on_added=partial(add_session, session_tasks=session_tasks, engine=engine, shard=shard),
+                on_removed=partial(remove_session, session_tasks=session_tasks, engine=engine),
+                interval=settings.SESSIONS_WATCH_INTERVAL
+            )
+            await watcher.run(active=initial_sessions)
+        elif engine is not None:
+            await base_tasks[-1]
+        elif session_tasks:
+            await asyncio.gather(*session_tasks.values(), return_exceptions=True)
         
         for task in base_tasks:
             if not task.done():
@@ -274,12 +450,47 @@ async def run_tasks() -> None:
         await asyncio.gather(*base_tasks, return_exceptions=True)
         
     except asyncio.CancelledError:
-        for task in client_tasks + base_tasks:
+        tasks = list(session_tasks.values()) + base_tasks
+        for task in tasks:
             if not task.done():
                 task.cancel()
-        await asyncio.gather(*client_tasks + base_tasks, return_exceptions=True)
+        await asyncio.gather(*tasks, return_exceptions=True)
         raise
+    finally:
+        await http_pool.close()
         
+async def run_supervisor() -> None:
+    session_paths = get_sessions(SESSIONS_PATH)
+    if not session_paths:
+        raise FileNotFoundError("Session files not found")
+
+    resolved = await prepare_configs(session_paths)
+    supervisor = Supervisor(run_tasks, processes=settings.WORKER_PROCESSES)
+    base_tasks = [asyncio.create_task(supervisor.run())]
+    if settings.AUTO_UPDATE:
+        base_tasks.append(asyncio.create_task(UpdateManager(before_restart=supervisor.stop).run()))
+    if settings.METRICS_LOG_INTERVAL > 0:
+        base_tasks.append(asyncio.create_task(report_metrics(settings.METRICS_LOG_INTERVAL)))
+    if settings.WATCH_SESSIONS:
+        watcher = SessionWatcher(
+            SESSIONS_PATH,
+            scan=lambda: get_sessions(SESSIONS_PATH),
+            on_added=resolve_new_session,
+            interval=settings.SESSIONS_WATCH_INTERVAL
+        )
+        base_tasks.append(asyncio.create_task(watcher.run(
+            active=[session for session in session_paths if os.path.basename(session) in resolved])))
+
+    try:
+        await base_tasks[0]
+    finally:
+        for task in base_tasks:
+            task.cancel()
+        await asyncio.gather(*base_tasks, return_exceptions=True)
+
+async def handle_invalid_session(session_name: str, error: BaseException) -> None:
+    await move_invalid_session_to_inactive_folder(session_name)
+
 async def handle_tapper_session(tg_client: UniversalTelegramClient, stats_bot: Optional[object] = None):
     session_name = tg_client.session_name
     try:
@@ -0,0 +1,158 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import threading
+import zlib
+from contextlib import suppress
+from functools import partial
+from time import monotonic
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from loguru import logger as loguru_logger
+
+from bot.config import settings
+from bot.utils import logger
+from bot.utils.metrics import metrics
+from bot.utils.retry import Backoff
+
+Shard = Tuple[int, int]
+STABLE_UPTIME = 60
+STOP_TIMEOUT = 15
+
+def shard_of(session_name: str, shards: int) -> int:
+    return zlib.crc32(session_name.encode()) % shards
+
+def in_shard(session_name: str, shard: Optional[Shard]) -> bool:
+    return shard is None or shard_of(session_name, shard[1]) == shard[0]
+
+def _forward_log(events, index: int, message) -> None:
+    events.put(('log', index, message.record['level'].name, str(message).rstrip('\n')))
+
+async def _forward_metrics(events, index: int, interval: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        events.put(('metrics', index, metrics.snapshot()))
+
+async def _watch_parent(task: asyncio.Task) -> None:
+    parent = multiprocessing.parent_process()
+    while parent is None or parent.is_alive():
+        await asyncio.sleep(5)
+    logger.warning("Supervisor is gone, stopping worker")
+    task.cancel()
+
+async def _serve(target: Callable[[Shard], Awaitable[None]], index: int, shards: int, events) -> None:
+    main_task = asyncio.current_task()
+    with suppress(NotImplementedError):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, main_task.cancel)
+
+    helpers = [asyncio.create_task(_watch_parent(main_task))]
+    if settings.METRICS_LOG_INTERVAL > 0:
+        helpers.append(asyncio.create_task(_forward_metrics(events, index, settings.METRICS_LOG_INTERVAL)))
+    try:
+        await target((index, shards))
+    except asyncio.CancelledError:
+        pass
+    finally:
+        for task in helpers:
+            task.cancel()
+        await asyncio.gather(*helpers, return_exceptions=True)
+        events.put(('metrics', index, metrics.snapshot()))
+
+def run_worker(target: Callable[[Shard], Awaitable[None]], index: int, shards: int, events) -> None:
+    logger.remove()
+    logger.add(partial(_forward_log, events, index), format="{message}", level="TRACE", colorize=True)
+    with suppress(KeyboardInterrupt):
+        asyncio.run(_serve(target, index, shards, events))
+
+class Supervisor:
+    def __init__(self, target: Callable[[Shard], Awaitable[None]], processes: int = 0):
+        self.target = target
+        self.processes = processes or os.cpu_count() or 1
+        self._context = multiprocessing.get_context('spawn')
+        self._events = self._context.Queue()
+        self._workers: List[Optional[multiprocessing.Process]] = [None] * self.processes
+        self._started = [0.0] * self.processes
+        self._restart_at = [0.0] * self.processes
+        self._backoff = [Backoff(base=1, cap=60) for _ in range(self.processes)]
+        self._finished = [False] * self.processes
+        self._stopping = False
+        self._alive = metrics.gauge('workers_alive')
+
+    def _drain(self) -> None:
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            kind, index, *payload = event
+            if kind == 'log':
+                level, text = payload
+                loguru_logger.log(level, f"w{index} | {text}")
+            elif kind == 'metrics':
+                metrics.import_snapshot(f"worker={index}", payload[0])
+
+    def _start(self, index: int) -> None:
+        worker = self._context.Process(target=run_worker, name=f"worker-{index}", daemon=True,
+                                       args=(self.target, index, self.processes, self._events))
+        worker.start()
+        self._workers[index] = worker
+        self._started[index] = monotonic()
+        logger.info(f"Worker {index} started with pid {worker.pid}")
+
+    def _check(self, index: int) -> None:
+        if self._stopping:
+            return
+        worker = self._workers[index]
+        if worker is None:
+            if not self._finished[index] and monotonic() >= self._restart_at[index]:
+                metrics.counter('worker_restarts_total', worker=index).inc()
+                self._start(index)
+            return
+        if worker.is_alive():
+            if monotonic() - self._started[index] > STABLE_UPTIME:
+                self._backoff[index].reset()
+            return
+
+        self._workers[index] = None
+        exitcode = worker.exitcode
+        worker.close()
+        if exitcode == 0:
+            self._finished[index] = True
+            logger.info(f"Worker {index} finished")
+            return
+        delay = self._backoff[index].next()
+        self._restart_at[index] = monotonic() + delay
+        logger.error(f"Worker {index} exited with code {exitcode}, restarting in {int(delay)}s")
+
+    async def _stop(self) -> None:
+        workers = [worker for worker in self._workers if worker is not None]
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        loop = asyncio.get_running_loop()
+        for worker in workers:
+            await loop.run_in_executor(None, worker.join, STOP_TIMEOUT)
+            if worker.is_alive():
+                worker.kill()
+                await loop.run_in_executor(None, worker.join)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        await self._stop()
+
+    async def run(self) -> None:
+        logger.info(f"Starting {self.processes} worker processes")
+        drain = threading.Thread(target=self._drain, name="worker-events", daemon=True)
+        drain.start()
+        for index in range(self.processes):
+            self._start(index)
+        try:
+            while not all(self._finished):
+                await asyncio.sleep(1)
+                for index in range(self.processes):
+                    self._check(index)
+                self._alive.set(sum(worker is not None for worker in self._workers))
+        finally:
+            await self._stop()
+            self._events.put(None)
+            await asyncio.get_running_loop().run_in_executor(None, drain.join)
@@ -1,22 +1,33 @@
 import aiohttp
 import asyncio
 from typing import Dict, Optional, Any, Tuple, List
-from urllib.parse import urlencode, unquote
+from urllib.parse import urlencode, unquote, parse_qs
 from aiocfscrape import CloudflareScraper
-from aiohttp_proxy import ProxyConnector
 from better_proxy import Proxy
+from yarl import URL
 from random import uniform, randint
 from time import time
 from datetime import datetime, timezone
 import json
 import os
+import weakref
+from collections import deque
 
 from bot.utils.universal_telegram_client import UniversalTelegramClient
-from bot.utils.proxy_utils import check_proxy, get_working_proxy
+from bot.utils.proxy_utils import get_working_proxy, proxy_health
+from bot.utils.http_pool import http_pool
+from bot.utils.rate_limiter import rate_shaper
+from bot.utils.metrics import metrics
+from bot.utils.telegram_scheduler import URGENT, NORMAL
+from bot.utils.startup_queue import startup_queue
 from bot.utils.first_run import check_is_first_run, append_recurring_session
 from bot.config import settings
-from bot.utils import logger, config_utils, CONFIG_PATH
-from bot.exceptions import InvalidSession
+from bot.utils import logger, config_utils, json_codec, retry, circuit_breaker, CONFIG_PATH
+from bot.exceptions import InvalidSession, Deferred, RequestDeferred
+from bot.core.catalog import catalog, without_catalog, TASK_STATE_KEYS
+from bot.core.game_state import GameState
+from bot.core.headers import SessionHeaders
+from bot.core.api_result import ApiResult, Outcome, REJECTED_OUTCOMES, classify
 
 class BaseBot:
     API_BASE_URL = "https://qlyuker.sp.yandex.ru/api"
@@ -42,6 +53,12 @@ class BaseBot:
         'content-type': 'application/json'
     }
     
+    CHECKED_TASK_KINDS = ("actionCheck", "checkPlusBenefits")
+
+    MIN_SLEEP_TIME = 60
+    MAX_SLEEP_TIME = 60 * 30
+    SYNC_ERRORS_BEFORE_REAUTH = 3
+    
     UPGRADE_COOLDOWN = {
         "maxEnergy": 10,
         "coinsPerTap": 10,
@@ -50,6 +67,8 @@ class BaseBot:
         "promo3": 60*20,
         "restoreEnergy": 3600
     }
+
+    SNAPSHOT_FIELDS = ('_onboarding_completed', '_upgrade_last_buy_time', '_init_data', '_init_data_expires', '_cookies')
     
     def __init__(self, tg_client: UniversalTelegramClient):
         self.tg_client = tg_client
@@ -62,6 +81,7 @@ class BaseBot:
         self._access_token: Optional[str] = None
         self._is_first_run: Optional[bool] = None
         self._init_data: Optional[str] = None
+        self._init_data_expires: float = 0
         self._current_ref_id: Optional[str] = None
         self._game_data: Optional[Dict] = None
         self._cookies: Optional[str] = None
@@ -70,29 +90,30 @@ class BaseBot:
         self._team_id: Optional[int] = None
         self._user_agent: Optional[str] = None
         
-        self._accumulated_taps: int = 0
-        self._current_energy: int = 500
-        self._max_energy: int = 500
-        self._last_sync_time: int = int(time())
-        self._current_distance: int = 0
-        self._distance_per_tap: int = 1
-        self._distance_per_hour: int = 0
-        self._distance_per_sec: int = 0
-        self._current_candies: int = 0
-        self._current_tickets: int = 0
-        self._next_checkpoint_position: int = 0
-        
-        self._energy_restores_used: int = 0
-        self._energy_restores_max: int = 6
-        self._last_restore_date: Optional[str] = None
-        self._restore_energy_attempts: int = 0
+        self.state = GameState()
         
         self._available_upgrades: Dict[str, Dict] = {}
         self._upgrade_last_buy_time: Dict[str, float] = {}
         self._pending_upgrade_check: bool = True
 
         self._available_tasks: Dict[str, Dict] = {}
-        
+        self._task_check_times: Dict[str, int] = {}
+        self._error_backoff = retry.Backoff(base=2, cap=120)
+        self._proxy_backoff = retry.Backoff(base=30, cap=300)
+        self._last_snapshot_time: float = 0
+        self._phase_taps: int = 0
+        self._phase_restores: int = 0
+        self._phase_start_energy: int = 0
+        self._sleep_started: float = 0
+        self._sleep_deadline: float = 0
+        self._sleep_target: float = 0
+        self._task_queue: deque = deque()
+        self._tasks_checked: int = 0
+        self._tasks_completed: int = 0
+        self._defer_waits: bool = False
+        self._deferred_attempts: Dict[str, int] = {}
+        self._sync_client_errors: int = 0
+
         session_config = config_utils.get_session_config(self.session_name, CONFIG_PATH)
         if not all(key in session_config for key in ('api', 'user_agent')):
             logger.critical(f"CHECK accounts_config.json as it might be corrupted")
@@ -107,6 +128,38 @@ class BaseBot:
         self._user_agent = session_config.get('user_agent', 
             'Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 '
             '(KHTML, like Gecko) Chrome/142.0.0.0 Mobile Safari/537.36')
+        self._headers = SessionHeaders(self.DEFAULT_HEADERS, self._user_agent)
+
+        self._restore_snapshot(config_utils.get_session_snapshot(self.session_name, CONFIG_PATH))
+        _active_bots.add(self)
+
+    def _snapshot(self) -> Dict[str, Any]:
+        snapshot = {field: getattr(self, field) for field in self.SNAPSHOT_FIELDS}
+        snapshot['state'] = self.state.to_dict()
+        self._task_check_times.update(
+            (task_id, task['time']) for task_id, task in self._available_tasks.items() if task.get('time'))
+        snapshot['_task_check_times'] = self._task_check_times
+        return snapshot
+
+    def _restore_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        if not snapshot:
+            return
+        for field in self.SNAPSHOT_FIELDS:
+            if field in snapshot:
+                setattr(self, field, snapshot[field])
+        self.state.update_from_dict(snapshot.get('state', {}))
+        self._task_check_times = snapshot.get('_task_check_times', {})
+        self._headers.set_cookies(self._cookies)
+        logger.info(f"{self.session_name} | Restored saved game state")
+
+    async def save_snapshot(self, force: bool = False) -> None:
+        if not force and time() - self._last_snapshot_time < settings.SNAPSHOT_INTERVAL:
+            return
+        self._last_snapshot_time = time()
+        try:
+            await config_utils.save_session_snapshot(self.session_name, self._snapshot(), CONFIG_PATH)
+        except Exception as e:
+            logger.warning(f"{self.session_name} | Failed to save game state: {e}")
 
     def get_ref_id(self) -> str:
         if self._current_ref_id is None:
@@ -120,12 +173,27 @@ class BaseBot:
                 self._current_ref_id = 'bro-228618799'
         return self._current_ref_id
     
-    async def get_tg_web_data(self, app_name: str = "qlyukerbot", path: str = "start") -> str:
+    def _init_data_valid(self) -> bool:
+        return bool(self._init_data) and time() < self._init_data_expires
+
+    def _invalidate_init_data(self) -> None:
+        self._init_data = None
+        self._init_data_expires = 0
+
+    async def get_tg_web_data(self, app_name: str = "qlyukerbot", path: str = "start",
+                              priority: int = NORMAL) -> str:
+        if self._init_data_valid():
+            metrics.counter('init_data_cache_hits_total').inc()
+            return self._init_data
+
+        metrics.counter('telegram_webview_requests_total').inc()
         try:
             webview_url = await self.tg_client.get_app_webview_url(
                 app_name,
                 path,
-                self.get_ref_id()
+                self.get_ref_id(),
+                priority=priority,
+                defer=self._defer_waits
             )
             
             if not webview_url:
@@ -136,27 +204,32 @@ class BaseBot:
             )
             
             self._init_data = tg_web_data
+            auth_date = parse_qs(tg_web_data).get('auth_date', [None])[0]
+            issued = int(auth_date) if auth_date and auth_date.isdigit() else int(time())
+            self._init_data_expires = issued + settings.INIT_DATA_TTL
             return tg_web_data
             
+        except Deferred:
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Error getting TG Web Data: {str(e)}")
             raise InvalidSession("Failed to get TG Web Data")
 
-    async def check_and_update_proxy(self, accounts_config: dict) -> bool:
+    async def check_and_update_proxy(self, accounts_config: Optional[dict] = None) -> bool:
         if not settings.USE_PROXY:
             return True
 
-        if not self._current_proxy or not await check_proxy(self._current_proxy):
-            new_proxy = await get_working_proxy(accounts_config, self._current_proxy)
+        if not self._current_proxy or not await proxy_health.check(self._current_proxy):
+            new_proxy = await get_working_proxy(accounts_config or config_utils.read_config_file(CONFIG_PATH),
+                                                self._current_proxy)
             if not new_proxy:
                 return False
 
+            await http_pool.close_session(self._http_client, self._current_proxy)
+            proxy_health.unwatch(self._current_proxy)
+            proxy_health.watch(new_proxy)
             self._current_proxy = new_proxy
-            if self._http_client and not self._http_client.closed:
-                await self._http_client.close()
-
-            proxy_conn = {'connector': ProxyConnector.from_url(new_proxy)}
-            self._http_client = CloudflareScraper(timeout=aiohttp.ClientTimeout(60), **proxy_conn)
+            self._http_client = http_pool.session(new_proxy, timeout=aiohttp.ClientTimeout(60))
             logger.info(f"{self.session_name} | Switched to new proxy: {new_proxy}")
 
         return True
@@ -172,149 +245,199 @@ class BaseBot:
             logger.error(f"{self.session_name} | Session initialization error: {str(e)}")
             return False
 
-    async def make_request(self, method: str, url: str, **kwargs) -> Optional[Dict]:
+    async def make_request(self, method: str, url: str, **kwargs) -> ApiResult:
         if not self._http_client:
             raise InvalidSession("HTTP client not initialized")
 
-        try:
-            async with getattr(self._http_client, method.lower())(url, **kwargs) as response:
-                if response.status == 200:
-                    return await response.json()
-                else:
-                    if response.status != 400:
+        policy = retry.policy_for(url)
+        breaker = circuit_breaker.get_breaker(url)
+        attempt = self._deferred_attempts.pop(url, 0)
+        if not attempt:
+            retry.retry_budget.deposit()
+        while True:
+            if self._defer_waits:
+                probe = breaker.try_acquire()
+                wait = breaker.retry_in() if probe is None else rate_shaper.try_acquire(self._current_proxy)
+                if probe is None or wait:
+                    if probe is not None:
+                        breaker.release(probe)
+                    if attempt:
+                        self._deferred_attempts[url] = attempt
+                    raise RequestDeferred(wait)
+            else:
+                probe = await breaker.acquire()
+                try:
+                    await rate_shaper.acquire(self._current_proxy)
+                except asyncio.CancelledError:
+                    breaker.release(probe)
+                    raise
+            status, retry_after, error, failure = None, None, None, ""
+            try:
+                async with getattr(self._http_client, method.lower())(url, **kwargs) as response:
+                    status = response.status
+                    if status == 200:
+                        data = json_codec.loads(await response.read())
+                        breaker.record(False, probe)
+                        if attempt:
+                            policy.recovered.inc()
+                        return self._api_result(policy, ApiResult(Outcome.OK, data, status))
+                    retry_after = retry.parse_retry_after(response.headers.get('Retry-After'))
+                    if status != 400:
                         response_text = ""
                         try:
                             response_text = await response.text()
                         except Exception as e_text:
                             logger.error(f"{self.session_name} | Error reading response text: {e_text}")
-                        
-                        logger.error(f"{self.session_name} | Request failed with status {response.status}. URL: {url}. Response: {response_text}")
-                    return None
-        except Exception as e:
-            logger.error(f"{self.session_name} | Request error: {str(e)}. URL: {url}")
-            return None
-            
-    async def auth_start(self) -> bool:
+                        failure = f"Request failed with status {status}. URL: {url}. Response: {response_text}"
+            except asyncio.CancelledError:
+                breaker.release(probe)
+                raise
+            except Exception as e:
+                if status == 200:
+                    status = None
+                error = e
+                failure = f"Request error: {str(e)}. URL: {url}"
+            breaker.record(circuit_breaker.is_outage(status, error), probe)
+
+            attempt += 1
+            result = ApiResult(classify(status, error), status=status)
+            if attempt >= policy.max_attempts or not policy.should_retry(status, error):
+                if failure:
+                    logger.error(f"{self.session_name} | {failure}")
+                if attempt > 1:
+                    policy.exhausted.inc()
+                return self._api_result(policy, result)
+            if not retry.retry_budget.withdraw():
+                policy.budget_exhausted.inc()
+                logger.error(f"{self.session_name} | {failure} (retry budget exhausted)")
+                return self._api_result(policy, result)
+
+            policy.retries.inc()
+            delay = policy.delay(attempt, retry_after)
+            logger.warning(f"{self.session_name} | {failure}. Retry {attempt}/{policy.max_attempts - 1} "
+                           f"in {delay:.1f}s")
+            if self._defer_waits:
+                self._deferred_attempts[url] = attempt
+                raise RequestDeferred(delay)
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _api_result(policy: retry.RetryPolicy, result: ApiResult) -> ApiResult:
+        metrics.counter('api_requests_total', endpoint=policy.name, outcome=result.outcome.value).inc()
+        return result
+            
+    async def auth_start(self, priority: int = NORMAL) -> bool:
+        async with startup_queue.auth(self.session_name, defer=self._defer_waits):
+            return await self._authenticate(priority)
+
+    async def _authenticate(self, priority: int) -> bool:
         logger.info(f"{self.session_name} | 🔑 Attempting authorization...")
         try:
-            tg_web_data = await self.get_tg_web_data()
-            
-            headers = self.DEFAULT_HEADERS.copy()
-            headers['User-Agent'] = self._user_agent
-            headers['Onboarding'] = 'null'
-            
-            payload = {
-                "startData": tg_web_data
-            }
-            
-            response = await self.make_request(
-                'post',
-                self.AUTH_START_URL,
-                headers=headers,
-                json=payload
-            )
+            cached = self._init_data_valid()
+            result = await self._post_auth(await self.get_tg_web_data(priority=priority))
+            if cached and result.outcome in REJECTED_OUTCOMES:
+                logger.info(f"{self.session_name} | Cached init data rejected ({result.outcome.value}), "
+                            f"requesting fresh web app data")
+                self._invalidate_init_data()
+                result = await self._post_auth(await self.get_tg_web_data(priority=URGENT))
+            response = result.data
             
             if not response:
+                if result.outcome in REJECTED_OUTCOMES:
+                    self._invalidate_init_data()
                 logger.error("ኃ Auth request failed or returned no data")
                 return False
                 
-            self._game_data = response
+            self._apply_auth_response(response)
             
-            if 'game' in response:
-                game_data = response['game']
-                self._current_energy = game_data.get('currentEnergy', self._current_energy)
-                self._max_energy = game_data.get('maxEnergy', self._max_energy)
-                self._current_distance = game_data.get('currentCoins', self._current_distance)
-                self._distance_per_tap = game_data.get('coinsPerTap', self._distance_per_tap)
-                self._distance_per_hour = game_data.get('minePerHour', self._distance_per_hour)
-                self._distance_per_sec = game_data.get('minePerSec', self._distance_per_sec)
-                self._current_candies = game_data.get('currentCandies', self._current_candies)
-                self._current_tickets = game_data.get('currentTickets', self._current_tickets)
-                self._next_checkpoint_position = game_data.get('nextCheckpointPosition', self._next_checkpoint_position)
-            
-            if 'sharedConfig' in response and 'upgradeDelay' in response['sharedConfig']:
-                self.UPGRADE_COOLDOWN = {}
-                for level, delay in response['sharedConfig']['upgradeDelay'].items():
-                    self.UPGRADE_COOLDOWN[int(level)] = int(delay)
-                    
-                day_limitation_delay = response['sharedConfig'].get('dayLimitationUpgradeDelay', 3600)
-                self.UPGRADE_COOLDOWN['restoreEnergy'] = day_limitation_delay
-            
-            self._update_available_upgrades()
-            self._update_available_tasks()
-            
-            if hasattr(self._http_client, '_session') and hasattr(self._http_client._session, 'cookie_jar'):
-                cookies = self._http_client._session.cookie_jar.filter_cookies(self.AUTH_START_URL)
-                cookie_strings = [f"{key}={cookie.value}" for key, cookie in cookies.items()]
-                self._cookies = "; ".join(cookie_strings)
+            cookies = self._http_client.cookie_jar.filter_cookies(URL(self.AUTH_START_URL))
+            if cookies:
+                self._cookies = "; ".join(f"{key}={cookie.value}" for key, cookie in cookies.items())
+                self._headers.set_cookies(self._cookies)
                 
             user_id = self._game_data.get('user', {}).get('uid')
-            distance_to_checkpoint = self._next_checkpoint_position - self._current_distance
+            distance_to_checkpoint = self.state.next_checkpoint - self.state.coins
             logger.info(
                 f"{self.session_name} | ✅ Auth successful! User ID: {user_id}, "
-                f"📏 Distance: {self._current_distance} (to checkpoint: {distance_to_checkpoint}), "
-                f"🍬 Candies: {self._current_candies}, 🎫 Tickets: {self._current_tickets}, "
-                f"⚡ Energy: {self._current_energy}/{self._max_energy}"
+                f"📏 Distance: {self.state.coins} (to checkpoint: {distance_to_checkpoint}), "
+                f"🍬 Candies: {self.state.candies}, 🎫 Tickets: {self.state.tickets}, "
+                f"⚡ Energy: {self.state.energy}/{self.state.max_energy}"
             )
+            await self.save_snapshot(force=True)
             return True
             
+        except Deferred:
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | ኃ Error during auth start: {str(e)}")
             return False
 
-    def _update_available_upgrades(self) -> None:
-        if not self._game_data or 'upgrades' not in self._game_data or 'list' not in self._game_data['upgrades']:
-            return
-            
-        upgrades_list = self._game_data['upgrades']['list']
-        self._available_upgrades = {}
-        
-        for upgrade in upgrades_list:
-            upgrade_id = upgrade.get('id')
-            if not upgrade_id:
-                continue
-                
-            if upgrade_id == 'restoreEnergy':
-                day_limitation = upgrade.get('dayLimitation', 6)
-                current_level = upgrade.get('level', 0)
-                self._energy_restores_max = day_limitation
-                self._energy_restores_used = current_level
-                
-            self._available_upgrades[upgrade_id] = upgrade
+    async def _post_auth(self, tg_web_data: str) -> ApiResult:
+        payload = {
+            "startData": tg_web_data
+        }
+        return await self.make_request(
+            'post',
+            self.AUTH_START_URL,
+            headers=self._headers.get('null', cookies=False),
+            json=payload
+        )
+
+    async def reauthenticate(self, reason: str) -> bool:
+        metrics.counter('reauth_total', reason=reason).inc()
+        metrics.window_counter('reauth_last_hour', reason=reason).inc()
+        return await self.auth_start(priority=URGENT if reason == 'expired' else NORMAL)
+
+    def _apply_auth_response(self, response: Dict) -> None:
+        self._game_data = without_catalog(response)
+
+        if 'game' in response:
+            self.state.apply(response['game'])
 
-    def _update_available_tasks(self) -> None:
-        if not self._game_data or 'tasks' not in self._game_data:
+        if 'sharedConfig' in response and 'upgradeDelay' in response['sharedConfig']:
+            self.UPGRADE_COOLDOWN = catalog.upgrade_cooldowns(response['sharedConfig'])
+
+        if 'list' in response.get('upgrades', {}):
+            self._update_available_upgrades(response['upgrades']['list'])
+        self._update_available_tasks(response.get('tasks'))
+
+    def _update_available_upgrades(self, upgrades_list: Optional[List[Dict]] = None) -> None:
+        if upgrades_list is not None:
+            self._available_upgrades = catalog.upgrades(upgrades_list)
+
+        restore_energy = self._available_upgrades.get('restoreEnergy')
+        if restore_energy:
+            self.state.restores_max = restore_energy.get('dayLimitation', 6)
+            self.state.restores_used = restore_energy.get('level', 0)
+
+    def _update_available_tasks(self, tasks_list: Optional[List[Dict]]) -> None:
+        if tasks_list is None:
             logger.info("🧾 No tasks data found in game_data.")
             self._available_tasks = {}
             return
 
-        tasks_list = self._game_data.get('tasks', [])
-        temp_tasks = {}
-        for task_data in tasks_list:
-            task_id = task_data.get('id')
-            if task_id:
-                temp_tasks[task_id] = task_data
+        temp_tasks = catalog.tasks(tasks_list)
+        for task_id, task_data in temp_tasks.items():
+            saved_check_time = self._task_check_times.get(task_id, 0)
+            if saved_check_time > task_data.get('time', 0):
+                task_data['time'] = saved_check_time
         
         self._available_tasks = temp_tasks
         logger.info(f"{self.session_name} | 🧾 Updated available tasks: {len(self._available_tasks)} tasks loaded.")
 
     async def game_onboarding(self) -> bool:
         try:
-            headers = self.DEFAULT_HEADERS.copy()
-            headers['User-Agent'] = self._user_agent
-            headers['Onboarding'] = '0'
+            headers = self._headers.get('0')
             
-            if self._cookies:
-                headers['Cookie'] = self._cookies
-                
             payload = {"tier": 2}
             
-            response = await self.make_request(
+            result = await self.make_request(
                 'post',
                 self.GAME_ONBOARDING_URL,
                 headers=headers,
                 json=payload
             )
+            response = result.data
             
             if not response or response.get('result') != 2:
                 logger.error(f"{self.session_name} | Failed to complete onboarding: {response}")
@@ -324,6 +447,8 @@ class BaseBot:
             self._onboarding_completed = True
             return True
             
+        except Deferred:
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Error during game onboarding: {str(e)}")
             return False
@@ -331,44 +456,48 @@ class BaseBot:
 
     async def sync_game(self, taps: int = 0) -> Optional[Dict]:
         try:
-            headers = self.DEFAULT_HEADERS.copy()
-            headers['User-Agent'] = self._user_agent
-            headers['Onboarding'] = '2'
+            headers = self._headers.get('2')
             
-            if self._cookies:
-                headers['Cookie'] = self._cookies
-                
             current_time = int(time())
             
             payload = {
-                "currentEnergy": self._current_energy,
+                "currentEnergy": self.state.energy,
                 "clientTime": current_time,
                 "taps": taps
             }
             
-            response = await self.make_request(
+            result = await self.make_request(
                 'post',
                 self.GAME_SYNC_URL,
                 headers=headers,
                 json=payload
             )
+            response = result.data
             
             if not response:
-                logger.error(f"{self.session_name} | Failed to sync game data")
+                if result.outcome is Outcome.CLIENT_ERROR:
+                    self._sync_client_errors += 1
+                expired = result.outcome is Outcome.AUTH_EXPIRED
+                if not expired and self._sync_client_errors < self.SYNC_ERRORS_BEFORE_REAUTH:
+                    logger.error(f"{self.session_name} | Failed to sync game data ({result.outcome.value})")
+                    return None
                 
-                logger.info("Trying to re-authenticate due to sync failure")
-                if await self.auth_start():
+                if expired:
+                    logger.info(f"{self.session_name} | Game session expired, re-authenticating")
+                else:
+                    logger.warning(f"{self.session_name} | {self._sync_client_errors} sync requests rejected "
+                                   f"in a row, re-authenticating")
+                self._sync_client_errors = 0
+                if await self.reauthenticate('expired' if expired else 'sync_rejected'):
                     logger.info("Re-authentication successful, retrying sync")
                     
-                    if self._cookies:
-                        headers['Cookie'] = self._cookies
-                        
-                    response = await self.make_request(
+                    result = await self.make_request(
                         'post',
                         self.GAME_SYNC_URL,
                         headers=headers,
                         json=payload
                     )
+                    response = result.data
                     
                     if not response:
                         logger.error(f"{self.session_name} | Failed to sync game data after re-authentication")
@@ -377,11 +506,10 @@ class BaseBot:
                     logger.error("Re-authentication failed")
                     return None
             
-            self._current_distance = response.get('currentCoins', self._current_distance)
-            self._current_candies = response.get('currentCandies', self._current_candies)
-            self._current_tickets = response.get('currentTickets', self._current_tickets)
-            self._current_energy = response.get('currentEnergy', self._current_energy)
-            self._last_sync_time = response.get('lastSync', current_time)
+            self._error_backoff.reset()
+            self._sync_client_errors = 0
+            self.state.last_sync = current_time
+            self.state.apply(response)
             
             checkpoint_reward = response.get('reward')
             if checkpoint_reward:
@@ -403,20 +531,23 @@ class BaseBot:
             next_checkpoint = response.get('nextCheckpoint')
             if next_checkpoint:
                 if isinstance(next_checkpoint, dict) and 'position' in next_checkpoint:
-                    self._next_checkpoint_position = next_checkpoint['position']
+                    self.state.next_checkpoint = next_checkpoint['position']
                 elif isinstance(next_checkpoint, (int, float)):
-                    self._next_checkpoint_position = int(next_checkpoint)
+                    self.state.next_checkpoint = int(next_checkpoint)
             
             self._pending_upgrade_check = True
             
-            distance_to_checkpoint = self._next_checkpoint_position - self._current_distance if self._next_checkpoint_position > 0 else 0
+            distance_to_checkpoint = self.state.next_checkpoint - self.state.coins if self.state.next_checkpoint > 0 else 0
             logger.info(
                 f"{self.session_name} | Sync: {taps} taps, "
-                f"📏 {self._current_distance} (to checkpoint: {distance_to_checkpoint}), "
-                f"🍬 {self._current_candies}, ⚡ {self._current_energy}/{self._max_energy}"
+                f"📏 {self.state.coins} (to checkpoint: {distance_to_checkpoint}), "
+                f"🍬 {self.state.candies}, ⚡ {self.state.energy}/{self.state.max_energy}"
             )
+            await self.save_snapshot()
             return response
             
+        except Deferred:
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Error during game sync: {str(e)}")
             return None
@@ -427,24 +558,19 @@ class BaseBot:
                 logger.info(f"{self.session_name} | Upgrade {upgrade_id} is not available now")
                 return None
                 
-            headers = self.DEFAULT_HEADERS.copy()
-            headers['User-Agent'] = self._user_agent
-            headers['Onboarding'] = '2'
-            headers['Referer'] = 'https://qlyuker.io/upgrades'
+            headers = self._headers.get('2', referer='https://qlyuker.io/upgrades')
             
-            if self._cookies:
-                headers['Cookie'] = self._cookies
-                
             payload = {
                 "upgradeId": upgrade_id
             }
             
-            response = await self.make_request(
+            result = await self.make_request(
                 'post',
                 self.UPGRADE_BUY_URL,
                 headers=headers,
                 json=payload
             )
+            response = result.data
             
             if not response:
                 logger.warning(
@@ -465,9 +591,9 @@ class BaseBot:
                 self._upgrade_last_buy_time[upgrade_id] = time()
                 
                 if upgrade_id == 'restoreEnergy':
-                    self._restore_energy_attempts += 1
-                    if self._restore_energy_attempts >= 2:
-                        self._energy_restores_used = self._energy_restores_max
+                    self.state.restore_attempts += 1
+                    if self.state.restore_attempts >= 2:
+                        self.state.restores_used = self.state.restores_max
                         
                 return None
                 
@@ -475,29 +601,24 @@ class BaseBot:
                 
             logger.info(
                 f"{self.session_name} | 🛒 Successfully bought upgrade {upgrade_id}, "
-                f"⚡ {self._current_energy}/{self._max_energy}, 🍬 {self._current_candies}"
+                f"⚡ {self.state.energy}/{self.state.max_energy}, 🍬 {self.state.candies}"
             )
             return response
             
+        except Deferred:
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | Error buying upgrade: {str(e)}")
             return None
             
     async def _update_upgrade_after_purchase(self, buy_response: Dict, upgrade_id: str) -> None:
         if 'currentEnergy' in buy_response:
-            self._current_energy = buy_response.get('currentEnergy', self._current_energy)
-            self._max_energy = buy_response.get('maxEnergy', self._max_energy)
-            self._current_distance = buy_response.get('currentCoins', self._current_distance)
-            self._current_candies = buy_response.get('currentCandies', self._current_candies)
-            self._current_tickets = buy_response.get('currentTickets', self._current_tickets)
-            self._distance_per_tap = buy_response.get('coinsPerTap', self._distance_per_tap)
-            self._distance_per_hour = buy_response.get('minePerHour', self._distance_per_hour)
-            self._distance_per_sec = buy_response.get('minePerSec', self._distance_per_sec)
+            self.state.apply(buy_response)
                 
         if upgrade_id == 'restoreEnergy' and 'upgrade' in buy_response:
-            self._energy_restores_used = buy_response['upgrade'].get('level', 0)
-            self._last_restore_date = datetime.now().strftime("%Y-%m-%d")
-            self._restore_energy_attempts = 0
+            self.state.restores_used = buy_response['upgrade'].get('level', 0)
+            self.state.last_restore_date = datetime.now().strftime("%Y-%m-%d")
+            self.state.restore_attempts = 0
         
         if 'upgrade' in buy_response:
             upgrade = buy_response['upgrade']
@@ -526,14 +647,14 @@ class BaseBot:
             return False
             
         if upgrade_id == 'restoreEnergy':
-            if self._restore_energy_attempts >= 2:
+            if self.state.restore_attempts >= 2:
                 logger.warning(f"{self.session_name} | ⚠️ Too many restore energy attempts, skipping")
                 return False
                 
-            if self._energy_restores_used >= self._energy_restores_max:
+            if self.state.restores_used >= self.state.restores_max:
                 logger.warning(
                     f"{self.session_name} | 🔋 Daily energy restore limit reached "
-                    f"({self._energy_restores_used}/{self._energy_restores_max})"
+                    f"({self.state.restores_used}/{self.state.restores_max})"
                 )
                 return False
                 
@@ -574,10 +695,10 @@ class BaseBot:
                 
         if upgrade_id != 'restoreEnergy':
             upgrade_price = self._available_upgrades[upgrade_id].get('next', {}).get('price', 0)
-            if upgrade_price > self._current_candies:
+            if upgrade_price > self.state.candies:
                 logger.info(
                     f"{self.session_name} | 🍬 Not enough candies for upgrade {upgrade_id}, "
-                    f"need {upgrade_price}, have {self._current_candies}"
+                    f"need {upgrade_price}, have {self.state.candies}"
                 )
                 return False
                 
@@ -586,11 +707,11 @@ class BaseBot:
     async def _prioritize_upgrades(self) -> List[Dict]:
         self._update_available_upgrades()
         
-        if self._current_candies < 3:
+        if self.state.candies < 3:
             return []
             
         upgrade_scores = []
-        current_speed_per_sec = self._distance_per_sec
+        current_speed_per_sec = self.state.mine_per_sec
         
         excluded_upgrades = {'restoreEnergy', 'coinsPerTap'}
         
@@ -653,7 +774,7 @@ class BaseBot:
         return sorted_upgrades
         
     async def check_and_buy_upgrades(self) -> None:
-        logger.info(f"{self.session_name} | ▶️ Starting upgrade phase with 🍬 {self._current_candies}")
+        logger.info(f"{self.session_name} | ▶️ Starting upgrade phase with 🍬 {self.state.candies}")
         prioritized_upgrades = await self._prioritize_upgrades()
         
         if not prioritized_upgrades:
@@ -665,7 +786,7 @@ class BaseBot:
             upgrade_id = upgrade_info['upgrade_id']
             price = upgrade_info['price']
             
-            if price > self._current_candies:
+            if price > self.state.candies:
                 continue
                 
             logger.info(f"{self.session_name} | 🛒 Trying to buy {upgrade_id} (Price: {price} 🍬)")
@@ -677,7 +798,7 @@ class BaseBot:
                 
         logger.info(
             f"{self.session_name} | ⏹️ Upgrade phase completed. Bought: {upgrades_bought_count} upgrades. "
-            f"Remaining 🍬 {self._current_candies}"
+            f"Remaining 🍬 {self.state.candies}"
         )
 
     async def _check_task(self, task_id: str) -> bool:
@@ -687,19 +808,16 @@ class BaseBot:
             return False
 
         try:
-            headers = self.DEFAULT_HEADERS.copy()
-            headers['User-Agent'] = self._user_agent
-            headers['Onboarding'] = '2'
-            if self._cookies:
-                headers['Cookie'] = self._cookies
+            headers = self._headers.get('2')
 
             payload = {"taskId": task_id}
-            response = await self.make_request(
+            result = await self.make_request(
                 'post',
                 self.TASKS_CHECK_URL,
                 headers=headers,
                 json=payload
             )
+            response = result.data
 
             if not response:
                 logger.error(f"{self.session_name} | 🚫 Failed to check task {task_id}, no response.")
@@ -708,17 +826,13 @@ class BaseBot:
                 return False
 
             if response.get('task'):
-                 self._available_tasks[task_id] = response['task']
+                 self._available_tasks[task_id] = catalog.split('task', response['task'], TASK_STATE_KEYS)
 
             if response.get("success") is True:
                 reward = task_data.get('meta', {}).get('reward', 0)
                 reward_type = task_data.get('meta', {}).get('rewardType', 'range')
                 
-                if 'currentCoins' in response:
-                    self._current_distance = response.get('currentCoins', self._current_distance)
-                    
-                if 'currentCandies' in response:
-                    self._current_candies = response.get('currentCandies', self._current_candies)
+                self.state.apply(response)
 
                 reward_emoji = '🍬' if reward_type == 'candy' else '📏'
                 logger.info(
@@ -730,27 +844,28 @@ class BaseBot:
                 logger.info(f"{self.session_name} | ⏳ Task {task_id} not yet completed or failed. Server time: {response.get('time')}")
                 return False
 
+        except Deferred:
+            raise
         except Exception as e:
             logger.error(f"{self.session_name} | 🚫 Error checking task {task_id}: {str(e)}")
             return False
 
-    async def _process_tasks(self) -> None:
+    def _begin_task_phase(self) -> None:
         logger.info(f"{self.session_name} | ▶️ Starting task processing phase.")
-        if not self._available_tasks:
+        self._task_queue = deque(self._available_tasks)
+        self._tasks_checked = 0
+        self._tasks_completed = 0
+        if not self._task_queue:
             logger.info("🧾 No tasks available to process.")
-            return
-
-        tasks_processed_count = 0
-        tasks_completed_count = 0
-        supported_task_kinds = ["actionCheck", "checkPlusBenefits", "subscribeChannel"]
 
-        for task_id, task_data in list(self._available_tasks.items()):
-            task_kind = task_data.get('kind')
-            task_title = task_data.get('title', task_id)
-
-            if task_kind not in supported_task_kinds:
+    async def _task_step(self) -> Optional[float]:
+        while self._task_queue:
+            task_id = self._task_queue[0]
+            task_data = self._available_tasks.get(task_id, {})
+            if task_data.get('kind') not in self.CHECKED_TASK_KINDS:
+                self._task_queue.popleft()
                 continue
-            
+
             last_check_time = task_data.get('time', 0)
             check_delay = task_data.get('meta', {}).get('checkDelay', 0)
             current_timestamp = int(time())
@@ -761,82 +876,97 @@ class BaseBot:
                     f"{self.session_name} | ⏳ Task {task_id} on cooldown, "
                     f"remaining: {remaining}s"
                 )
+                self._task_queue.popleft()
                 continue
-            
-            if task_kind == "subscribeChannel":
-                pass
-            
-            if task_kind in ["actionCheck", "checkPlusBenefits"]:
-                completed = await self._check_task(task_id)
-                if completed:
-                    tasks_completed_count += 1
-                tasks_processed_count +=1
-                await asyncio.sleep(randint(3, 7))
-        
-        logger.info(f"{self.session_name} | ⏹️ Task processing phase completed. Checked: {tasks_processed_count}, Completed now: {tasks_completed_count}.")
 
-    async def buy_tickets(self) -> None:
-        if not self._game_data or 'user' not in self._game_data or 'yandex' not in self._game_data['user']:
-            return
+            if await self._check_task(task_id):
+                self._tasks_completed += 1
+            self._tasks_checked += 1
+            self._task_queue.popleft()
+            return randint(3, 7)
+        return None
 
-        logger.info(f"{self.session_name} | Yandex account detected. Starting to buy tickets with candies.")
-        
-        while self._current_candies >= 10:
-            logger.info(f"{self.session_name} | Have {self._current_candies} candies. Trying to buy 1 ticket.")
-            
-            headers = self.DEFAULT_HEADERS.copy()
-            headers['User-Agent'] = self._user_agent
-            headers['Onboarding'] = '2'
-            if self._cookies:
-                headers['Cookie'] = self._cookies
+    def _end_task_phase(self) -> None:
+        logger.info(f"{self.session_name} | ⏹️ Task processing phase completed. Checked: {self._tasks_checked}, Completed now: {self._tasks_completed}.")
 
-            payload = {"count": 1}
+    async def _process_tasks(self) -> None:
+        self._begin_task_phase()
+        delay = await self._task_step()
+        while delay is not None:
+            await asyncio.sleep(delay)
+            delay = await self._task_step()
+        self._end_task_phase()
 
-            response = await self.make_request(
-                'post',
-                self.TICKETS_BUY_URL,
-                headers=headers,
-                json=payload
-            )
+    def _has_yandex_account(self) -> bool:
+        return bool(self._game_data) and 'yandex' in self._game_data.get('user', {})
 
-            if response and 'result' in response:
-                result = response['result']
-                old_tickets = self._current_tickets
-                self._current_tickets = result.get('currentTickets', self._current_tickets)
-                self._current_candies = result.get('currentCandies', self._current_candies)
-                logger.info(f"{self.session_name} | Successfully bought {self._current_tickets - old_tickets} ticket(s). "
-                            f"Tickets: {self._current_tickets}, Candies: {self._current_candies}")
-                await asyncio.sleep(uniform(1, 2))
-            else:
-                logger.error(f"{self.session_name} | Failed to buy ticket. Stopping ticket purchase for this cycle.")
-                break
+    def _begin_ticket_phase(self) -> None:
+        if self._has_yandex_account():
+            logger.info(f"{self.session_name} | Yandex account detected. Starting to buy tickets with candies.")
+
+    async def _ticket_step(self) -> Optional[float]:
+        if not self._has_yandex_account() or self.state.candies < 10:
+            return None
+
+        logger.info(f"{self.session_name} | Have {self.state.candies} candies. Trying to buy 1 ticket.")
         
-        logger.info(f"{self.session_name} | Finished buying tickets. Current candies: {self._current_candies}")
+        headers = self._headers.get('2')
 
-    async def game_loop(self) -> None:
+        payload = {"count": 1}
+
+        result = await self.make_request(
+            'post',
+            self.TICKETS_BUY_URL,
+            headers=headers,
+            json=payload
+        )
+        response = result.data
+
+        if not response or 'result' not in response:
+            logger.error(f"{self.session_name} | Failed to buy ticket. Stopping ticket purchase for this cycle.")
+            return None
+
+        old_tickets = self.state.tickets
+        self.state.apply(response['result'])
+        logger.info(f"{self.session_name} | Successfully bought {self.state.tickets - old_tickets} ticket(s). "
+                    f"Tickets: {self.state.tickets}, Candies: {self.state.candies}")
+        return uniform(1, 2)
+
+    def _end_ticket_phase(self) -> None:
+        if self._has_yandex_account():
+            logger.info(f"{self.session_name} | Finished buying tickets. Current candies: {self.state.candies}")
+
+    async def buy_tickets(self) -> None:
+        self._begin_ticket_phase()
+        delay = await self._ticket_step()
+        while delay is not None:
+            await asyncio.sleep(delay)
+            delay = await self._ticket_step()
+        self._end_ticket_phase()
+
+    async def _start_game(self) -> Optional[float]:
         if self._game_data and 'game' in self._game_data:
-            game_data = self._game_data['game']
-            self._current_energy = game_data.get('currentEnergy', self._current_energy)
-            self._max_energy = game_data.get('maxEnergy', self._max_energy)
-            self._current_distance = game_data.get('currentCoins', self._current_distance)
-            self._current_candies = game_data.get('currentCandies', self._current_candies)
-            self._current_tickets = game_data.get('currentTickets', self._current_tickets)
-            self._distance_per_tap = game_data.get('coinsPerTap', self._distance_per_tap)
-            self._distance_per_hour = game_data.get('minePerHour', self._distance_per_hour)
-            self._distance_per_sec = game_data.get('minePerSec', self._distance_per_sec)
-            self._next_checkpoint_position = game_data.get('nextCheckpointPosition', self._next_checkpoint_position)
-            
+            self.state.apply(self._game_data['game'])
+
         sync_result = await self.sync_game(0)
         if not sync_result:
-            logger.error("Initial sync failed, retrying in 30 seconds")
-            await asyncio.sleep(30)
-            return
-        
+            delay = self._error_backoff.next()
+            logger.error(f"Initial sync failed, retrying in {int(delay)} seconds")
+            return delay
+
         self._update_available_upgrades()
-        
+        startup_queue.activated(self.session_name)
+        return None
+
+    async def game_loop(self) -> None:
+        delay = await self._start_game()
+        if delay is not None:
+            await asyncio.sleep(delay)
+            return
+
         while True:
             try:
-                logger.info(f"{self.session_name} | ▶️ Starting active phase with ⚡ {self._current_energy}/{self._max_energy}")
+                logger.info(f"{self.session_name} | ▶️ Starting active phase with ⚡ {self.state.energy}/{self.state.max_energy}")
                 await self._active_phase()
                 
                 logger.info(f"{self.session_name} | ▶️ Starting task processing phase")
@@ -846,97 +976,144 @@ class BaseBot:
 
                 logger.info(
                     f"{self.session_name} | ⏭️ Skipping upgrade phase (testing auto-upgrades on checkpoints). "
-                    f"Current 🍬 {self._current_candies}"
+                    f"Current 🍬 {self.state.candies}"
                 )
                 
-                logger.info(f"{self.session_name} | ▶️ Starting sleep phase with ⚡ {self._current_energy}/{self._max_energy}")
+                await self.save_snapshot(force=True)
+                logger.info(f"{self.session_name} | ▶️ Starting sleep phase with ⚡ {self.state.energy}/{self.state.max_energy}")
                 await self._sleep_phase()
                 
                 logger.info("🔑 Re-authenticating after sleep phase")
-                auth_result = await self.auth_start()
+                auth_result = await self.reauthenticate('sleep_phase')
                 if not auth_result:
-                    logger.error("🔑 Re-authentication failed, retrying in 30 seconds")
-                    await asyncio.sleep(30)
+                    delay = self._error_backoff.next()
+                    logger.error(f"🔑 Re-authentication failed, retrying in {int(delay)} seconds")
+                    await asyncio.sleep(delay)
                     continue
+            except Deferred as deferred:
+                logger.info(f"{self.session_name} | {deferred}")
+                await asyncio.sleep(deferred.delay)
             except Exception as e:
                 logger.error(f"{self.session_name} | 🔥 Error in game loop: {str(e)}")
-                await asyncio.sleep(30)
+                await asyncio.sleep(self._error_backoff.next())
 
-    async def _sleep_phase(self) -> None:
-        if self._current_energy >= self._max_energy * 0.8:
+    def _predict_wake_time(self, target_energy: float) -> float:
+        energy_per_sec = self.state.energy_per_sec
+        if not energy_per_sec or energy_per_sec <= 0:
+            energy_per_sec = 3
+        last_sync = self.state.last_sync or time()
+        if last_sync > 1e11:
+            last_sync /= 1000
+        deficit = max(0, target_energy - self.state.energy)
+        return min(last_sync, time()) + deficit / energy_per_sec
+
+    def _begin_sleep_phase(self) -> Optional[float]:
+        self._sleep_target = self.state.max_energy * 0.8
+        if self.state.energy >= self._sleep_target:
             logger.info(f"{self.session_name} | ✅ Energy already high, skipping sleep.")
+            return None
+
+        energy_to_restore = int(self._sleep_target) - self.state.energy
+        self._sleep_started = time()
+        self._sleep_deadline = self._sleep_started + self.MAX_SLEEP_TIME
+        wake_at = min(max(self._predict_wake_time(self._sleep_target), self._sleep_started + self.MIN_SLEEP_TIME),
+                      self._sleep_deadline)
+
+        logger.info(f"{self.session_name} | 😴 Entering sleep for {int(wake_at - self._sleep_started)}s to restore {energy_to_restore} ⚡")
+        return wake_at + uniform(0, 3)
+
+    async def _sleep_step(self) -> Optional[float]:
+        metrics.counter('sleep_wakeups_total').inc()
+
+        sync_result = await self.sync_game(0)
+        if not sync_result:
+            if time() >= self._sleep_deadline:
+                logger.error(f"{self.session_name} | 🔥 Sync failed during sleep phase, sleep deadline reached")
+                return None
+            delay = self._error_backoff.next()
+            logger.error(f"{self.session_name} | 🔥 Sync failed during sleep phase, retrying in {int(delay)}s")
+            return min(time() + delay, self._sleep_deadline)
+
+        if self.state.energy >= self._sleep_target or time() >= self._sleep_deadline:
+            logger.info(f"{self.session_name} | ☀️ Energy recovered to {self.state.energy}/{self.state.max_energy}, ending sleep.")
+            return None
+
+        wake_at = min(self._predict_wake_time(self._sleep_target), self._sleep_deadline)
+        logger.info(
+            f"{self.session_name} | 💤 Sleep check: {int(time() - self._sleep_started)}s passed, "
+            f"⚡ {self.state.energy}/{self.state.max_energy}, waking again in {int(max(0, wake_at - time()))}s"
+        )
+        return wake_at + uniform(0, 3)
+
+    def _end_sleep_phase(self) -> None:
+        logger.info(f"{self.session_name} | ⏹️ Sleep phase completed. Current ⚡ {self.state.energy}/{self.state.max_energy}")
+
+    async def _sleep_phase(self) -> None:
+        wake_at = self._begin_sleep_phase()
+        if wake_at is None:
             return
-            
-        energy_to_restore = int(self._max_energy * 0.8) - self._current_energy
-        energy_per_sec = self._game_data.get('game', {}).get('energyPerSec', 3)
-        if energy_per_sec <= 0: energy_per_sec = 3
-            
-        sleep_time = energy_to_restore / energy_per_sec
-        max_sleep_time = 60 * 30
-        sleep_time = min(sleep_time, max_sleep_time)
-        sleep_time = max(sleep_time, 60)
-        
-        logger.info(f"{self.session_name} | 😴 Entering sleep for {int(sleep_time)}s to restore {energy_to_restore} ⚡")
-        
-        sleep_interval = 60
-        total_slept = 0
-        
-        while total_slept < sleep_time:
-            await asyncio.sleep(sleep_interval)
-            total_slept += sleep_interval
-            
-            if total_slept % 300 == 0 or total_slept >= sleep_time:
-                sync_result = await self.sync_game(0)
-                if not sync_result:
-                    logger.error("🔥 Sync failed during sleep phase")
-                    continue
-                    
-                if self._current_energy >= self._max_energy * 0.8:
-                    logger.info(f"{self.session_name} | ☀️ Energy recovered to {self._current_energy}/{self._max_energy}, ending sleep.")
-                    break
-                
-                logger.info(
-                    f"{self.session_name} | 💤 Sleep check: {total_slept}s passed, "
-                    f"⚡ {self._current_energy}/{self._max_energy}, "
-                    f"📏 {self._current_distance}, 🍬 {self._current_candies}"
-                )
-        
-        logger.info(f"{self.session_name} | ⏹️ Sleep phase completed. Current ⚡ {self._current_energy}/{self._max_energy}")
+
+        while wake_at is not None:
+            await asyncio.sleep(max(0, wake_at - time()))
+            wake_at = await self._sleep_step()
+
+        self._end_sleep_phase()
+
+    def _open_http_client(self) -> None:
+        proxy_health.watch(self._current_proxy)
+        self._http_client = http_pool.session(self._current_proxy, timeout=aiohttp.ClientTimeout(60))
+
+    async def close(self) -> None:
+        startup_queue.discard(self.session_name)
+        proxy_health.unwatch(self._current_proxy)
+        await http_pool.close_session(self._http_client, self._current_proxy)
+        self._http_client = None
+        await self.save_snapshot(force=True)
+
+    async def _ensure_proxy(self) -> Optional[float]:
+        if not await self.check_and_update_proxy():
+            delay = self._proxy_backoff.next()
+            logger.warning(f'Failed to find working proxy. Sleep {int(delay)} seconds.')
+            return delay
+        self._proxy_backoff.reset()
+        return None
 
     async def run(self) -> None:
         if not await self.initialize_session():
             raise InvalidSession("Failed to initialize session")
 
-        random_delay = uniform(1, settings.SESSION_START_DELAY)
-        logger.info(f"{self.session_name} | Bot will start in {int(random_delay)}s")
-        await asyncio.sleep(random_delay)
-
-        proxy_conn = {'connector': ProxyConnector.from_url(self._current_proxy)} if self._current_proxy else {}
-        async with CloudflareScraper(timeout=aiohttp.ClientTimeout(60), **proxy_conn) as http_client:
-            self._http_client = http_client
+        delay = startup_queue.reserve(self.session_name)
+        logger.info(f"{self.session_name} | Bot will start in {int(delay)}s")
+        await asyncio.sleep(delay)
 
+        self._open_http_client()
+        try:
             while True:
                 try:
-                    session_config = config_utils.get_session_config(self.session_name, CONFIG_PATH)
-                    if not await self.check_and_update_proxy(session_config):
-                        logger.warning('Failed to find working proxy. Sleep 5 minutes.')
-                        await asyncio.sleep(300)
+                    delay = await self._ensure_proxy()
+                    if delay is not None:
+                        await asyncio.sleep(delay)
                         continue
 
                     await self.process_bot_logic()
-                    
+
                 except InvalidSession:
                     raise
+                except Deferred as deferred:
+                    logger.info(f"{self.session_name} | {deferred}")
+                    await asyncio.sleep(deferred.delay)
                 except Exception as error:
-                    sleep_duration = uniform(60, 120)
+                    sleep_duration = self._error_backoff.next()
                     logger.error(f"{self.session_name} | Unknown error: {error}. Sleeping for {int(sleep_duration)}")
                     await asyncio.sleep(sleep_duration)
+        finally:
+            await self.close()
 
     async def process_bot_logic(self) -> None:
         if not self._game_data:
             if not await self.auth_start():
                 logger.error("Failed to authenticate")
-                await asyncio.sleep(60)
+                await asyncio.sleep(self._error_backoff.next())
                 return
                 
         onboarding_level = self._game_data.get('app', {}).get('onboarding', 0)
@@ -945,69 +1122,74 @@ class BaseBot:
         if onboarding_level == 0:
             if not await self.game_onboarding():
                 logger.error(f"{self.session_name} | Failed to complete onboarding")
-                await asyncio.sleep(60)
+                await asyncio.sleep(self._error_backoff.next())
                 return
         
         await self.game_loop()
 
-    async def _active_phase(self) -> None:
-        total_taps_sent_in_phase = 0
-        initial_energy_in_phase = self._current_energy
-        energy_restores_used_in_phase = 0
-        
+    def _begin_active_phase(self) -> None:
+        self._phase_taps = 0
+        self._phase_restores = 0
+        self._phase_start_energy = self.state.energy
 
-        while True:
-            if self._current_energy <= 50:
-                energy_restored = await self.restore_energy_if_needed()
-                if energy_restored:
-                    energy_restores_used_in_phase += 1
-                else:
-                    break
-                
-            if self._current_energy > 200:
-                taps_to_accumulate = randint(35, 45)
-            elif self._current_energy > 100:
-                taps_to_accumulate = randint(25, 35)
-            else:
-                taps_to_accumulate = randint(15, 25)
-            
-            taps_to_accumulate = min(taps_to_accumulate, max(0, self._current_energy - 5))
+    async def _active_step(self) -> Optional[float]:
+        if self.state.energy <= 50:
+            if not await self.restore_energy_if_needed():
+                return None
+            self._phase_restores += 1
 
-            if taps_to_accumulate == 0:
-                break
+        if self.state.energy > 200:
+            taps_to_accumulate = randint(35, 45)
+        elif self.state.energy > 100:
+            taps_to_accumulate = randint(25, 35)
+        else:
+            taps_to_accumulate = randint(15, 25)
 
-            sync_result = await self.sync_game(taps_to_accumulate)
-            if not sync_result:
-                logger.error(f"{self.session_name} | Sync failed during active phase, retrying...")
-                await asyncio.sleep(10)
-                continue
-                
-            total_taps_sent_in_phase += taps_to_accumulate
-            await asyncio.sleep(uniform(1.5, 2.5))
-        
-        distance_traveled = total_taps_sent_in_phase * self._distance_per_tap
+        taps_to_accumulate = min(taps_to_accumulate, max(0, self.state.energy - 5))
+
+        if taps_to_accumulate == 0:
+            return None
+
+        sync_result = await self.sync_game(taps_to_accumulate)
+        if not sync_result:
+            logger.error(f"{self.session_name} | Sync failed during active phase, retrying...")
+            return self._error_backoff.next()
+
+        self._phase_taps += taps_to_accumulate
+        return uniform(1.5, 2.5)
+
+    def _end_active_phase(self) -> None:
+        distance_traveled = self._phase_taps * self.state.coins_per_tap
         logger.info(
-            f"{self.session_name} | ⏹️ Active phase completed. Taps: {total_taps_sent_in_phase}, "
+            f"{self.session_name} | ⏹️ Active phase completed. Taps: {self._phase_taps}, "
             f"📏 Distance traveled: {distance_traveled}, "
-            f"⚡ Used: {initial_energy_in_phase - self._current_energy + energy_restores_used_in_phase * self._max_energy}, "
-            f"Restored: {energy_restores_used_in_phase}x. Current 📏 {self._current_distance}, 🍬 {self._current_candies}"
+            f"⚡ Used: {self._phase_start_energy - self.state.energy + self._phase_restores * self.state.max_energy}, "
+            f"Restored: {self._phase_restores}x. Current 📏 {self.state.coins}, 🍬 {self.state.candies}"
         )
 
+    async def _active_phase(self) -> None:
+        self._begin_active_phase()
+        delay = await self._active_step()
+        while delay is not None:
+            await asyncio.sleep(delay)
+            delay = await self._active_step()
+        self._end_active_phase()
+
     async def restore_energy_if_needed(self) -> bool:
         current_date = datetime.now().strftime("%Y-%m-%d")
-        if self._last_restore_date and self._last_restore_date != current_date:
+        if self.state.last_restore_date and self.state.last_restore_date != current_date:
             logger.info(f"{self.session_name} | ☀️ New day detected, resetting energy restores counter")
-            self._energy_restores_used = 0
-            self._restore_energy_attempts = 0
+            self.state.restores_used = 0
+            self.state.restore_attempts = 0
             
-        if self._energy_restores_used >= self._energy_restores_max:
+        if self.state.restores_used >= self.state.restores_max:
             logger.info(
                 f"{self.session_name} | 🔋 Daily energy restore limit reached "
-                f"({self._energy_restores_used}/{self._energy_restores_max})"
+                f"({self.state.restores_used}/{self.state.restores_max})"
             )
             return False
             
-        if self._restore_energy_attempts >= 2:
+        if self.state.restore_attempts >= 2:
             logger.warning(f"{self.session_name} | ⚠️ Too many restore energy attempts, skipping")
             return False
             
@@ -1020,21 +1202,26 @@ class BaseBot:
             day_limitation = energy_restore_data.get('dayLimitation', 6)
             current_level = energy_restore_data.get('level', 0)
             
-            self._energy_restores_max = day_limitation
-            self._energy_restores_used = current_level
+            self.state.restores_max = day_limitation
+            self.state.restores_used = current_level
             
             if current_level < day_limitation:
                 logger.info(
-                    f"{self.session_name} | ⚡ Energy low ({self._current_energy}/{self._max_energy}), "
+                    f"{self.session_name} | ⚡ Energy low ({self.state.energy}/{self.state.max_energy}), "
                     f"using restore ({current_level}/{day_limitation} used)"
                 )
                 result = await self.buy_upgrade('restoreEnergy')
                 if result:
-                    logger.info(f"{self.session_name} | ✅ Energy restored: {self._current_energy}/{self._max_energy}")
+                    logger.info(f"{self.session_name} | ✅ Energy restored: {self.state.energy}/{self.state.max_energy}")
                     return True
                     
         return False
 
+_active_bots: "weakref.WeakSet[BaseBot]" = weakref.WeakSet()
+
+async def save_all_snapshots() -> None:
+    await asyncio.gather(*(bot.save_snapshot(force=True) for bot in list(_active_bots)), return_exceptions=True)
+
 async def run_tapper(tg_client: UniversalTelegramClient):
     bot = BaseBot(tg_client=tg_client)
     try:
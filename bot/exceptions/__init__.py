@@ -2,4 +2,21 @@ class InvalidSession(Exception):
     pass
 
 class AdViewError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class Deferred(Exception):
+    def __init__(self, delay: float, what: str):
+        super().__init__(f"{what} deferred for {int(delay)}s")
+        self.delay = delay
+
+class TelegramDeferred(Deferred):
+    def __init__(self, delay: float):
+        super().__init__(delay, "Telegram requests")
+
+class RequestDeferred(Deferred):
+    def __init__(self, delay: float):
+        super().__init__(delay, "API request")
+
+class AuthDeferred(Deferred):
+    def __init__(self, delay: float):
+        super().__init__(delay, "Authorization")
\ No newline at end of file
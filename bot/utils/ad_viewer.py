@@ -9,6 +9,7 @@ from urllib.parse import urlencode
 import json
 
 from bot.utils.logger import logger, log_error
+from bot.utils import json_codec
 from bot.exceptions import AdViewError
 
 T = TypeVar('T')
@@ -169,7 +170,7 @@ class AdViewer:
                     raise AdViewError(
                         f"Request error {response.status}: {error_text}"
                     )
-                return await response.json()
+                return await response.json(loads=json_codec.loads)
                 
         except asyncio.TimeoutError:
             raise AdViewError("Request timeout exceeded")
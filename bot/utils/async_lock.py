@@ -1,28 +1,137 @@
 import asyncio
-import fasteners
-from random import uniform
-from os import path
+import os
+from collections import deque
+from time import monotonic
+from typing import Deque, Dict, Optional
 
-from bot.utils import logger
+from bot.utils.metrics import metrics
 
-class AsyncInterProcessLock:
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import fasteners
+
+POLL_INTERVAL = 0.005
+MAX_POLL_INTERVAL = 0.1
+
+class _FileHandle:
+    def __init__(self, lock_file: str):
+        self.lock_file = lock_file
+        self._fd: Optional[int] = None
+        self._lock = None if fcntl else fasteners.InterProcessLock(lock_file)
+
+    def _open(self) -> int:
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.lock_file) or '.', exist_ok=True)
+            self._fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        return self._fd
+
+    def try_lock(self) -> bool:
+        if not fcntl:
+            return self._lock.acquire(blocking=False)
+        try:
+            fcntl.flock(self._open(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    def unlock(self) -> None:
+        if not fcntl:
+            self._lock.release()
+        elif self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+class _FileLock:
     def __init__(self, lock_file: str):
-        self._lock = fasteners.InterProcessLock(lock_file)
-        self._file_name, _ = path.splitext(path.basename(lock_file))
+        self.name, _ = os.path.splitext(os.path.basename(lock_file))
+        self._handle = _FileHandle(lock_file)
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._locked = False
+        self._acquired_at = 0.0
+        self._wait_time = metrics.histogram('lock_wait_seconds', lock=self.name)
+        self._hold_time = metrics.histogram('lock_hold_seconds', lock=self.name)
+
+    @property
+    def locked(self) -> bool:
+        return self._locked
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        started = monotonic()
+        deadline = None if timeout is None else started + timeout
+        await self._acquire_local(deadline)
+        try:
+            await self._acquire_file(deadline)
+        except BaseException:
+            self._release_local()
+            raise
+        self._acquired_at = monotonic()
+        self._wait_time.observe(self._acquired_at - started)
+
+    def release(self) -> None:
+        self._hold_time.observe(monotonic() - self._acquired_at)
+        self._handle.unlock()
+        self._release_local()
+
+    async def _acquire_local(self, deadline: Optional[float]) -> None:
+        if not self._locked and not self._waiters:
+            self._locked = True
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            if deadline is None:
+                await waiter
+            else:
+                await asyncio.wait_for(waiter, max(deadline - monotonic(), 0))
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self._release_local()
+            elif waiter in self._waiters:
+                self._waiters.remove(waiter)
+            raise
+
+    def _release_local(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self._locked = False
+        self._handle.close()
+
+    async def _acquire_file(self, deadline: Optional[float]) -> None:
+        interval = POLL_INTERVAL
+        while not self._handle.try_lock():
+            now = monotonic()
+            if deadline is not None and now >= deadline:
+                raise asyncio.TimeoutError()
+            await asyncio.sleep(interval if deadline is None else min(interval, deadline - now))
+            interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+_file_locks: Dict[str, _FileLock] = {}
+
+class AsyncInterProcessLock:
+    def __init__(self, lock_file: str, timeout: Optional[float] = None):
+        lock_file = os.path.abspath(lock_file)
+        self._lock = _file_locks.get(lock_file)
+        if self._lock is None:
+            self._lock = _file_locks[lock_file] = _FileLock(lock_file)
+        self._timeout = timeout
+
+    @property
+    def locked(self) -> bool:
+        return self._lock.locked
 
     async def __aenter__(self) -> 'AsyncInterProcessLock':
-        while True:
-            lock_acquired = await asyncio.to_thread(self._lock.acquire, timeout=uniform(5, 10))
-            if lock_acquired:
-                return self
-            sleep_time = uniform(30, 150)
-            logger_message = (
-                f"<LY><k>{self._file_name}</k></LY> | Failed to acquire lock for "
-                f"{'accounts_config' if 'accounts_config' in self._file_name else 'session'}. "
-                f"Retrying in {int(sleep_time)} seconds"
-            )
-            logger.info(logger_message)
-            await asyncio.sleep(sleep_time)
+        await self._lock.acquire(self._timeout)
+        return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
-        await asyncio.to_thread(self._lock.release)
\ No newline at end of file
+        self._lock.release()
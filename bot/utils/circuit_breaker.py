@@ -0,0 +1,127 @@
+import asyncio
+from random import uniform
+from time import monotonic
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from bot.config import settings
+from bot.utils import logger
+from bot.utils.metrics import metrics
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+def is_outage(status: Optional[int] = None, error: Optional[BaseException] = None) -> bool:
+    if status is not None:
+        return status >= 500
+    return isinstance(error, (asyncio.TimeoutError, aiohttp.ServerTimeoutError, aiohttp.ServerDisconnectedError))
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int = 20, cooldown: float = 30, max_cooldown: float = 300,
+                 half_open_probes: int = 3, resume_spread: float = 15):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.half_open_probes = half_open_probes
+        self.resume_spread = resume_spread
+        self.state = CLOSED
+        self._failures = 0
+        self._cooldown = cooldown
+        self._open_until = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._changed = asyncio.Event()
+        self._state_gauge = metrics.gauge('circuit_breaker_state', host=name)
+        self._parked = metrics.gauge('circuit_breaker_parked', host=name)
+        self._opened = metrics.counter('circuit_breaker_open_total', host=name)
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        self._state_gauge.set(STATE_VALUES[state])
+        self._notify()
+
+    def _open(self) -> None:
+        self._open_until = monotonic() + self._cooldown
+        self._probes = self._probe_successes = 0
+        self._opened.inc()
+        logger.warning(f"API circuit for {self.name} opened, pausing requests for {int(self._cooldown)}s")
+        self._set_state(OPEN)
+
+    def try_acquire(self) -> Optional[bool]:
+        if self.state == OPEN and monotonic() >= self._open_until:
+            logger.info(f"API circuit for {self.name} half-open, probing with {self.half_open_probes} requests")
+            self._set_state(HALF_OPEN)
+        if self.state == CLOSED:
+            return False
+        if self.state == HALF_OPEN and self._probes < self.half_open_probes:
+            self._probes += 1
+            return True
+        return None
+
+    def retry_in(self) -> float:
+        wait = max(0.0, self._open_until - monotonic()) if self.state == OPEN else 1.0
+        return wait + uniform(0, self.resume_spread)
+
+    async def acquire(self) -> bool:
+        parked = False
+        try:
+            while True:
+                probe = self.try_acquire()
+                if probe is not None:
+                    break
+                if not parked:
+                    parked = True
+                    self._parked.inc()
+                timeout = max(0.0, self._open_until - monotonic()) if self.state == OPEN else None
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if parked:
+                self._parked.dec()
+        if parked and not probe:
+            await asyncio.sleep(uniform(0, self.resume_spread))
+        return probe
+
+    def release(self, probe: bool) -> None:
+        if probe:
+            self._probes = max(0, self._probes - 1)
+            self._notify()
+
+    def record(self, outage: bool, probe: bool = False) -> None:
+        self.release(probe)
+        if outage:
+            if self.state == HALF_OPEN:
+                self._cooldown = min(self.max_cooldown, self._cooldown * 2)
+                self._open()
+            elif self.state == CLOSED:
+                self._failures += 1
+                if self._failures >= self.failure_threshold:
+                    self._open()
+            return
+
+        self._failures = 0
+        if self.state == HALF_OPEN and probe:
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_probes:
+                self._cooldown = self.base_cooldown
+                logger.info(f"API circuit for {self.name} closed, resuming parked sessions")
+                self._set_state(CLOSED)
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(url: str) -> CircuitBreaker:
+    host = urlsplit(url).netloc
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = CircuitBreaker(
+            host, failure_threshold=settings.CIRCUIT_BREAKER_THRESHOLD, cooldown=settings.CIRCUIT_BREAKER_COOLDOWN)
+    return breaker
@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from copy import deepcopy
+from time import perf_counter, time
+from typing import Iterator, Optional
+
+from bot.utils.metrics import metrics
+from bot.utils import json_codec
+
+class SQLiteStore:
+    SCHEMA: tuple = ()
+
+    def __init__(self, db_path: str, busy_timeout: float = 30.0):
+        self.db_path = db_path
+        self._busy_timeout = busy_timeout
+        self._local = threading.local()
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        with self._transaction() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self._busy_timeout,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+class SessionConfigStore(SQLiteStore):
+    SCHEMA = ("CREATE TABLE IF NOT EXISTS sessions (name TEXT PRIMARY KEY, config TEXT NOT NULL)",
+              "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def get(self, session_name: str) -> dict:
+        row = self._connection().execute(
+            "SELECT config FROM sessions WHERE name = ?", (session_name,)).fetchone()
+        return json_codec.loads(row[0]) if row else {}
+
+    def get_all(self) -> dict:
+        rows = self._connection().execute("SELECT name, config FROM sessions ORDER BY name").fetchall()
+        return {name: json_codec.loads(config) for name, config in rows}
+
+    def put(self, session_name: str, config: dict) -> None:
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO sessions (name, config) VALUES (?, ?)",
+                         (session_name, json_codec.dumps(config)))
+
+    def put_many(self, configs: dict, meta: Optional[dict] = None) -> None:
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR REPLACE INTO sessions (name, config) VALUES (?, ?)",
+                             [(name, json_codec.dumps(config)) for name, config in configs.items()])
+            if meta:
+                conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", list(meta.items()))
+
+    def delete(self, session_name: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM sessions WHERE name = ?", (session_name,))
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def import_json(self, json_path: str, once: bool = False) -> Optional[int]:
+        with self._transaction() as conn:
+            if once and conn.execute("SELECT 1 FROM meta WHERE key = 'json_imported'").fetchone():
+                return None
+            configs = {}
+            if os.path.isfile(json_path):
+                with open(json_path, 'r') as file:
+                    content = file.read()
+                configs = json_codec.loads(content) if content.strip() else {}
+            conn.executemany("INSERT OR REPLACE INTO sessions (name, config) VALUES (?, ?)",
+                             [(name, json_codec.dumps(config)) for name, config in configs.items()])
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', ?)", (json_path,))
+            conn.execute("DELETE FROM meta WHERE key = 'schema_version'")
+            return len(configs)
+
+    def export_json(self, json_path: str) -> int:
+        configs = self.get_all()
+        tmp_path = f"{json_path}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(json_codec.encode(configs, indent=True))
+        os.replace(tmp_path, json_path)
+        return len(configs)
+
+class SnapshotStore(SQLiteStore):
+    SCHEMA = ("CREATE TABLE IF NOT EXISTS snapshots "
+              "(name TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)",)
+
+    def get(self, session_name: str) -> dict:
+        row = self._connection().execute(
+            "SELECT data FROM snapshots WHERE name = ?", (session_name,)).fetchone()
+        return json_codec.loads(row[0]) if row else {}
+
+    def put(self, session_name: str, data: dict) -> None:
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO snapshots (name, data, updated_at) VALUES (?, ?, ?)",
+                         (session_name, json_codec.dumps(data), time()))
+
+class CachedSessionConfigStore(SessionConfigStore):
+    def __init__(self, db_path: str, busy_timeout: float = 30.0):
+        super().__init__(db_path, busy_timeout)
+        self._cache: Optional[dict] = None
+        self._signature: Optional[tuple] = None
+        self._hits = metrics.counter('config_cache_hits_total')
+        self._misses = metrics.counter('config_cache_misses_total')
+        self._reload_time = metrics.histogram('config_cache_reload_seconds')
+
+    def _file_signature(self) -> tuple:
+        signature = []
+        for file_path in (self.db_path, f"{self.db_path}-wal"):
+            try:
+                stat = os.stat(file_path)
+                signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _configs(self) -> dict:
+        signature = self._file_signature()
+        if self._cache is not None and signature == self._signature:
+            self._hits.inc()
+            return self._cache
+        self._misses.inc()
+        started = perf_counter()
+        self._cache = super().get_all()
+        self._signature = signature
+        self._reload_time.observe(perf_counter() - started)
+        return self._cache
+
+    def get(self, session_name: str) -> dict:
+        return deepcopy(self._configs().get(session_name, {}))
+
+    def get_all(self) -> dict:
+        return deepcopy(self._configs())
+
+    def invalidate(self) -> None:
+        self._cache = None
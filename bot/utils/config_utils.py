@@ -1,54 +1,76 @@
 import asyncio
-import json
-from bot.utils import logger, log_error, AsyncInterProcessLock
+from bot.utils import logger, log_error, json_codec, AsyncInterProcessLock
+from bot.utils.config_store import CachedSessionConfigStore, SnapshotStore
 from opentele.api import API
 from os import path, remove
 from copy import deepcopy
 
+_stores: dict[str, CachedSessionConfigStore] = {}
+_snapshot_stores: dict[str, SnapshotStore] = {}
+
+def get_config_store(config_path: str) -> CachedSessionConfigStore:
+    store = _stores.get(config_path)
+    if store is None:
+        store = CachedSessionConfigStore(f"{path.splitext(config_path)[0]}.db")
+        imported = store.import_json(config_path, once=True)
+        if imported:
+            logger.info(f"Imported {imported} session configs from `{config_path}` into `{store.db_path}`")
+        _stores[config_path] = store
+    return store
+
+def get_snapshot_store(config_path: str) -> SnapshotStore:
+    store = _snapshot_stores.get(config_path)
+    if store is None:
+        store = _snapshot_stores[config_path] = SnapshotStore(f"{path.splitext(config_path)[0]}_snapshots.db")
+    return store
+
 def read_config_file(config_path: str) -> dict:
-    try:
-        with open(config_path, 'r') as file:
-            content = file.read()
-            return json.loads(content) if content else {}
-    except FileNotFoundError:
-        with open(config_path, 'w'):
-            logger.warning(f"Accounts config file `{config_path}` not found. Creating a new one.")
-        return {}
-
-async def write_config_file(content: dict, config_path: str) -> None:
+    return get_config_store(config_path).get_all()
+
+async def write_config_file(content: dict, config_path: str, meta: dict = None) -> None:
+    store = get_config_store(config_path)
     lock = AsyncInterProcessLock(path.join(path.dirname(config_path), 'lock_files', 'accounts_config.lock'))
     async with lock:
-        with open(config_path, 'w+') as file:
-            json.dump(content, file, indent=2)
-        await asyncio.sleep(0.1)
+        await asyncio.to_thread(store.put_many, content, meta)
+
+def get_schema_version(config_path: str) -> int:
+    return int(get_config_store(config_path).get_meta('schema_version') or 0)
 
 def get_session_config(session_name: str, config_path: str) -> dict:
-    return read_config_file(config_path).get(session_name, {})
+    return get_config_store(config_path).get(session_name)
 
 async def update_session_config_in_file(session_name: str, updated_session_config: dict, config_path: str) -> None:
-    config = read_config_file(config_path)
-    config[session_name] = updated_session_config
-    await write_config_file(config, config_path)
-
-async def restructure_config(config_path: str) -> None:
-    config = read_config_file(config_path)
-    if config:
-        cfg_copy = deepcopy(config)
-        for key, value in cfg_copy.items():
-            api_info = {
-                "api_id": value.get('api', {}).get("api_id") or value.pop("api_id", None),
-                "api_hash": value.get('api', {}).get("api_hash") or value.pop("api_hash", None),
-                "device_model": value.get('api', {}).get("device_model") or value.pop("device_model", None),
-                "system_version": value.get('api', {}).get("system_version") or value.pop("system_version", None),
-                "app_version": value.get('api', {}).get("app_version") or value.pop("app_version", None),
-                "system_lang_code": value.get('api', {}).get("system_lang_code") or value.pop("system_lang_code", None),
-                "lang_pack": value.get('api', {}).get("lang_pack") or value.pop("lang_pack", None),
-                "lang_code": value.get('api', {}).get("lang_code") or value.pop("lang_code", None)
-            }
-            api_info = {k: v for k, v in api_info.items() if v is not None}
-            cfg_copy[key]['api'] = api_info
-        if cfg_copy != config:
-            await write_config_file(cfg_copy, config_path)
+    await asyncio.to_thread(get_config_store(config_path).put, session_name, updated_session_config)
+
+def get_session_snapshot(session_name: str, config_path: str) -> dict:
+    return get_snapshot_store(config_path).get(session_name)
+
+async def save_session_snapshot(session_name: str, snapshot: dict, config_path: str) -> None:
+    await asyncio.to_thread(get_snapshot_store(config_path).put, session_name, snapshot)
+
+def import_config_file(config_path: str) -> int:
+    return get_config_store(config_path).import_json(config_path)
+
+async def export_config_file(config_path: str) -> int:
+    store = get_config_store(config_path)
+    lock = AsyncInterProcessLock(path.join(path.dirname(config_path), 'lock_files', 'accounts_config.lock'))
+    async with lock:
+        return await asyncio.to_thread(store.export_json, config_path)
+
+API_CONFIG_KEYS = ("api_id", "api_hash", "device_model", "system_version", "app_version",
+                   "system_lang_code", "lang_pack", "lang_code")
+
+def restructure_accounts_config(config: dict) -> list[str]:
+    changed = []
+    for key, value in config.items():
+        keys_count = len(value)
+        api = value.get('api', {})
+        api_info = {k: api.get(k) or value.pop(k, None) for k in API_CONFIG_KEYS}
+        api_info = {k: v for k, v in api_info.items() if v is not None}
+        if len(value) != keys_count or value.get('api') != api_info:
+            changed.append(key)
+        value['api'] = api_info
+    return changed
 
 def import_session_json(session_path: str) -> dict:
     lang_pack = {
@@ -61,7 +83,7 @@ def import_session_json(session_path: str) -> dict:
     json_path = f"{session_path.replace('.session', '')}.json"
     if path.isfile(json_path):
         with open(json_path, 'r') as file:
-            json_conf = json.loads(file.read())
+            json_conf = json_codec.loads(file.read())
         api = {
             'api_id': int(json_conf.get('app_id')),
             'api_hash': json_conf.get('app_hash'),
@@ -72,10 +94,14 @@ def import_session_json(session_path: str) -> dict:
             'lang_code': json_conf.get('lang_code'),
             'lang_pack': json_conf.get('lang_pack', lang_pack[int(json_conf.get('app_id'))])
         }
-        remove(json_path)
         return api
     return None
 
+def remove_session_json(session_path: str) -> None:
+    json_path = f"{session_path.replace('.session', '')}.json"
+    if path.isfile(json_path):
+        remove(json_path)
+
 def get_api(acc_api: dict) -> API:
     api_generators = {
         4: API.TelegramAndroid.Generate,
@@ -1,11 +1,72 @@
-import aiofiles
+import asyncio
+import os
+from typing import List, Optional, Set
 
-async def check_is_first_run(session_name: str):
-    async with aiofiles.open('first_run.txt', mode='a+') as file:
-        await file.seek(0)
-        lines = await file.readlines()
-    return session_name.lower() not in [line.strip() for line in lines]
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
-async def append_recurring_session(session_name: str):
-    async with aiofiles.open('first_run.txt', mode='a+') as file:
-        await file.writelines(session_name.lower() + '\n')
\ No newline at end of file
+class FirstRunRegistry:
+    def __init__(self, file_path: str = 'first_run.txt'):
+        self.file_path = file_path
+        self._sessions: Set[str] = set()
+        self._offset = 0
+        self._pending: List[str] = []
+        self._writer: Optional[asyncio.Task] = None
+
+    def _refresh(self) -> None:
+        try:
+            size = os.path.getsize(self.file_path)
+        except FileNotFoundError:
+            return
+        if size < self._offset:
+            self._sessions.clear()
+            self._offset = 0
+        if size == self._offset:
+            return
+        with open(self.file_path, 'rb') as file:
+            file.seek(self._offset)
+            data = file.read(size - self._offset)
+        complete = data.rfind(b'\n') + 1
+        self._sessions.update(
+            line.strip() for line in data[:complete].decode('utf-8', 'ignore').splitlines() if line.strip())
+        self._offset += complete
+
+    def is_first_run(self, session_name: str) -> bool:
+        self._refresh()
+        return session_name.lower() not in self._sessions
+
+    async def add(self, session_name: str) -> None:
+        session_name = session_name.lower()
+        if session_name in self._sessions:
+            return
+        self._sessions.add(session_name)
+        self._pending.append(session_name)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._flush())
+        await asyncio.shield(self._writer)
+
+    async def _flush(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, []
+            await asyncio.to_thread(self._write, batch)
+
+    def _write(self, session_names: List[str]) -> None:
+        with open(self.file_path, 'a') as file:
+            if fcntl:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                file.write(''.join(f"{name}\n" for name in session_names))
+                file.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+
+registry = FirstRunRegistry()
+
+async def check_is_first_run(session_name: str) -> bool:
+    return registry.is_first_run(session_name)
+
+async def append_recurring_session(session_name: str) -> None:
+    await registry.add(session_name)
@@ -0,0 +1,109 @@
+import asyncio
+from time import monotonic
+from typing import Dict, Optional
+
+import aiohttp
+from aiocfscrape import CloudflareScraper
+from aiohttp_proxy import ProxyConnector
+from yarl import URL
+
+from bot.config import settings
+from bot.utils import logger
+from bot.utils.metrics import metrics
+from bot.utils import json_codec
+
+DIRECT = 'direct'
+
+def pool_label(proxy: Optional[str]) -> str:
+    if not proxy:
+        return DIRECT
+    url = URL(proxy)
+    return f"{url.scheme}://{url.host}:{url.port}"
+
+class _Pool:
+    __slots__ = ('label', 'connector', 'trace', 'users', 'last_used')
+
+    def __init__(self, proxy: Optional[str], limit: int):
+        self.label = pool_label(proxy)
+        if proxy:
+            self.connector = ProxyConnector.from_url(proxy, limit=limit)
+        else:
+            self.connector = aiohttp.TCPConnector(limit=limit)
+        self.users = 0
+        self.last_used = monotonic()
+
+        created = metrics.counter('http_pool_connections_created_total', pool=self.label)
+        reused = metrics.counter('http_pool_connections_reused_total', pool=self.label)
+
+        async def on_create(session, context, params) -> None:
+            created.inc()
+
+        async def on_reuse(session, context, params) -> None:
+            reused.inc()
+
+        self.trace = aiohttp.TraceConfig()
+        self.trace.on_connection_create_end.append(on_create)
+        self.trace.on_connection_reuseconn.append(on_reuse)
+
+class HttpPoolManager:
+    def __init__(self, limit: int = 100, idle_timeout: float = 300):
+        self._limit = limit
+        self._idle_timeout = idle_timeout
+        self._pools: Dict[str, _Pool] = {}
+        self._size = metrics.gauge('http_pools')
+
+    def _acquire(self, proxy: Optional[str]) -> _Pool:
+        key = proxy or DIRECT
+        pool = self._pools.get(key)
+        if pool is None or pool.connector.closed:
+            pool = self._pools[key] = _Pool(proxy, self._limit)
+            self._size.set(len(self._pools))
+            logger.debug(f"HTTP pool opened for {pool.label}")
+        pool.users += 1
+        pool.last_used = monotonic()
+        metrics.gauge('http_pool_users', pool=pool.label).set(pool.users)
+        return pool
+
+    def release(self, proxy: Optional[str]) -> None:
+        pool = self._pools.get(proxy or DIRECT)
+        if pool is None:
+            return
+        pool.users = max(0, pool.users - 1)
+        pool.last_used = monotonic()
+        metrics.gauge('http_pool_users', pool=pool.label).set(pool.users)
+
+    def session(self, proxy: Optional[str], **kwargs) -> CloudflareScraper:
+        pool = self._acquire(proxy)
+        return CloudflareScraper(connector=pool.connector, connector_owner=False,
+                                 trace_configs=[pool.trace], json_serialize=json_codec.dumps, **kwargs)
+
+    async def close_session(self, http_client: Optional[CloudflareScraper], proxy: Optional[str]) -> None:
+        if http_client is None:
+            return
+        if not http_client.closed:
+            await http_client.close()
+        self.release(proxy)
+
+    async def evict_idle(self) -> int:
+        now = monotonic()
+        idle = [key for key, pool in self._pools.items()
+                if pool.users == 0 and now - pool.last_used >= self._idle_timeout]
+        for key in idle:
+            pool = self._pools.pop(key)
+            await pool.connector.close()
+            logger.debug(f"HTTP pool for {pool.label} closed after {self._idle_timeout}s idle")
+        self._size.set(len(self._pools))
+        return len(idle)
+
+    async def run_evictor(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self._idle_timeout / 2))
+            await self.evict_idle()
+
+    async def close(self) -> None:
+        for pool in self._pools.values():
+            await pool.connector.close()
+        self._pools.clear()
+        self._size.set(0)
+
+http_pool = HttpPoolManager(limit=settings.HTTP_POOL_LIMIT, idle_timeout=settings.HTTP_POOL_IDLE_TIMEOUT)
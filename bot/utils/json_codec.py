@@ -0,0 +1,83 @@
+import json
+from typing import Any, Callable, Dict, Union
+
+from bot.config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+Loadable = Union[str, bytes, bytearray, memoryview]
+
+class StdlibCodec:
+    name = 'json'
+
+    def loads(self, data: Loadable) -> Any:
+        return json.loads(data)
+
+    def encode(self, obj: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+        return json.dumps(obj, sort_keys=sort_keys, indent=2 if indent else None,
+                          separators=None if indent else (',', ':'), default=str).encode()
+
+class OrjsonCodec:
+    name = 'orjson'
+
+    def loads(self, data: Loadable) -> Any:
+        return orjson.loads(data)
+
+    def encode(self, obj: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=str, option=option)
+
+class MsgspecCodec:
+    name = 'msgspec'
+
+    def __init__(self):
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder(enc_hook=str)
+        self._sorted_encoder = msgspec.json.Encoder(enc_hook=str, order='sorted')
+
+    def loads(self, data: Loadable) -> Any:
+        return self._decoder.decode(data)
+
+    def encode(self, obj: Any, sort_keys: bool = False, indent: bool = False) -> bytes:
+        if sort_keys:
+            try:
+                encoded = self._sorted_encoder.encode(obj)
+            except TypeError:
+                encoded = StdlibCodec().encode(obj, sort_keys=True)
+        else:
+            encoded = self._encoder.encode(obj)
+        return msgspec.json.format(encoded, indent=2) if indent else encoded
+
+CODECS: Dict[str, Callable[[], Any]] = {'json': StdlibCodec}
+if msgspec:
+    CODECS['msgspec'] = MsgspecCodec
+if orjson:
+    CODECS['orjson'] = OrjsonCodec
+
+PREFERENCE = ('orjson', 'msgspec', 'json')
+
+def get_codec(name: str = 'auto'):
+    if name != 'auto':
+        if name not in CODECS:
+            raise ValueError(f"JSON codec '{name}' is not available, installed: {', '.join(CODECS)}")
+        return CODECS[name]()
+    return next(CODECS[candidate]() for candidate in PREFERENCE if candidate in CODECS)
+
+codec = get_codec(settings.JSON_CODEC)
+loads = codec.loads
+encode = codec.encode
+
+def dumps(obj: Any) -> str:
+    return encode(obj).decode()
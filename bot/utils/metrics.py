@@ -0,0 +1,167 @@
+import asyncio
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from time import monotonic, perf_counter
+from typing import Deque, Dict, Iterator, Tuple
+
+from bot.utils.logger import logger
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+
+class Counter:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def snapshot(self) -> float:
+        return self.value
+
+class Gauge:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        self.value -= amount
+
+    def snapshot(self) -> float:
+        return self.value
+
+class WindowCounter:
+    __slots__ = ('window', 'events')
+
+    def __init__(self, window: float = 3600):
+        self.window = window
+        self.events: Deque[float] = deque()
+
+    def _trim(self, now: float) -> None:
+        while self.events and now - self.events[0] > self.window:
+            self.events.popleft()
+
+    def inc(self) -> None:
+        now = monotonic()
+        self.events.append(now)
+        self._trim(now)
+
+    def snapshot(self) -> int:
+        self._trim(monotonic())
+        return len(self.events)
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'avg': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'max': round(self.max, 6)
+        }
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], object] = {}
+        self._imported: Dict[str, Dict[str, object]] = {}
+
+    def _get(self, factory, name: str, labels: dict, *args):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = self._metrics[key] = factory(*args)
+        return metric
+
+    def counter(self, name: str, **labels) -> Counter:
+        return self._get(Counter, name, labels)
+
+    def gauge(self, name: str, **labels) -> Gauge:
+        return self._get(Gauge, name, labels)
+
+    def window_counter(self, name: str, window: float = 3600, **labels) -> WindowCounter:
+        return self._get(WindowCounter, name, labels, window)
+
+    def histogram(self, name: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **labels) -> Histogram:
+        return self._get(Histogram, name, labels, buckets)
+
+    def snapshot(self) -> Dict[str, object]:
+        result = {}
+        for (name, labels), metric in self._metrics.items():
+            if labels:
+                name = f"{name}{{{','.join(f'{k}={v}' for k, v in labels)}}}"
+            result[name] = metric.snapshot()
+        for source, snapshot in self._imported.items():
+            for name, value in snapshot.items():
+                if name.endswith('}'):
+                    result[f"{name[:-1]},{source}}}"] = value
+                else:
+                    result[f"{name}{{{source}}}"] = value
+        return result
+
+    def import_snapshot(self, source: str, snapshot: Dict[str, object]) -> None:
+        self._imported[source] = snapshot
+
+metrics = MetricsRegistry()
+
+async def report_metrics(interval: int) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        for name, value in sorted(metrics.snapshot().items()):
+            logger.info(f"<c>metrics</c> | {name} = {value}")
+
+class StageTimer:
+    def __init__(self, name: str):
+        self.name = name
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - started
+            self.stages[stage] = self.stages.get(stage, 0.0) + elapsed
+            metrics.histogram(f"{self.name}_stage_seconds", stage=stage).observe(elapsed)
+
+    def report(self, **details) -> None:
+        stages = ', '.join(f"{stage}: {elapsed:.3f}s" for stage, elapsed in self.stages.items())
+        extra = ''.join(f", {key}: {value}" for key, value in details.items())
+        logger.info(f"{self.name.capitalize()} finished in {sum(self.stages.values()):.3f}s | {stages}{extra}")
@@ -0,0 +1,40 @@
+from time import time
+from typing import Callable, List, Set, Tuple
+
+from bot.utils import logger
+from bot.utils.config_utils import restructure_accounts_config
+
+SCHEMA_VERSION_KEY = 'schema_version'
+
+MIGRATIONS: List[Tuple[int, str, Callable[[dict], List[str]]]] = []
+
+def migration(version: int, name: str):
+    def register(func: Callable[[dict], List[str]]) -> Callable[[dict], List[str]]:
+        if any(registered == version for registered, _, _ in MIGRATIONS):
+            raise ValueError(f"Duplicate config migration version {version}")
+        MIGRATIONS.append((version, name, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return register
+
+@migration(1, 'move_api_keys_under_api')
+def move_api_keys_under_api(config: dict) -> List[str]:
+    return restructure_accounts_config(config)
+
+def latest_version() -> int:
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def apply_migrations(config: dict, current_version: int) -> Tuple[int, Set[str], dict]:
+    changed: Set[str] = set()
+    completed = {}
+    for version, name, func in MIGRATIONS:
+        if version <= current_version:
+            continue
+        migrated = func(config)
+        changed.update(migrated)
+        completed[f"migration_{version}"] = f"{name}:{int(time())}"
+        logger.info(f"Config migration {version} ({name}) applied to {len(migrated)} sessions")
+        current_version = version
+    if completed:
+        completed[SCHEMA_VERSION_KEY] = str(current_version)
+    return current_version, changed, completed
@@ -1,4 +1,5 @@
 import os
+import asyncio
 import aiohttp
 from aiohttp_proxy import ProxyConnector
 from collections import Counter
@@ -8,6 +9,9 @@ from better_proxy import Proxy
 from bot.config import settings
 from bot.utils import logger
 from random import shuffle
+from time import monotonic
+from typing import Dict, Optional, Tuple
+from bot.utils.metrics import metrics
 
 PROXY_TYPES = {
     'socks5': ProxyType.SOCKS5,
@@ -70,6 +74,147 @@ async def check_proxy(proxy: str) -> bool:
         logger.warning(f"Proxy {proxy} didn't respond")
         return False
 
+class ProxyHealth:
+    def __init__(self, ttl: float = 300, concurrency: int = 50):
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._table: Dict[str, Tuple[bool, float]] = {}
+        self._probes: Dict[str, asyncio.Task] = {}
+        self._watched: Counter = Counter()
+        self._hits = metrics.counter('proxy_health_hits_total')
+        self._misses = metrics.counter('proxy_health_misses_total')
+        self._healthy = metrics.gauge('proxies_healthy')
+        self._dead = metrics.gauge('proxies_dead')
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        return self._slots
+
+    def status(self, proxy: str) -> Optional[bool]:
+        entry = self._table.get(proxy)
+        if entry is None or monotonic() - entry[1] > self.ttl:
+            return None
+        return entry[0]
+
+    async def check(self, proxy: str) -> bool:
+        healthy = self.status(proxy)
+        if healthy is not None:
+            self._hits.inc()
+            return healthy
+        self._misses.inc()
+        return await asyncio.shield(self._probe(proxy))
+
+    def _probe(self, proxy: str) -> asyncio.Task:
+        task = self._probes.get(proxy)
+        if task is None:
+            task = self._probes[proxy] = asyncio.create_task(self._run_probe(proxy))
+        return task
+
+    async def _run_probe(self, proxy: str) -> bool:
+        try:
+            async with self.slots:
+                healthy = bool(await check_proxy(proxy))
+            self._table[proxy] = (healthy, monotonic())
+            metrics.counter('proxy_probes_total', result='healthy' if healthy else 'dead').inc()
+            return healthy
+        finally:
+            self._probes.pop(proxy, None)
+
+    def watch(self, proxy: Optional[str]) -> None:
+        if proxy:
+            self._watched[proxy] += 1
+
+    def unwatch(self, proxy: Optional[str]) -> None:
+        if proxy and self._watched[proxy] > 0:
+            self._watched[proxy] -= 1
+            if not self._watched[proxy]:
+                del self._watched[proxy]
+
+    async def run_prober(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl / 4)
+            now = monotonic()
+            stale = [proxy for proxy in self._watched if now - self._table.get(proxy, (False, 0.0))[1] >= self.ttl / 2]
+            await asyncio.gather(*map(self._probe, stale), return_exceptions=True)
+            self._healthy.set(sum(self.status(proxy) is True for proxy in self._table))
+            self._dead.set(sum(self.status(proxy) is False for proxy in self._table))
+
+proxy_health = ProxyHealth(ttl=settings.PROXY_HEALTH_TTL, concurrency=settings.PROXY_CHECK_CONCURRENCY)
+
+async def _probe(proxy: str) -> bool:
+    return await proxy_health.check(proxy)
+
+async def probe_first(proxies: list[str]) -> Optional[str]:
+    tasks = {asyncio.create_task(_probe(proxy)): proxy for proxy in proxies}
+    pending = set(tasks)
+    winner = None
+    try:
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None and task.result():
+                    winner = winner or tasks[task]
+    finally:
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    return winner
+
+class ProxyAllocator:
+    def __init__(self, accounts_config: dict, proxy_path: str):
+        self._proxies = get_proxies(proxy_path)
+        self._usage = Counter(config.get('proxy') for config in accounts_config.values() if config.get('proxy'))
+        self._probing = 0
+        self._settled = asyncio.Condition()
+
+    def _reserve(self, count: int) -> list[str]:
+        free = [proxy for proxy in self._proxies
+                if proxy_health.status(proxy) is not False and self._usage[proxy] < settings.SESSIONS_PER_PROXY]
+        shuffle(free)
+        free.sort(key=lambda proxy: proxy_health.status(proxy) is not True)
+        reserved = free[:count]
+        self._usage.update(reserved)
+        return reserved
+
+    def release(self, proxy: Optional[str]) -> None:
+        if proxy and self._usage[proxy] > 0:
+            self._usage[proxy] -= 1
+
+    def take_unused(self) -> Optional[str]:
+        return next(iter(self._reserve(1)), None)
+
+    async def allocate(self, current_proxy: Optional[str]) -> Optional[str]:
+        if current_proxy:
+            if await _probe(current_proxy):
+                return current_proxy
+            self.release(current_proxy)
+
+        while True:
+            candidates = self._reserve(settings.PROXY_PROBE_PARALLEL)
+            if not candidates:
+                if not self._probing:
+                    return None
+                async with self._settled:
+                    await self._settled.wait()
+                continue
+
+            winner = None
+            self._probing += 1
+            try:
+                winner = await probe_first(candidates)
+            finally:
+                self._probing -= 1
+                for proxy in candidates:
+                    if proxy != winner:
+                        self.release(proxy)
+                async with self._settled:
+                    self._settled.notify_all()
+            if winner:
+                return winner
+
 async def get_proxy_chain(path: str) -> tuple[str | None, str | None]:
     try:
         with open(path, 'r') as file:
@@ -80,14 +225,5 @@ async def get_proxy_chain(path: str) -> tuple[str | None, str | None]:
         return None, None
 
 async def get_working_proxy(accounts_config: dict, current_proxy: str | None) -> str | None:
-    if current_proxy and await check_proxy(current_proxy):
-        return current_proxy
-
     from bot.utils import PROXIES_PATH
-    unused_proxies = get_unused_proxies(accounts_config, PROXIES_PATH)
-    shuffle(unused_proxies)
-    for proxy in unused_proxies:
-        if await check_proxy(proxy):
-            return proxy
-
-    return None
\ No newline at end of file
+    return await ProxyAllocator(accounts_config, PROXIES_PATH).allocate(current_proxy)
\ No newline at end of file
@@ -0,0 +1,109 @@
+import asyncio
+from collections import deque
+from time import monotonic
+from typing import Deque, Dict, Optional
+
+from bot.config import settings
+from bot.utils.http_pool import pool_label
+from bot.utils.metrics import metrics
+
+class TokenBucket:
+    def __init__(self, name: str, rate: float, burst: Optional[float] = None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = monotonic()
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._depth = metrics.gauge('rate_limit_queue_depth', bucket=name)
+        self._wait = metrics.histogram('rate_limit_wait_seconds', bucket=name)
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _schedule(self) -> None:
+        if self._timer is not None or not self._waiters:
+            return
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._wake)
+
+    def _wake(self) -> None:
+        self._timer = None
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            future = self._waiters.popleft()
+            if future.done():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+        self._depth.set(len(self._waiters))
+        self._schedule()
+
+    def try_acquire(self) -> float:
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            self._wait.observe(0)
+            return 0.0
+        return (len(self._waiters) + 1 - self._tokens) / self.rate
+
+    def refund(self) -> None:
+        self._tokens = min(self.burst, self._tokens + 1)
+
+    async def acquire(self) -> None:
+        started = monotonic()
+        if not self.try_acquire():
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._depth.set(len(self._waiters))
+        self._refill()
+        self._schedule()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.refund()
+            elif future in self._waiters:
+                self._waiters.remove(future)
+            self._depth.set(len(self._waiters))
+            raise
+        self._wait.observe(monotonic() - started)
+
+class RateShaper:
+    def __init__(self, rate: float = 0, per_proxy_rate: float = 0):
+        self._global = TokenBucket('global', rate) if rate > 0 else None
+        self._per_proxy_rate = per_proxy_rate
+        self._proxies: Dict[str, TokenBucket] = {}
+
+    def _proxy_bucket(self, proxy: Optional[str]) -> Optional[TokenBucket]:
+        if self._per_proxy_rate <= 0:
+            return None
+        label = pool_label(proxy)
+        bucket = self._proxies.get(label)
+        if bucket is None:
+            bucket = self._proxies[label] = TokenBucket(label, self._per_proxy_rate)
+        return bucket
+
+    def try_acquire(self, proxy: Optional[str] = None) -> float:
+        bucket = self._proxy_bucket(proxy)
+        wait = bucket.try_acquire() if bucket else 0.0
+        if wait or not self._global:
+            return wait
+        wait = self._global.try_acquire()
+        if wait and bucket:
+            bucket.refund()
+        return wait
+
+    async def acquire(self, proxy: Optional[str] = None) -> None:
+        bucket = self._proxy_bucket(proxy)
+        if bucket:
+            await bucket.acquire()
+        if self._global:
+            await self._global.acquire()
+
+rate_shaper = RateShaper(rate=settings.RATE_LIMIT_RPS, per_proxy_rate=settings.RATE_LIMIT_PER_PROXY_RPS)
@@ -0,0 +1,107 @@
+import asyncio
+from random import uniform
+from time import monotonic
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from bot.utils.metrics import metrics
+
+TRANSIENT_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+NOT_PROCESSED_STATUSES = frozenset({425, 429, 503})
+MAX_RETRY_AFTER = 60.0
+
+class RetryPolicy:
+    __slots__ = ('name', 'max_attempts', 'base_delay', 'max_delay', 'idempotent',
+                 'retries', 'recovered', 'exhausted', 'budget_exhausted')
+
+    def __init__(self, name: str, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                 idempotent: bool = True):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.idempotent = idempotent
+        self.retries = metrics.counter('http_retries_total', endpoint=name)
+        self.recovered = metrics.counter('http_retry_recovered_total', endpoint=name)
+        self.exhausted = metrics.counter('http_retry_exhausted_total', endpoint=name)
+        self.budget_exhausted = metrics.counter('http_retry_budget_exhausted_total', endpoint=name)
+
+    def should_retry(self, status: Optional[int] = None, error: Optional[BaseException] = None) -> bool:
+        if status is not None:
+            return status in NOT_PROCESSED_STATUSES or (self.idempotent and status in TRANSIENT_STATUSES)
+        if isinstance(error, aiohttp.ClientConnectorError):
+            return True
+        if isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError)):
+            return self.idempotent
+        return False
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        backoff = uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after:
+            return max(backoff, min(retry_after, MAX_RETRY_AFTER))
+        return backoff
+
+class RetryBudget:
+    def __init__(self, ratio: float = 0.2, min_per_sec: float = 5, window: float = 10):
+        self._ratio = ratio
+        self._min_per_sec = min_per_sec
+        self._max_tokens = max(1.0, min_per_sec * window)
+        self._tokens = self._max_tokens
+        self._updated = monotonic()
+
+    def _refill(self) -> None:
+        now = monotonic()
+        self._tokens = min(self._max_tokens, self._tokens + (now - self._updated) * self._min_per_sec)
+        self._updated = now
+
+    def deposit(self) -> None:
+        self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def withdraw(self) -> bool:
+        self._refill()
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+class Backoff:
+    __slots__ = ('base', 'cap', 'failures')
+
+    def __init__(self, base: float, cap: float):
+        self.base = base
+        self.cap = cap
+        self.failures = 0
+
+    def next(self) -> float:
+        self.failures += 1
+        return uniform(self.base, max(self.base, min(self.cap, self.base * 2 ** self.failures)))
+
+    def reset(self) -> None:
+        self.failures = 0
+
+POLICIES: Dict[str, RetryPolicy] = {
+    '/auth/start': RetryPolicy('auth', max_attempts=3, base_delay=1, max_delay=10),
+    '/game/onboarding': RetryPolicy('onboarding', max_attempts=3, base_delay=1, max_delay=10),
+    '/game/sync': RetryPolicy('sync', max_attempts=4, base_delay=0.5, max_delay=8),
+    '/tasks/check': RetryPolicy('task_check', max_attempts=3, base_delay=1, max_delay=10),
+    '/upgrades/buy': RetryPolicy('upgrade_buy', max_attempts=3, base_delay=1, max_delay=10, idempotent=False),
+    '/game/tickets/buy': RetryPolicy('tickets_buy', max_attempts=3, base_delay=1, max_delay=10, idempotent=False),
+}
+DEFAULT_POLICY = RetryPolicy('default', max_attempts=2, idempotent=False)
+
+def policy_for(url: str) -> RetryPolicy:
+    path = urlsplit(url).path
+    for suffix, policy in POLICIES.items():
+        if path.endswith(suffix):
+            return policy
+    return DEFAULT_POLICY
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+retry_budget = RetryBudget()
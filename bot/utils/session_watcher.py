@@ -0,0 +1,188 @@
+import asyncio
+import ctypes
+import ctypes.util
+import os
+import struct
+from time import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from bot.config.config import Settings, settings
+from bot.utils import logger
+from bot.utils.retry import Backoff
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+SUBDIRECTORIES = ('telethon', 'pyrogram')
+
+class _Inotify:
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def watch(self, directory: str) -> None:
+        if os.path.isdir(directory):
+            self._libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+
+    def read_names(self) -> List[str]:
+        names = []
+        try:
+            while data := os.read(self.fd, 65536):
+                offset = 0
+                while offset + EVENT_HEADER.size <= len(data):
+                    length = EVENT_HEADER.unpack_from(data, offset)[3]
+                    offset += EVENT_HEADER.size
+                    names.append(os.fsdecode(data[offset:offset + length].rstrip(b'\0')))
+                    offset += length
+        except BlockingIOError:
+            pass
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+class SessionWatcher:
+    def __init__(self, sessions_path: str, scan: Callable[[], List[str]],
+                 on_added: Callable[[str], Awaitable[bool]],
+                 on_removed: Optional[Callable[[str], Awaitable[None]]] = None,
+                 interval: float = 30, settle_time: float = 5,
+                 retry_delay: float = 60, max_retry_delay: float = 3600):
+        self.sessions_path = sessions_path
+        self._scan = scan
+        self._on_added = on_added
+        self._on_removed = on_removed
+        self._interval = interval
+        self._settle_time = settle_time
+        self._retry_delay = retry_delay
+        self._max_retry_delay = max_retry_delay
+        self._active: Set[str] = set()
+        self._failed: Dict[str, Tuple[Optional[float], float, Backoff]] = {}
+        self._changed = asyncio.Event()
+        self._inotify: Optional[_Inotify] = None
+        self._env_file = Settings.model_config.get('env_file')
+        self._env_mtime = self._mtime(self._env_file)
+        self._blacklisted = set(settings.blacklisted_sessions)
+
+    @property
+    def directories(self) -> List[str]:
+        return [self.sessions_path] + [os.path.join(self.sessions_path, name) for name in SUBDIRECTORIES]
+
+    @staticmethod
+    def _mtime(file_path: Optional[str]) -> Optional[float]:
+        try:
+            return os.path.getmtime(file_path) if file_path else None
+        except OSError:
+            return None
+
+    def _start_inotify(self) -> None:
+        try:
+            self._inotify = _Inotify()
+        except (OSError, AttributeError, TypeError) as e:
+            logger.info(f"Session watcher: inotify unavailable ({e}), polling every {self._interval}s")
+            return
+        for directory in self.directories:
+            self._inotify.watch(directory)
+        asyncio.get_running_loop().add_reader(self._inotify.fd, self._on_inotify_event)
+
+    def _on_inotify_event(self) -> None:
+        names = self._inotify.read_names()
+        if any(name in SUBDIRECTORIES for name in names):
+            for directory in self.directories:
+                self._inotify.watch(directory)
+        if any(name.endswith('.session') for name in names):
+            self._changed.set()
+
+    def _stop_inotify(self) -> None:
+        if self._inotify:
+            asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+
+    def _blacklisted_sessions(self) -> Set[str]:
+        mtime = self._mtime(self._env_file)
+        if mtime != self._env_mtime:
+            self._env_mtime = mtime
+            self._blacklisted = set(Settings().blacklisted_sessions)
+        return self._blacklisted
+
+    def _current_sessions(self) -> Set[str]:
+        blacklisted = self._blacklisted_sessions()
+        now = time()
+        sessions = set()
+        for session in self._scan():
+            if os.path.basename(session) in blacklisted:
+                continue
+            try:
+                if session not in self._active and now - os.path.getmtime(f"{session}.session") < self._settle_time:
+                    self._changed.set()
+                    continue
+            except FileNotFoundError:
+                continue
+            sessions.add(session)
+        return sessions
+
+    def _due(self, session: str, now: float) -> bool:
+        failure = self._failed.get(session)
+        if failure is None:
+            return True
+        mtime, retry_at, _ = failure
+        if self._mtime(f"{session}.session") != mtime:
+            del self._failed[session]
+            return True
+        return now >= retry_at
+
+    def _record_failures(self, sessions: Iterable[str]) -> None:
+        for session in sessions:
+            failure = self._failed.get(session)
+            backoff = failure[2] if failure else Backoff(self._retry_delay, self._max_retry_delay)
+            delay = backoff.next()
+            self._failed[session] = (self._mtime(f"{session}.session"), time() + delay, backoff)
+            logger.info(f"{os.path.basename(session)} | Session failed to start, "
+                        f"retrying in {int(delay)}s or when the session file changes")
+
+    async def _apply(self, sessions: Iterable[str], handler: Callable[[str], Awaitable[Optional[bool]]]) -> Set[str]:
+        applied = set()
+        for session in sorted(sessions):
+            try:
+                if await handler(session):
+                    applied.add(session)
+            except Exception as e:
+                logger.error(f"{os.path.basename(session)} | Session watcher error: {e}")
+        return applied
+
+    async def run(self, active: Iterable[str]) -> None:
+        self._active = set(active)
+        self._start_inotify()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._changed.wait(), self._interval)
+                    await asyncio.sleep(1)
+                except asyncio.TimeoutError:
+                    pass
+                self._changed.clear()
+
+                current = self._current_sessions()
+                removed = self._active - current
+                self._active -= removed
+                if self._on_removed:
+                    await self._apply(removed, self._on_removed)
+                for session in set(self._failed) - current:
+                    del self._failed[session]
+                now = time()
+                candidates = {session for session in current - self._active if self._due(session, now)}
+                added = await self._apply(candidates, self._on_added)
+                self._active |= added
+                for session in added:
+                    self._failed.pop(session, None)
+                self._record_failures(candidates - added)
+        finally:
+            self._stop_inotify()
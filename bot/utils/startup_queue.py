@@ -0,0 +1,96 @@
+import asyncio
+from contextlib import asynccontextmanager
+from time import monotonic
+from typing import AsyncIterator, Dict, Optional
+
+from bot.config import settings
+from bot.exceptions import AuthDeferred
+from bot.utils import logger
+from bot.utils.metrics import metrics
+
+class StartupQueue:
+    def __init__(self, rate: float = 0, window: float = 360, max_auth: int = 20):
+        self.rate = rate
+        self.window = window
+        self.max_auth = max_auth
+        self._rate = rate or 1.0
+        self._next_slot = 0.0
+        self._started_at: Optional[float] = None
+        self._expected = 0
+        self._activated = 0
+        self._pending: Dict[str, float] = {}
+        self._auth = asyncio.Semaphore(max_auth)
+        self._average_auth = 1.0
+        self._pending_gauge = metrics.gauge('startup_pending')
+        self._active_gauge = metrics.gauge('startup_active_sessions')
+        self._auth_in_flight = metrics.gauge('auth_in_flight')
+        self._auth_wait = metrics.histogram('auth_slot_wait_seconds')
+        self._startup_time = metrics.histogram('startup_seconds')
+
+    def plan(self, sessions: int, share: float = 1.0) -> None:
+        self._rate = self.rate * share if self.rate > 0 else max(sessions, 1) / max(self.window, 1)
+        self._auth = asyncio.Semaphore(max(1, round(self.max_auth * share)))
+        self._next_slot = 0.0
+        self._expected = sessions
+        self._activated = 0
+        self._started_at = monotonic()
+        if sessions:
+            logger.info(f"Starting {sessions} sessions at {self._rate:.2f} sessions/s "
+                        f"(~{sessions / self._rate:.0f}s for the whole fleet)")
+
+    def reserve(self, session_name: str) -> float:
+        now = monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + 1 / self._rate
+        self._pending[session_name] = now
+        self._pending_gauge.set(len(self._pending))
+        return slot - now
+
+    def activated(self, session_name: str) -> None:
+        reserved = self._pending.pop(session_name, None)
+        if reserved is None:
+            return
+        self._startup_time.observe(monotonic() - reserved)
+        self._activated += 1
+        self._pending_gauge.set(len(self._pending))
+        self._active_gauge.set(self._activated)
+        self._check_fleet()
+
+    def discard(self, session_name: str) -> None:
+        if self._pending.pop(session_name, None) is None:
+            return
+        self._expected -= 1
+        self._pending_gauge.set(len(self._pending))
+        self._check_fleet()
+
+    def _check_fleet(self) -> None:
+        if self._started_at is None or self._activated < self._expected:
+            return
+        elapsed = monotonic() - self._started_at
+        metrics.gauge('fleet_startup_seconds').set(round(elapsed, 3))
+        if self._activated:
+            logger.info(f"🚀 All {self._activated} sessions active in {elapsed:.1f}s "
+                        f"({self._activated / max(elapsed, 1e-9):.2f} sessions/s)")
+        self._started_at = None
+
+    @asynccontextmanager
+    async def auth(self, session_name: str, defer: bool = False) -> AsyncIterator[None]:
+        if session_name not in self._pending:
+            yield
+            return
+        if defer and self._auth.locked():
+            metrics.counter('auth_deferred_total').inc()
+            raise AuthDeferred(self._average_auth)
+        queued = monotonic()
+        async with self._auth:
+            started = monotonic()
+            self._auth_wait.observe(started - queued)
+            self._auth_in_flight.inc()
+            try:
+                yield
+            finally:
+                self._auth_in_flight.dec()
+                self._average_auth += (monotonic() - started - self._average_auth) * 0.2
+
+startup_queue = StartupQueue(rate=settings.STARTUP_RATE, window=settings.SESSION_START_DELAY,
+                             max_auth=settings.STARTUP_MAX_AUTH)
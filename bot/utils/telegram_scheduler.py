@@ -0,0 +1,117 @@
+import asyncio
+import heapq
+from contextlib import asynccontextmanager
+from itertools import count
+from time import monotonic
+from typing import AsyncIterator, Dict, List, NoReturn, Tuple
+
+from bot.config import settings
+from bot.exceptions import InvalidSession, TelegramDeferred
+from bot.utils import logger
+from bot.utils.metrics import metrics
+
+URGENT, NORMAL, LOW = 0, 1, 2
+PRIORITY_NAMES = {URGENT: 'urgent', NORMAL: 'normal', LOW: 'low'}
+
+class TelegramScheduler:
+    def __init__(self, max_connections: int = 10, max_flood_waits: int = 5):
+        self.max_connections = max_connections
+        self.max_flood_waits = max_flood_waits
+        self._active = 0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = count()
+        self._not_before: Dict[str, float] = {}
+        self._flood_counts: Dict[str, int] = {}
+        self._average_duration = 1.0
+        self._depth = metrics.gauge('telegram_queue_depth')
+        self._connections = metrics.gauge('telegram_connections_active')
+        self._deferred = metrics.counter('telegram_deferred_requests_total')
+        self._flood_waits = metrics.counter('telegram_flood_wait_total')
+        self._duration = metrics.histogram('telegram_connection_seconds')
+
+    def defer(self, session_name: str, seconds: float) -> None:
+        deadline = monotonic() + seconds
+        if deadline > self._not_before.get(session_name, 0):
+            self._not_before[session_name] = deadline
+
+    def flood_wait(self, session_name: str, seconds: float) -> NoReturn:
+        self._flood_waits.inc()
+        flood_count = self._flood_counts[session_name] = self._flood_counts.get(session_name, 0) + 1
+        if self.max_flood_waits and flood_count > self.max_flood_waits:
+            self._flood_counts.pop(session_name, None)
+            raise InvalidSession(f"{session_name}: {flood_count - 1} FloodWait responses in a row")
+        logger.warning(f"<ly>{session_name}</ly> | FloodWait {int(seconds)}s "
+                       f"({flood_count}/{self.max_flood_waits or '∞'}), deferring Telegram requests")
+        self.defer(session_name, seconds + 3)
+        raise TelegramDeferred(seconds + 3)
+
+    def succeeded(self, session_name: str) -> None:
+        self._flood_counts.pop(session_name, None)
+
+    def check_ready(self, session_name: str) -> None:
+        delay = self._not_before.get(session_name, 0) - monotonic()
+        if delay <= 0:
+            self._not_before.pop(session_name, None)
+            return
+        self._deferred.inc()
+        raise TelegramDeferred(delay)
+
+    def try_acquire(self) -> bool:
+        if self._active < self.max_connections and not self._queue:
+            self._active += 1
+            return True
+        return False
+
+    def retry_in(self) -> float:
+        return self._average_duration * (len(self._queue) + 1) / self.max_connections
+
+    async def _acquire(self, priority: int) -> None:
+        if self.try_acquire():
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future))
+        self._depth.set(len(self._queue))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            else:
+                future.cancel()
+            raise
+        finally:
+            self._depth.set(len(self._queue))
+
+    def _release(self) -> None:
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def connection(self, session_name: str, priority: int = NORMAL,
+                         defer: bool = False) -> AsyncIterator[None]:
+        self.check_ready(session_name)
+        queued = monotonic()
+        if not defer:
+            await self._acquire(priority)
+        elif not self.try_acquire():
+            self._deferred.inc()
+            raise TelegramDeferred(self.retry_in())
+        started = monotonic()
+        metrics.histogram('telegram_queue_wait_seconds', priority=PRIORITY_NAMES.get(priority, priority)) \
+            .observe(started - queued)
+        self._connections.set(self._active)
+        try:
+            yield
+        finally:
+            duration = monotonic() - started
+            self._duration.observe(duration)
+            self._average_duration += (duration - self._average_duration) * 0.2
+            self._release()
+            self._connections.set(self._active)
+
+telegram_scheduler = TelegramScheduler(max_connections=settings.TELEGRAM_MAX_CONNECTIONS,
+                                      max_flood_waits=settings.TELEGRAM_MAX_FLOOD_WAITS)
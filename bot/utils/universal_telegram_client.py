@@ -2,6 +2,7 @@ import asyncio
 import os
 from better_proxy import Proxy
 from datetime import datetime, timedelta
+from functools import partial
 from random import randint, uniform
 from sqlite3 import OperationalError
 from typing import Union
@@ -25,6 +26,9 @@ from bot.config import settings
 from bot.exceptions import InvalidSession
 from bot.utils.proxy_utils import to_pyrogram_proxy, to_telethon_proxy
 from bot.utils import logger, log_error, AsyncInterProcessLock, CONFIG_PATH, first_run
+from bot.utils.telegram_scheduler import telegram_scheduler, NORMAL
+
+RECONNECT_DELAY = 15
 
 class UniversalTelegramClient:
     def __init__(self, **client_params):
@@ -68,15 +72,30 @@ class UniversalTelegramClient:
             self.proxy = to_pyrogram_proxy(proxy)
             self.client.proxy = self.proxy
 
-    async def get_app_webview_url(self, bot_username: str, bot_shortname: str, default_val: str) -> str:
+    async def _scheduled(self, request, priority: int, defer: bool = False) -> str:
+        async with telegram_scheduler.connection(self.session_name, priority, defer):
+            try:
+                result = await request()
+            except FloodWaitError as fl:
+                wait_seconds = fl.seconds
+            except FloodWait as fl:
+                wait_seconds = fl.value
+            else:
+                telegram_scheduler.succeeded(self.session_name)
+                return result
+        telegram_scheduler.flood_wait(self.session_name, wait_seconds)
+
+    async def get_app_webview_url(self, bot_username: str, bot_shortname: str, default_val: str,
+                                  priority: int = NORMAL, defer: bool = False) -> str:
         self.is_first_run = await first_run.check_is_first_run(self.session_name)
-        return await self._pyrogram_get_app_webview_url(bot_username, bot_shortname, default_val) if self.is_pyrogram \
-            else await self._telethon_get_app_webview_url(bot_username, bot_shortname, default_val)
+        request = self._pyrogram_get_app_webview_url if self.is_pyrogram else self._telethon_get_app_webview_url
+        return await self._scheduled(partial(request, bot_username, bot_shortname, default_val), priority, defer)
 
-    async def get_webview_url(self, bot_username: str, bot_url: str, default_val: str) -> str:
+    async def get_webview_url(self, bot_username: str, bot_url: str, default_val: str,
+                              priority: int = NORMAL, defer: bool = False) -> str:
         self.is_first_run = await first_run.check_is_first_run(self.session_name)
-        return await self._pyrogram_get_webview_url(bot_username, bot_url, default_val) if self.is_pyrogram \
-            else await self._telethon_get_webview_url(bot_username, bot_url, default_val)
+        request = self._pyrogram_get_webview_url if self.is_pyrogram else self._telethon_get_webview_url
+        return await self._scheduled(partial(request, bot_username, bot_url, default_val), priority, defer)
 
     async def join_and_mute_tg_channel(self, link: str):
         return await self._pyrogram_join_and_mute_tg_channel(link) if self.is_pyrogram \
@@ -88,17 +107,11 @@ class UniversalTelegramClient:
 
     async def _telethon_initialize_webview_data(self, bot_username: str, bot_shortname: str = None):
         if not self._webview_data:
-            while True:
-                try:
-                    peer = await self.client.get_input_entity(bot_username)
-                    bot_id = InputUser(user_id=peer.user_id, access_hash=peer.access_hash)
-                    input_bot_app = InputBotAppShortName(bot_id=bot_id, short_name=bot_shortname)
-                    self._webview_data = {'peer': peer, 'app': input_bot_app} if bot_shortname \
-                        else {'peer': peer, 'bot': peer}
-                    return
-                except FloodWaitError as fl:
-                    logger.warning(f"<ly>{self.session_name}</ly> | FloodWait {fl}. Waiting {fl.seconds}s")
-                    await asyncio.sleep(fl.seconds + 3)
+            peer = await self.client.get_input_entity(bot_username)
+            bot_id = InputUser(user_id=peer.user_id, access_hash=peer.access_hash)
+            input_bot_app = InputBotAppShortName(bot_id=bot_id, short_name=bot_shortname)
+            self._webview_data = {'peer': peer, 'app': input_bot_app} if bot_shortname \
+                else {'peer': peer, 'bot': peer}
 
     async def _telethon_get_app_webview_url(self, bot_username: str, bot_shortname: str, default_val: str) -> str:
         if self.proxy and not self.client._proxy:
@@ -142,7 +155,7 @@ class UniversalTelegramClient:
             finally:
                 if self.client.is_connected():
                     await self.client.disconnect()
-                    await asyncio.sleep(15)
+                    telegram_scheduler.defer(self.session_name, RECONNECT_DELAY)
 
     async def _telethon_get_webview_url(self, bot_username: str, bot_url: str, default_val: str) -> str:
         if self.proxy and not self.client._proxy:
@@ -189,20 +202,14 @@ class UniversalTelegramClient:
             finally:
                 if self.client.is_connected():
                     await self.client.disconnect()
-                    await asyncio.sleep(15)
+                    telegram_scheduler.defer(self.session_name, RECONNECT_DELAY)
 
     async def _pyrogram_initialize_webview_data(self, bot_username: str, bot_shortname: str = None):
         if not self._webview_data:
-            while True:
-                try:
-                    peer = await self.client.resolve_peer(bot_username)
-                    input_bot_app = ptypes.InputBotAppShortName(bot_id=peer, short_name=bot_shortname)
-                    self._webview_data = {'peer': peer, 'app': input_bot_app} if bot_shortname \
-                        else {'peer': peer, 'bot': peer}
-                    return
-                except FloodWait as fl:
-                    logger.warning(f"<ly>{self.session_name}</ly> | FloodWait {fl}. Waiting {fl.value}s")
-                    await asyncio.sleep(fl.value + 3)
+            peer = await self.client.resolve_peer(bot_username)
+            input_bot_app = ptypes.InputBotAppShortName(bot_id=peer, short_name=bot_shortname)
+            self._webview_data = {'peer': peer, 'app': input_bot_app} if bot_shortname \
+                else {'peer': peer, 'bot': peer}
 
     async def _pyrogram_get_app_webview_url(self, bot_username: str, bot_shortname: str, default_val: str) -> str:
         if self.proxy and not self.client.proxy:
@@ -246,7 +253,7 @@ class UniversalTelegramClient:
             finally:
                 if self.client.is_connected:
                     await self.client.disconnect()
-                    await asyncio.sleep(15)
+                    telegram_scheduler.defer(self.session_name, RECONNECT_DELAY)
 
     async def _pyrogram_get_webview_url(self, bot_username: str, bot_url: str, default_val: str) -> str:
         if self.proxy and not self.client.proxy:
@@ -294,7 +301,7 @@ class UniversalTelegramClient:
             finally:
                 if self.client.is_connected:
                     await self.client.disconnect()
-                    await asyncio.sleep(15)
+                    telegram_scheduler.defer(self.session_name, RECONNECT_DELAY)
 
     async def _telethon_join_and_mute_tg_channel(self, link: str):
         path = link.replace("https://t.me/", "")
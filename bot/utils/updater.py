@@ -2,13 +2,14 @@ import os
 import sys
 import asyncio
 import subprocess
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 from bot.utils import logger
 from bot.config import settings
 
 class UpdateManager:
-    def __init__(self):
+    def __init__(self, before_restart: Optional[Callable[[], Awaitable[None]]] = None):
         self.branch = "main"
+        self.before_restart = before_restart
         self.check_interval = settings.CHECK_UPDATE_INTERVAL
         self.is_update_restart = "--update-restart" in sys.argv
         self._configure_git_safe_directory()
@@ -142,6 +143,12 @@ class UpdateManager:
             return
 
         logger.info("✅ Update successfully installed! Restarting application...")
+
+        if self.before_restart:
+            await self.before_restart()
+        else:
+            from bot.core.tapper import save_all_snapshots
+            await save_all_snapshots()
         
         new_args = [sys.executable, sys.argv[0], "-a", "1", "--update-restart"]
         os.execv(sys.executable, new_args)
@@ -0,0 +1,31 @@
+import os
+import tempfile
+
+os.environ['GLOBAL_CONFIG_PATH'] = tempfile.mkdtemp(prefix='tg_farm_tests_')
+os.environ.setdefault('API_ID', '1')
+os.environ.setdefault('API_HASH', 'test')
+
+from itertools import count
+from types import SimpleNamespace
+from typing import List, Optional
+
+import pytest
+
+from bot.utils import config_utils, CONFIG_PATH
+from tests.helpers import FakeHttp, FakeResponse
+
+_session_ids = count()
+
+@pytest.fixture
+def make_bot():
+    from bot.core.tapper import BaseBot
+
+    def make(responses: List[FakeResponse] = (), config: Optional[dict] = None) -> BaseBot:
+        session_name = f"session{next(_session_ids)}"
+        config_utils.get_config_store(CONFIG_PATH).put(
+            session_name, config or {'api': {}, 'user_agent': 'Mozilla/5.0'})
+        bot = BaseBot(SimpleNamespace(session_name=session_name, set_proxy=lambda proxy: None))
+        bot._http_client = FakeHttp(responses)
+        return bot
+
+    return make
@@ -0,0 +1,30 @@
+from typing import List, Optional
+
+from bot.utils import json_codec
+
+class FakeResponse:
+    def __init__(self, status: int, data: Optional[dict] = None, headers: Optional[dict] = None):
+        self.status = status
+        self.headers = headers or {}
+        self._body = json_codec.encode(data or {})
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self) -> str:
+        return self._body.decode()
+
+    async def __aenter__(self) -> 'FakeResponse':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        pass
+
+class FakeHttp:
+    def __init__(self, responses: List[FakeResponse]):
+        self.responses = list(responses)
+        self.requests: List[tuple] = []
+
+    def post(self, url: str, **kwargs) -> FakeResponse:
+        self.requests.append((url, kwargs))
+        return self.responses.pop(0)
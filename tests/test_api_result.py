@@ -0,0 +1,62 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from bot.core.api_result import ApiResult, Outcome, classify
+from tests.helpers import FakeResponse
+
+@pytest.mark.parametrize('status, outcome', [
+    (200, Outcome.OK), (401, Outcome.AUTH_EXPIRED), (403, Outcome.AUTH_EXPIRED), (429, Outcome.TRANSIENT),
+    (502, Outcome.TRANSIENT), (400, Outcome.CLIENT_ERROR), (404, Outcome.CLIENT_ERROR)])
+def test_statuses_are_classified(status, outcome):
+    assert classify(status=status) is outcome
+
+def test_errors_are_classified():
+    assert classify(error=asyncio.TimeoutError()) is Outcome.TRANSIENT
+    assert classify(error=aiohttp.ClientConnectorError(None, OSError('refused'))) is Outcome.NETWORK
+    assert classify(error=ValueError()) is Outcome.TRANSIENT
+
+def test_result_is_truthy_only_when_ok():
+    assert ApiResult(Outcome.OK, {}, 200)
+    assert not ApiResult(Outcome.TRANSIENT, None, 502)
+
+def reauth_counter(bot):
+    calls = []
+
+    async def reauthenticate(reason):
+        calls.append(reason)
+        return True
+
+    bot.reauthenticate = reauthenticate
+    return calls
+
+def test_sync_failure_without_expiry_does_not_reauthenticate(make_bot):
+    bot = make_bot([FakeResponse(404)])
+    calls = reauth_counter(bot)
+    assert asyncio.run(bot.sync_game()) is None
+    assert calls == []
+
+def test_expired_sync_reauthenticates_once_and_retries(make_bot):
+    bot = make_bot([FakeResponse(401), FakeResponse(200, {'currentEnergy': 42})])
+    calls = reauth_counter(bot)
+    assert asyncio.run(bot.sync_game()) is not None
+    assert calls == ['expired']
+    assert bot.state.energy == 42
+
+def test_repeated_sync_rejections_fall_back_to_reauth(make_bot):
+    limit = make_bot().SYNC_ERRORS_BEFORE_REAUTH
+    bot = make_bot([FakeResponse(400) for _ in range(limit)] + [FakeResponse(200, {'currentEnergy': 7})])
+    calls = reauth_counter(bot)
+    for _ in range(limit - 1):
+        assert asyncio.run(bot.sync_game()) is None
+    assert calls == []
+    assert asyncio.run(bot.sync_game()) is not None
+    assert calls == ['sync_rejected'] and bot._sync_client_errors == 0
+
+def test_successful_sync_resets_the_rejection_count(make_bot):
+    bot = make_bot([FakeResponse(400), FakeResponse(200, {'currentEnergy': 7}), FakeResponse(400)])
+    calls = reauth_counter(bot)
+    for _ in range(3):
+        asyncio.run(bot.sync_game())
+    assert calls == [] and bot._sync_client_errors == 1
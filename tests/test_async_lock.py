@@ -0,0 +1,100 @@
+import asyncio
+import os
+
+import pytest
+
+from bot.utils.async_lock import AsyncInterProcessLock
+
+fcntl = pytest.importorskip('fcntl')
+
+def test_waiters_acquire_in_fifo_order(tmp_path):
+    lock_file = str(tmp_path / 'fifo.lock')
+    order = []
+
+    async def worker(index):
+        async with AsyncInterProcessLock(lock_file):
+            order.append(index)
+            await asyncio.sleep(0.001)
+
+    async def scenario():
+        await asyncio.gather(*(worker(index) for index in range(10)))
+
+    asyncio.run(scenario())
+    assert order == list(range(10))
+
+def test_lock_excludes_other_holders_of_the_file(tmp_path):
+    lock_file = str(tmp_path / 'shared.lock')
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            async with AsyncInterProcessLock(lock_file, timeout=0.1):
+                pass
+
+        waiter = asyncio.create_task(AsyncInterProcessLock(lock_file).__aenter__())
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        lock = await asyncio.wait_for(waiter, 5)
+        assert lock.locked
+        await lock.__aexit__(None, None, None)
+        assert not lock.locked
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        os.close(fd)
+
+def test_cancelled_waiter_does_not_block_the_queue(tmp_path):
+    lock_file = str(tmp_path / 'cancel.lock')
+
+    async def scenario():
+        holder = AsyncInterProcessLock(lock_file)
+        await holder.__aenter__()
+        cancelled = asyncio.create_task(AsyncInterProcessLock(lock_file).__aenter__())
+        queued = asyncio.create_task(AsyncInterProcessLock(lock_file).__aenter__())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await holder.__aexit__(None, None, None)
+        lock = await asyncio.wait_for(queued, 1)
+        await lock.__aexit__(None, None, None)
+        return cancelled.cancelled()
+
+    assert asyncio.run(scenario())
+
+def test_file_is_closed_once_the_lock_is_idle(tmp_path):
+    lock_file = str(tmp_path / 'idle.lock')
+
+    async def scenario():
+        lock = AsyncInterProcessLock(lock_file)
+        handle = lock._lock._handle
+        async with lock:
+            assert handle._fd is not None
+            queued = asyncio.create_task(AsyncInterProcessLock(lock_file).__aenter__())
+            await asyncio.sleep(0)
+        await queued
+        assert handle._fd is not None
+        await lock.__aexit__(None, None, None)
+        return handle._fd
+
+    assert asyncio.run(scenario()) is None
+
+def test_timeout_drops_local_ownership_immediately(tmp_path):
+    lock_file = str(tmp_path / 'timeout.lock')
+    fd = os.open(lock_file, os.O_RDWR | os.O_CREAT)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+
+    async def scenario():
+        lock = AsyncInterProcessLock(lock_file, timeout=0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await lock.__aenter__()
+        assert not lock.locked and lock._lock._handle._fd is None
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        async with AsyncInterProcessLock(lock_file, timeout=1):
+            return True
+
+    try:
+        assert asyncio.run(scenario())
+    finally:
+        os.close(fd)
@@ -0,0 +1,50 @@
+import pytest
+
+from bot.core.catalog import CatalogCache, without_catalog
+
+UPGRADE = {'id': 'miner', 'title': 'Miner', 'price': 100, 'level': 2,
+           'next': {'level': 3, 'price': 200, 'increment': 5}}
+
+def test_static_upgrade_data_is_shared_between_sessions():
+    cache = CatalogCache()
+    first = cache.upgrades([dict(UPGRADE)])['miner']
+    second = cache.upgrades([dict(UPGRADE, level=5)])['miner']
+    assert first._shared is second._shared
+    assert first._state['next'] == second._state['next'] == UPGRADE['next']
+    assert (first['level'], second['level']) == (2, 5)
+    assert dict(first) == UPGRADE
+
+def test_session_state_writes_stay_private():
+    cache = CatalogCache()
+    first, second = (cache.tasks([{'id': 'join', 'reward': 10}])['join'] for _ in range(2))
+    first['completed'] = True
+    first['reward'] = 20
+    assert 'completed' not in second and second['reward'] == 10
+    with pytest.raises(TypeError):
+        first._shared['reward'] = 30
+
+def test_items_without_ids_are_skipped():
+    cache = CatalogCache()
+    assert cache.upgrades([{'title': 'broken'}]) == {}
+    assert cache.tasks([{'id': '', 'title': 'broken'}]) == {}
+
+def test_upgrade_cooldowns_are_computed_once_per_config():
+    cache = CatalogCache()
+    shared_config = {'upgradeDelay': {'1': '60', '2': '120'}, 'dayLimitationUpgradeDelay': 1800}
+    cooldowns = cache.upgrade_cooldowns(shared_config)
+    assert cooldowns == {1: 60, 2: 120, 'restoreEnergy': 1800}
+    assert cache.upgrade_cooldowns(dict(shared_config)) is cooldowns
+
+def test_cache_evicts_least_recently_used_entries(monkeypatch):
+    monkeypatch.setattr(CatalogCache, 'MAX_ENTRIES', 2)
+    cache = CatalogCache()
+    kept = cache.tasks([{'id': 'kept'}])['kept']._shared
+    dropped = cache.tasks([{'id': 'dropped'}])['dropped']._shared
+    cache.tasks([{'id': 'kept'}])
+    cache.tasks([{'id': 'new'}])
+    assert len(cache._entries) == 2
+    assert cache.tasks([{'id': 'kept'}])['kept']._shared is kept
+    assert cache.tasks([{'id': 'dropped'}])['dropped']._shared is not dropped
+
+def test_catalog_keys_are_stripped_from_responses():
+    assert without_catalog({'upgrades': [], 'tasks': [], 'sharedConfig': {}, 'user': {}}) == {'user': {}}
@@ -0,0 +1,63 @@
+import asyncio
+
+import aiohttp
+
+from bot.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, is_outage
+
+def open_breaker(**kwargs) -> CircuitBreaker:
+    breaker = CircuitBreaker('api.test', failure_threshold=3, resume_spread=0, **kwargs)
+    for _ in range(3):
+        breaker.record(outage=True)
+    return breaker
+
+def test_outages_are_server_errors_and_timeouts():
+    assert is_outage(status=503) and not is_outage(status=429)
+    assert is_outage(error=asyncio.TimeoutError())
+    assert not is_outage(error=aiohttp.ClientConnectorError(None, OSError('refused')))
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker('api.test', failure_threshold=3)
+    breaker.record(outage=True)
+    breaker.record(outage=True)
+    breaker.record(outage=False)
+    breaker.record(outage=True)
+    assert breaker.state == CLOSED and breaker.try_acquire() is False
+    assert open_breaker().state == OPEN
+
+def test_open_breaker_rejects_until_cooldown_then_admits_limited_probes():
+    breaker = open_breaker(cooldown=60, half_open_probes=2)
+    assert breaker.try_acquire() is None
+    assert 59 < breaker.retry_in() <= 60
+
+    breaker._open_until = 0
+    assert breaker.try_acquire() is True
+    assert breaker.state == HALF_OPEN
+    assert breaker.try_acquire() is True
+    assert breaker.try_acquire() is None
+
+    breaker.record(outage=False, probe=True)
+    breaker.record(outage=False, probe=True)
+    assert breaker.state == CLOSED
+
+def test_failed_probe_reopens_with_a_longer_cooldown():
+    breaker = open_breaker(cooldown=10, max_cooldown=15)
+    breaker._open_until = 0
+    assert breaker.try_acquire() is True
+    breaker.record(outage=True, probe=True)
+    assert breaker.state == OPEN and breaker._cooldown == 15
+    assert breaker._probes == 0
+
+def test_parked_requests_resume_when_the_circuit_closes():
+    async def scenario():
+        breaker = open_breaker(cooldown=0.05, half_open_probes=1)
+        parked = [asyncio.create_task(breaker.acquire()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert not any(task.done() for task in parked)
+        done, pending = await asyncio.wait(parked, timeout=1, return_when=asyncio.FIRST_COMPLETED)
+        probe, = done
+        assert probe.result() is True and len(pending) == 2
+        breaker.record(outage=False, probe=True)
+        return await asyncio.wait_for(asyncio.gather(*pending), 1), breaker.state
+
+    resumed, state = asyncio.run(scenario())
+    assert resumed == [False, False] and state == CLOSED
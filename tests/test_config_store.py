@@ -0,0 +1,59 @@
+import json
+
+from bot.utils.config_store import CachedSessionConfigStore, SessionConfigStore
+
+def test_put_and_get_round_trip(tmp_path):
+    store = SessionConfigStore(str(tmp_path / 'accounts.db'))
+    store.put('alpha', {'api': {'api_id': 1}, 'proxy': None})
+    assert store.get('alpha') == {'api': {'api_id': 1}, 'proxy': None}
+    assert store.get('missing') == {}
+
+def test_put_many_writes_rows_and_meta_in_one_transaction(tmp_path):
+    store = SessionConfigStore(str(tmp_path / 'accounts.db'))
+    store.put('alpha', {'proxy': 'old'})
+    store.put_many({'alpha': {'proxy': 'new'}, 'beta': {}}, meta={'schema_version': '2'})
+    assert store.get_all() == {'alpha': {'proxy': 'new'}, 'beta': {}}
+    assert store.get_meta('schema_version') == '2'
+
+def test_writes_are_visible_to_other_connections(tmp_path):
+    db_path = str(tmp_path / 'accounts.db')
+    writer, reader = SessionConfigStore(db_path), SessionConfigStore(db_path)
+    writer.put('alpha', {'user_agent': 'ua'})
+    writer.delete('alpha')
+    writer.put('beta', {'user_agent': 'ua'})
+    assert reader.get_all() == {'beta': {'user_agent': 'ua'}}
+
+def test_json_is_imported_once_and_exported_back(tmp_path):
+    json_path = tmp_path / 'accounts_config.json'
+    json_path.write_text(json.dumps({'alpha': {'proxy': None}, 'beta': {'proxy': 'http://1.1.1.1:80'}}))
+    store = SessionConfigStore(str(tmp_path / 'accounts_config.db'))
+    assert store.import_json(str(json_path), once=True) == 2
+    store.put('alpha', {'proxy': 'http://2.2.2.2:80'})
+    assert store.import_json(str(json_path), once=True) is None
+    assert store.get('alpha') == {'proxy': 'http://2.2.2.2:80'}
+
+    assert store.export_json(str(json_path)) == 2
+    assert json.loads(json_path.read_text())['alpha'] == {'proxy': 'http://2.2.2.2:80'}
+
+def test_cache_serves_repeated_reads_without_reloading(tmp_path):
+    store = CachedSessionConfigStore(str(tmp_path / 'accounts.db'))
+    store.put('alpha', {'proxy': None})
+    misses = store._misses.value
+    for _ in range(5):
+        assert store.get('alpha') == {'proxy': None}
+    assert store._misses.value == misses + 1
+
+def test_cache_reloads_after_another_process_writes(tmp_path):
+    db_path = str(tmp_path / 'accounts.db')
+    cached, other = CachedSessionConfigStore(db_path), SessionConfigStore(db_path)
+    cached.put('alpha', {'proxy': None})
+    assert cached.get_all() == {'alpha': {'proxy': None}}
+    other.put('alpha', {'proxy': 'http://1.1.1.1:80'})
+    assert cached.get('alpha') == {'proxy': 'http://1.1.1.1:80'}
+
+def test_cached_reads_return_copies(tmp_path):
+    store = CachedSessionConfigStore(str(tmp_path / 'accounts.db'))
+    store.put('alpha', {'api': {'api_id': 1}})
+    store.get('alpha')['api']['api_id'] = 2
+    store.get_all()['alpha']['api']['api_id'] = 3
+    assert store.get('alpha') == {'api': {'api_id': 1}}
@@ -0,0 +1,226 @@
+import asyncio
+from time import time
+from types import SimpleNamespace
+
+import pytest
+
+from bot.core import engine as engine_module
+from bot.core.engine import Phase, SessionEngine, SessionMachine
+from bot.exceptions import InvalidSession, RequestDeferred, TelegramDeferred
+from bot.utils.retry import Backoff
+
+class FakeBot:
+    def __init__(self, session_name: str, task_steps: int = 0, task_delay: float = 0, active_delay: float = 0.05,
+                 auth_errors: list = ()):
+        self.session_name = session_name
+        self.state = SimpleNamespace(energy=0, max_energy=0)
+        self._error_backoff = Backoff(base=0.01, cap=0.01)
+        self._game_data = None
+        self._onboarding_completed = True
+        self._task_steps = task_steps
+        self._task_delay = task_delay
+        self._active_delay = active_delay
+        self._auth_errors = list(auth_errors)
+        self.active_steps: list = []
+        self.auth_attempts: list = []
+        self._deferred_attempts: dict = {}
+        self.closed = False
+
+    async def initialize_session(self) -> bool:
+        return True
+
+    def _open_http_client(self) -> None:
+        pass
+
+    async def _ensure_proxy(self):
+        return None
+
+    async def auth_start(self, priority: int = 1) -> bool:
+        self.auth_attempts.append(time())
+        if self._auth_errors:
+            raise self._auth_errors.pop(0)
+        self._game_data = {'app': {'onboarding': 2}}
+        return True
+
+    async def _start_game(self):
+        return None
+
+    def _begin_active_phase(self) -> None:
+        pass
+
+    async def _active_step(self):
+        self.active_steps.append(time())
+        return self._active_delay if self._task_steps == 0 else None
+
+    def _end_active_phase(self) -> None:
+        pass
+
+    def _begin_task_phase(self) -> None:
+        self._remaining_tasks = self._task_steps
+
+    async def _task_step(self):
+        if not self._remaining_tasks:
+            return None
+        self._remaining_tasks -= 1
+        return self._task_delay
+
+    def _end_task_phase(self) -> None:
+        pass
+
+    def _begin_ticket_phase(self) -> None:
+        pass
+
+    async def _ticket_step(self):
+        return None
+
+    def _end_ticket_phase(self) -> None:
+        pass
+
+    async def save_snapshot(self, force: bool = False) -> None:
+        pass
+
+    def _begin_sleep_phase(self):
+        return time() + 60
+
+    async def close(self) -> None:
+        self.closed = True
+
+@pytest.fixture(autouse=True)
+def no_start_delay(monkeypatch):
+    monkeypatch.setattr(engine_module.startup_queue, 'reserve', lambda session_name: 0)
+
+async def run_engine(engine: SessionEngine, duration: float) -> None:
+    runner = asyncio.create_task(engine.run())
+    await asyncio.sleep(duration)
+    runner.cancel()
+    await asyncio.gather(runner, return_exceptions=True)
+
+def test_long_task_phases_do_not_starve_the_worker_pool():
+    async def scenario():
+        engine = SessionEngine(workers=2)
+        busy = [FakeBot(f'busy{index}', task_steps=5, task_delay=0.3) for index in range(6)]
+        fast = FakeBot('fast', active_delay=0.05)
+        for bot in busy + [fast]:
+            engine.add(bot)
+        await run_engine(engine, 1.0)
+        return busy, fast
+
+    busy, fast = asyncio.run(scenario())
+    gaps = [later - earlier for earlier, later in zip(fast.active_steps, fast.active_steps[1:])]
+    assert len(fast.active_steps) >= 10
+    assert max(gaps) < 0.25
+    assert all(bot.closed for bot in busy + [fast])
+
+def test_deferral_reschedules_without_holding_a_worker():
+    async def scenario():
+        engine = SessionEngine(workers=1)
+        deferred = FakeBot('deferred', active_delay=0.05, auth_errors=[TelegramDeferred(0.4)])
+        other = FakeBot('other', active_delay=0.05)
+        engine.add(deferred)
+        engine.add(other)
+        await run_engine(engine, 0.7)
+        return deferred, other
+
+    deferred, other = asyncio.run(scenario())
+    assert len(deferred.auth_attempts) == 2
+    assert deferred.auth_attempts[1] - deferred.auth_attempts[0] >= 0.35
+    assert other.active_steps and other.active_steps[0] < deferred.auth_attempts[1]
+
+def test_request_deferral_keeps_the_phase():
+    async def scenario():
+        engine = SessionEngine(workers=1)
+        bot = FakeBot('bot', auth_errors=[RequestDeferred(0.1)])
+        engine.add(bot)
+        runner = asyncio.create_task(engine.run())
+        await asyncio.sleep(0.05)
+        phase, wakes_in = engine.snapshot()[0]['phase'], engine.snapshot()[0]['wakes_in']
+        await asyncio.sleep(0.15)
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+        return phase, wakes_in, bot
+
+    phase, wakes_in, bot = asyncio.run(scenario())
+    assert phase == Phase.AUTH.value
+    assert 0 < wakes_in <= 0.1
+    assert len(bot.auth_attempts) == 2
+
+def test_invalid_session_is_stopped_and_reported():
+    reported = []
+
+    async def on_invalid(session_name: str, error: BaseException) -> None:
+        reported.append(session_name)
+
+    async def scenario():
+        engine = SessionEngine(workers=1, on_invalid=on_invalid)
+        bot = FakeBot('broken', auth_errors=[InvalidSession('banned')])
+        engine.add(bot)
+        await run_engine(engine, 0.1)
+        return engine, bot
+
+    engine, bot = asyncio.run(scenario())
+    assert reported == ['broken']
+    assert bot.closed
+    assert 'broken' not in engine
+
+def test_remove_stops_a_waiting_session():
+    async def scenario():
+        engine = SessionEngine(workers=1)
+        bot = FakeBot('idle', active_delay=10)
+        engine.add(bot)
+        runner = asyncio.create_task(engine.run())
+        await asyncio.sleep(0.05)
+        wake_at = engine.next_wake('idle')
+        await engine.remove('idle')
+        removed = 'idle' not in engine and bot.closed
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+        return wake_at, removed, len(bot.active_steps)
+
+    wake_at, removed, steps = asyncio.run(scenario())
+    assert wake_at is not None and wake_at > time()
+    assert removed
+    assert steps == 1
+
+def test_session_cycles_through_every_phase():
+    class CyclingBot(FakeBot):
+        def _begin_sleep_phase(self):
+            self.sleep_steps = 2
+            return time()
+
+        async def _sleep_step(self):
+            self.sleep_steps -= 1
+            return time() if self.sleep_steps else None
+
+        def _end_sleep_phase(self) -> None:
+            pass
+
+        async def reauthenticate(self, reason: str) -> bool:
+            self.auth_attempts.append(reason)
+            return True
+
+    async def scenario():
+        bot = CyclingBot('cycling', task_steps=2)
+        machine = SessionMachine(bot)
+        phases = []
+        while bot.auth_attempts[-1:] != ['sleep_phase']:
+            phases.append(machine.phase)
+            await machine.step()
+        return phases, machine.phase
+
+    phases, final = asyncio.run(scenario())
+    assert phases == [Phase.START, Phase.AUTH, Phase.ACTIVE, Phase.TASKS, Phase.TASKS, Phase.TASKS,
+                      Phase.TICKETS, Phase.SLEEP, Phase.SLEEP, Phase.SLEEP]
+    assert final is Phase.ACTIVE
+
+def test_phase_change_drops_deferred_request_attempts():
+    async def scenario():
+        bot = FakeBot('bot', auth_errors=[RequestDeferred(0)])
+        machine = SessionMachine(bot)
+        await machine.step()
+        await machine.step()
+        bot._deferred_attempts['https://api.test/auth/start'] = 2
+        await machine.step()
+        return machine.phase, bot._deferred_attempts
+
+    phase, attempts = asyncio.run(scenario())
+    assert phase is Phase.ACTIVE and attempts == {}
@@ -0,0 +1,39 @@
+import asyncio
+
+from bot.utils.first_run import FirstRunRegistry
+
+def test_added_sessions_are_recurring_and_persisted(tmp_path):
+    file_path = tmp_path / 'first_run.txt'
+    registry = FirstRunRegistry(str(file_path))
+    assert registry.is_first_run('Alpha')
+
+    async def scenario():
+        await asyncio.gather(*(registry.add(name) for name in ('Alpha', 'beta', 'alpha')))
+
+    asyncio.run(scenario())
+    assert not registry.is_first_run('ALPHA')
+    assert sorted(file_path.read_text().split()) == ['alpha', 'beta']
+    assert not FirstRunRegistry(str(file_path)).is_first_run('beta')
+
+def test_registry_reads_only_appended_complete_lines(tmp_path):
+    file_path = tmp_path / 'first_run.txt'
+    file_path.write_text('alpha\n')
+    registry = FirstRunRegistry(str(file_path))
+    assert not registry.is_first_run('alpha')
+
+    with open(file_path, 'a') as file:
+        file.write('beta\ngam')
+    assert not registry.is_first_run('beta')
+    assert registry.is_first_run('gam')
+
+    with open(file_path, 'a') as file:
+        file.write('ma\n')
+    assert not registry.is_first_run('gamma')
+
+def test_truncated_file_resets_the_registry(tmp_path):
+    file_path = tmp_path / 'first_run.txt'
+    file_path.write_text('alpha\nbeta\n')
+    registry = FirstRunRegistry(str(file_path))
+    assert not registry.is_first_run('beta')
+    file_path.write_text('')
+    assert registry.is_first_run('beta')
@@ -0,0 +1,22 @@
+import pytest
+
+from bot.core.game_state import GameState
+
+def test_apply_maps_api_fields_and_ignores_the_rest():
+    state = GameState()
+    state.apply({'currentEnergy': 120, 'maxEnergy': 1500, 'currentCoins': 99, 'unknown': 1})
+    assert (state.energy, state.max_energy, state.coins) == (120, 1500, 99)
+    assert not hasattr(state, 'unknown')
+
+def test_dict_round_trip_restores_every_field():
+    state = GameState()
+    state.apply({'currentTickets': 4, 'energyPerSec': 5.5})
+    state.restores_used = 2
+    state.last_restore_date = '2024-01-01'
+    restored = GameState()
+    restored.update_from_dict(state.to_dict())
+    assert restored.to_dict() == state.to_dict()
+
+def test_unknown_attributes_are_rejected():
+    with pytest.raises(AttributeError):
+        GameState().energy_cap = 10
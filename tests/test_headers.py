@@ -0,0 +1,28 @@
+import pytest
+
+from bot.core.headers import SessionHeaders
+
+BASE = {'Accept': 'application/json', 'User-Agent': 'default'}
+
+def test_templates_are_built_once_per_stage():
+    headers = SessionHeaders(BASE, 'custom-agent')
+    first = headers.get('0', referer='https://example.com/')
+    assert headers.get('0', referer='https://example.com/') is first
+    assert first['user-agent'] == 'custom-agent' and first['Onboarding'] == '0'
+    assert first['Referer'] == 'https://example.com/'
+    assert 'Referer' not in headers.get('1')
+
+def test_cookie_updates_reach_cached_templates():
+    headers = SessionHeaders(BASE, None)
+    with_cookies, without_cookies = headers.get('0'), headers.get('0', cookies=False)
+    headers.set_cookies('session=abc')
+    assert with_cookies['Cookie'] == 'session=abc'
+    assert 'Cookie' not in without_cookies
+    assert headers.get('1')['Cookie'] == 'session=abc'
+    headers.set_cookies(None)
+    assert 'Cookie' not in with_cookies
+
+def test_templates_are_read_only():
+    headers = SessionHeaders(BASE, None).get('0')
+    with pytest.raises(TypeError):
+        headers['Onboarding'] = '1'
@@ -0,0 +1,72 @@
+import asyncio
+from time import time
+from types import SimpleNamespace
+
+from bot.config import settings
+from bot.utils import retry
+from tests.helpers import FakeResponse
+
+def webview(bot, auth_date=None):
+    calls = []
+
+    async def get_app_webview_url(app_name, path, ref_id, priority, defer=False):
+        calls.append(priority)
+        issued = auth_date or int(time())
+        return f"https://app.test/#tgWebAppData=query_id%3D{len(calls)}%26auth_date%3D{issued}&tgWebAppVersion=7"
+
+    bot.tg_client.get_app_webview_url = get_app_webview_url
+    bot._http_client.cookie_jar = SimpleNamespace(filter_cookies=lambda url: {})
+    return calls
+
+def test_init_data_is_reused_until_it_expires(make_bot):
+    bot = make_bot()
+    calls = webview(bot)
+    first = asyncio.run(bot.get_tg_web_data())
+    assert asyncio.run(bot.get_tg_web_data()) == first
+    assert len(calls) == 1
+
+    bot._init_data_expires = time() - 1
+    assert asyncio.run(bot.get_tg_web_data()) != first
+    assert len(calls) == 2
+
+def test_expiry_follows_the_auth_date(make_bot):
+    bot = make_bot()
+    webview(bot, auth_date=1_000)
+    asyncio.run(bot.get_tg_web_data())
+    assert bot._init_data_expires == 1_000 + settings.INIT_DATA_TTL
+    assert not bot._init_data_valid()
+
+def test_rejected_cached_init_data_is_refreshed_once(make_bot):
+    bot = make_bot([FakeResponse(200, {'game': {}}), FakeResponse(401), FakeResponse(200, {'game': {}})])
+    calls = webview(bot)
+    assert asyncio.run(bot._authenticate(priority=1))
+    cached = bot._init_data
+
+    assert asyncio.run(bot._authenticate(priority=1))
+    assert len(calls) == 2 and bot._init_data != cached
+    sent = [kwargs['json']['startData'] for _, kwargs in bot._http_client.requests]
+    assert sent == [cached, cached, bot._init_data]
+
+def test_rejected_fresh_init_data_is_dropped(make_bot):
+    bot = make_bot([FakeResponse(401)])
+    webview(bot)
+    assert not asyncio.run(bot._authenticate(priority=1))
+    assert bot._init_data is None
+
+def test_cached_init_data_rejected_as_a_client_error_is_refreshed(make_bot):
+    bot = make_bot([FakeResponse(200, {'game': {}}), FakeResponse(400), FakeResponse(200, {'game': {}})])
+    calls = webview(bot)
+    asyncio.run(bot._authenticate(priority=1))
+    cached = bot._init_data
+    assert asyncio.run(bot._authenticate(priority=1))
+    assert len(calls) == 2 and bot._init_data != cached
+
+def test_outage_keeps_the_cached_init_data(make_bot, monkeypatch):
+    monkeypatch.setattr(retry.POLICIES['/auth/start'], 'base_delay', 0)
+    bot = make_bot([FakeResponse(200, {'game': {}})])
+    calls = webview(bot)
+    asyncio.run(bot._authenticate(priority=1))
+    cached = bot._init_data
+    bot._http_client.responses = [FakeResponse(502) for _ in range(3)]
+    assert not asyncio.run(bot._authenticate(priority=1))
+    assert len(calls) == 1 and bot._init_data == cached
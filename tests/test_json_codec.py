@@ -0,0 +1,29 @@
+import json
+from datetime import date
+
+import pytest
+
+from bot.utils import json_codec
+
+PAYLOAD = {'b': [1, 2.5, None, True], 'a': {'nested': 'тест'}, 'day': date(2024, 1, 2)}
+
+@pytest.mark.parametrize('name', sorted(json_codec.CODECS))
+def test_codecs_agree_with_stdlib(name):
+    codec = json_codec.get_codec(name)
+    encoded = codec.encode(PAYLOAD)
+    assert codec.loads(encoded) == json.loads(json_codec.StdlibCodec().encode(PAYLOAD))
+    assert codec.loads(encoded.decode()) == codec.loads(encoded)
+
+@pytest.mark.parametrize('name', sorted(json_codec.CODECS))
+def test_sorted_and_indented_output(name):
+    codec = json_codec.get_codec(name)
+    assert list(json.loads(codec.encode(PAYLOAD, sort_keys=True))) == ['a', 'b', 'day']
+    assert b'\n' in codec.encode(PAYLOAD, indent=True)
+
+def test_auto_prefers_the_fastest_installed_codec():
+    expected = next(name for name in json_codec.PREFERENCE if name in json_codec.CODECS)
+    assert json_codec.get_codec('auto').name == expected
+
+def test_unknown_codec_is_rejected():
+    with pytest.raises(ValueError):
+        json_codec.get_codec('simplejson')
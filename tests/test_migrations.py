@@ -0,0 +1,35 @@
+import pytest
+
+from bot.utils import migrations
+
+def test_pending_migrations_run_once_and_record_the_version():
+    config = {'alpha': {'api_id': 2040, 'api_hash': 'hash', 'proxy': None}, 'beta': {'api': {'api_id': 6}}}
+    version, changed, meta = migrations.apply_migrations(config, 0)
+    assert version == migrations.latest_version()
+    assert changed == {'alpha'}
+    assert config['alpha'] == {'proxy': None, 'api': {'api_id': 2040, 'api_hash': 'hash'}}
+    assert meta[migrations.SCHEMA_VERSION_KEY] == str(version)
+    assert f"migration_{version}" in meta
+
+    assert migrations.apply_migrations(config, version) == (version, set(), {})
+
+def test_migrations_apply_in_version_order(monkeypatch):
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [])
+    applied = []
+
+    @migrations.migration(3, 'third')
+    def third(config):
+        applied.append(3)
+        return []
+
+    @migrations.migration(2, 'second')
+    def second(config):
+        applied.append(2)
+        return ['alpha']
+
+    version, changed, meta = migrations.apply_migrations({}, 1)
+    assert (version, changed, applied) == (3, {'alpha'}, [2, 3])
+    assert migrations.apply_migrations({}, 2)[0] == 3 and applied == [2, 3, 3]
+
+    with pytest.raises(ValueError):
+        migrations.migration(2, 'duplicate')(lambda config: [])
@@ -0,0 +1,72 @@
+import asyncio
+from time import monotonic
+
+from bot.utils.rate_limiter import RateShaper, TokenBucket
+
+def test_burst_is_immediate_and_the_rest_is_paced():
+    async def scenario():
+        bucket = TokenBucket('test', rate=50, burst=5)
+        started = monotonic()
+        times = []
+        for _ in range(10):
+            await bucket.acquire()
+            times.append(monotonic() - started)
+        return times
+
+    times = asyncio.run(scenario())
+    assert times[4] < 0.02
+    assert 0.08 <= times[-1] < 0.3
+
+def test_waiters_are_served_in_arrival_order():
+    async def scenario():
+        bucket = TokenBucket('test', rate=100, burst=1)
+        order = []
+
+        async def request(index):
+            await bucket.acquire()
+            order.append(index)
+
+        await asyncio.gather(*(request(index) for index in range(6)))
+        return order
+
+    assert asyncio.run(scenario()) == list(range(6))
+
+def test_cancelled_waiter_gives_up_its_place():
+    async def scenario():
+        bucket = TokenBucket('test', rate=20, burst=1)
+        await bucket.acquire()
+        cancelled = asyncio.create_task(bucket.acquire())
+        queued = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        started = monotonic()
+        await asyncio.wait_for(queued, 1)
+        return monotonic() - started, len(bucket._waiters)
+
+    waited, waiters = asyncio.run(scenario())
+    assert waited < 0.09 and waiters == 0
+
+def test_per_proxy_buckets_are_independent():
+    async def scenario():
+        shaper = RateShaper(per_proxy_rate=1)
+        started = monotonic()
+        await asyncio.gather(shaper.acquire('http://10.0.0.1:80'), shaper.acquire('http://10.0.0.2:80'),
+                             shaper.acquire(None))
+        return monotonic() - started, len(shaper._proxies)
+
+    elapsed, buckets = asyncio.run(scenario())
+    assert elapsed < 0.05 and buckets == 3
+
+def test_disabled_shaper_does_not_create_buckets():
+    shaper = RateShaper()
+    asyncio.run(shaper.acquire('http://10.0.0.1:80'))
+    assert shaper._global is None and not shaper._proxies
+
+def test_try_acquire_reports_the_wait_and_keeps_the_proxy_token():
+    shaper = RateShaper(rate=10, per_proxy_rate=10)
+    shaper._global._tokens = 0
+    wait = shaper.try_acquire('http://10.0.0.1:80')
+    bucket, = shaper._proxies.values()
+    assert 0 < wait <= 0.1 and bucket._tokens == bucket.burst
+    shaper._global._tokens = 1
+    assert shaper.try_acquire('http://10.0.0.1:80') == 0
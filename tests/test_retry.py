@@ -0,0 +1,47 @@
+import asyncio
+
+import aiohttp
+
+from bot.utils import retry
+from bot.utils.retry import Backoff, RetryBudget, RetryPolicy
+
+def test_non_idempotent_calls_retry_only_unprocessed_failures():
+    buy = RetryPolicy('buy', idempotent=False)
+    assert buy.should_retry(status=503) and buy.should_retry(status=429)
+    assert not buy.should_retry(status=502)
+    assert not buy.should_retry(error=asyncio.TimeoutError())
+    assert buy.should_retry(error=aiohttp.ClientConnectorError(None, OSError('refused')))
+
+    sync = RetryPolicy('sync')
+    assert sync.should_retry(status=502) and sync.should_retry(error=asyncio.TimeoutError())
+    assert not sync.should_retry(status=404)
+    assert not sync.should_retry(error=ValueError())
+
+def test_delay_is_capped_and_honours_retry_after():
+    policy = RetryPolicy('sync', base_delay=1, max_delay=4)
+    assert all(0 <= policy.delay(attempt) <= 4 for attempt in range(10))
+    assert policy.delay(0, retry_after=30) == 30
+    assert policy.delay(0, retry_after=3600) == retry.MAX_RETRY_AFTER
+
+def test_budget_limits_retries_until_deposits_refill_it():
+    budget = RetryBudget(ratio=0.5, min_per_sec=0, window=0)
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+def test_backoff_grows_within_bounds_and_resets():
+    backoff = Backoff(base=2, cap=10)
+    delays = [backoff.next() for _ in range(6)]
+    assert all(2 <= delay <= 10 for delay in delays)
+    assert backoff.failures == 6
+    backoff.reset()
+    assert backoff.failures == 0 and backoff.next() <= 4
+
+def test_policies_are_matched_by_path():
+    assert retry.policy_for('https://api.example.com/api/game/sync?x=1').name == 'sync'
+    assert retry.policy_for('https://api.example.com/api/upgrades/buy').name == 'upgrade_buy'
+    assert retry.policy_for('https://api.example.com/api/other') is retry.DEFAULT_POLICY
+    assert retry.parse_retry_after('2.5') == 2.5 and retry.parse_retry_after('soon') is None
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+from bot.utils.session_watcher import SessionWatcher
+
+def make_session(directory, name, age: float = 60):
+    path = os.path.join(directory, name)
+    open(f"{path}.session", 'w').close()
+    modified = time.time() - age
+    os.utime(f"{path}.session", (modified, modified))
+    return path
+
+def scanner(directory):
+    return lambda: sorted(os.path.join(directory, name[:-len('.session')])
+                          for name in os.listdir(directory) if name.endswith('.session'))
+
+def test_fresh_and_blacklisted_sessions_are_not_picked_up(tmp_path):
+    directory = str(tmp_path)
+    settled = make_session(directory, 'settled')
+    make_session(directory, 'fresh', age=0)
+    make_session(directory, 'blocked')
+
+    async def added(session):
+        return True
+
+    watcher = SessionWatcher(directory, scan=scanner(directory), on_added=added, settle_time=5)
+    watcher._blacklisted = {'blocked'}
+    watcher._env_file = None
+    watcher._env_mtime = None
+    assert watcher._current_sessions() == {settled}
+    assert watcher._changed.is_set()
+
+def test_only_session_file_events_trigger_a_rescan(tmp_path):
+    async def added(session):
+        return True
+
+    watcher = SessionWatcher(str(tmp_path), scan=list, on_added=added)
+    watched = []
+    events = []
+    watcher._inotify = SimpleNamespace(read_names=lambda: events.pop(0), watch=watched.append)
+
+    events.append(['alpha.session-journal', 'alpha.json'])
+    watcher._on_inotify_event()
+    assert not watcher._changed.is_set() and not watched
+
+    events.append(['telethon'])
+    watcher._on_inotify_event()
+    assert watched == watcher.directories and not watcher._changed.is_set()
+
+    events.append(['alpha.session'])
+    watcher._on_inotify_event()
+    assert watcher._changed.is_set()
+
+def test_failed_adds_are_retried_and_removals_reported(tmp_path):
+    directory = str(tmp_path)
+    alpha = make_session(directory, 'alpha')
+    beta = make_session(directory, 'beta')
+    attempts = []
+    removed = []
+
+    async def added(session):
+        attempts.append(session)
+        return attempts.count(session) > 1
+
+    async def on_removed(session):
+        removed.append(session)
+
+    async def scenario():
+        watcher = SessionWatcher(directory, scan=scanner(directory), on_added=added, on_removed=on_removed,
+                                 interval=0.01, settle_time=0, retry_delay=0.01, max_retry_delay=0.01)
+        task = asyncio.create_task(watcher.run(active=[beta]))
+        while attempts.count(alpha) < 2:
+            await asyncio.sleep(0.01)
+        os.remove(f"{beta}.session")
+        while not removed:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return watcher._active
+
+    active = asyncio.run(scenario())
+    assert attempts == [alpha, alpha]
+    assert removed == [beta]
+    assert active == {alpha}
+
+def test_failed_session_waits_for_backoff_or_a_file_change(tmp_path):
+    directory = str(tmp_path)
+    alpha = make_session(directory, 'alpha')
+    attempts = []
+
+    async def added(session):
+        attempts.append(session)
+        return len(attempts) > 1
+
+    async def scenario():
+        watcher = SessionWatcher(directory, scan=scanner(directory), on_added=added, interval=0.01, settle_time=0)
+        task = asyncio.create_task(watcher.run(active=[]))
+        await asyncio.sleep(0.1)
+        retried_early = len(attempts)
+        modified = time.time() - 30
+        os.utime(f"{alpha}.session", (modified, modified))
+        while len(attempts) < 2:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return retried_early, watcher
+
+    retried_early, watcher = asyncio.run(scenario())
+    assert retried_early == 1
+    assert watcher._active == {alpha} and not watcher._failed
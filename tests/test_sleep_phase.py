@@ -0,0 +1,70 @@
+import asyncio
+from time import time
+
+import pytest
+
+def test_wake_time_follows_the_energy_deficit(make_bot):
+    bot = make_bot()
+    now = time()
+    bot.state.energy, bot.state.energy_per_sec, bot.state.last_sync = 100, 5, int(now)
+    assert bot._predict_wake_time(600) == pytest.approx(int(now) + 100, abs=1)
+
+    bot.state.last_sync = int(now) * 1000
+    bot.state.energy_per_sec = 0
+    assert bot._predict_wake_time(400) == pytest.approx(int(now) + 100, abs=1)
+
+def test_sleep_is_skipped_when_energy_is_high(make_bot):
+    bot = make_bot()
+    bot.state.energy, bot.state.max_energy = 450, 500
+    assert bot._begin_sleep_phase() is None
+
+def test_sleep_is_clamped_between_the_minimum_and_maximum(make_bot):
+    bot = make_bot()
+    bot.state.max_energy, bot.state.energy_per_sec, bot.state.last_sync = 1000, 1000, int(time())
+    bot.state.energy = 790
+    wake_at = bot._begin_sleep_phase()
+    assert bot._sleep_started + bot.MIN_SLEEP_TIME <= wake_at <= bot._sleep_started + bot.MIN_SLEEP_TIME + 3
+
+    bot.state.energy, bot.state.energy_per_sec = 0, 0.001
+    wake_at = bot._begin_sleep_phase()
+    assert bot._sleep_deadline <= wake_at <= bot._sleep_deadline + 3
+
+def sync_returning(bot, results):
+    async def sync_game(taps=0):
+        result = results.pop(0)
+        if result:
+            bot.state.energy = result
+        return result
+
+    bot.sync_game = sync_game
+
+def test_failed_sync_schedules_a_retry(make_bot):
+    bot = make_bot()
+    bot.state.energy, bot.state.max_energy = 0, 1000
+    bot._begin_sleep_phase()
+    sync_returning(bot, [None, 900])
+    retry_at = asyncio.run(bot._sleep_step())
+    assert retry_at is not None and retry_at > time()
+    assert asyncio.run(bot._sleep_step()) is None
+
+def test_sleep_continues_until_energy_recovers(make_bot):
+    bot = make_bot()
+    bot.state.energy, bot.state.max_energy, bot.state.energy_per_sec = 0, 1000, 10
+    bot._begin_sleep_phase()
+    sync_returning(bot, [400])
+    bot.state.last_sync = int(time())
+    wake_at = asyncio.run(bot._sleep_step())
+    assert wake_at == pytest.approx(time() + 40, abs=4)
+
+def test_failing_syncs_end_the_sleep_at_the_deadline(make_bot):
+    bot = make_bot()
+    bot.state.energy, bot.state.max_energy = 0, 1000
+    bot._begin_sleep_phase()
+    bot._error_backoff.failures = 20
+    bot._sleep_deadline = time() + 5
+    sync_returning(bot, [None, None])
+    retry_at = asyncio.run(bot._sleep_step())
+    assert retry_at <= bot._sleep_deadline
+
+    bot._sleep_deadline = time() - 1
+    assert asyncio.run(bot._sleep_step()) is None
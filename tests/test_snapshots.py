@@ -0,0 +1,42 @@
+import asyncio
+from types import SimpleNamespace
+
+from bot.core.tapper import BaseBot
+from bot.utils import config_utils, CONFIG_PATH
+
+def test_saved_snapshot_restores_a_new_bot(make_bot):
+    bot = make_bot()
+    bot.state.coins = 1234
+    bot.state.restores_used = 3
+    bot._onboarding_completed = True
+    bot._cookies = 'session=abc'
+    asyncio.run(bot.save_snapshot(force=True))
+
+    restored = BaseBot(SimpleNamespace(session_name=bot.session_name, set_proxy=lambda proxy: None))
+    assert restored.state.coins == 1234 and restored.state.restores_used == 3
+    assert restored._onboarding_completed and restored._cookies == 'session=abc'
+
+def test_snapshot_writes_do_not_invalidate_the_config_cache(make_bot):
+    bot = make_bot()
+    store = config_utils.get_config_store(CONFIG_PATH)
+    store.get_all()
+    misses = store._misses.value
+    for coins in range(5):
+        bot.state.coins = coins
+        asyncio.run(bot.save_snapshot(force=True))
+        store.get(bot.session_name)
+    assert store._misses.value == misses
+    assert config_utils.get_session_snapshot(bot.session_name, CONFIG_PATH)['state']['coins'] == 4
+
+def test_throttled_snapshot_skips_the_write(make_bot, monkeypatch):
+    bot = make_bot()
+    writes = []
+
+    async def save_session_snapshot(*args):
+        writes.append(args)
+
+    monkeypatch.setattr(config_utils, 'save_session_snapshot', save_session_snapshot)
+    asyncio.run(bot.save_snapshot())
+    asyncio.run(bot.save_snapshot())
+    asyncio.run(bot.save_snapshot(force=True))
+    assert len(writes) == 2
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from bot.exceptions import AuthDeferred
+from bot.utils.startup_queue import StartupQueue
+
+def test_reservations_are_spaced_by_rate():
+    queue = StartupQueue(rate=2, max_auth=1)
+    queue.plan(3)
+    delays = [queue.reserve(f"session{index}") for index in range(3)]
+    assert delays[0] < 0.01
+    assert abs(delays[1] - 0.5) < 0.01 and abs(delays[2] - 1.0) < 0.01
+
+def test_auth_slot_only_gates_first_admission():
+    async def reauthenticate(queue):
+        async with queue.auth('first'):
+            return True
+
+    async def scenario():
+        queue = StartupQueue(rate=100, max_auth=1)
+        queue.plan(2)
+        queue.reserve('first')
+        queue.reserve('second')
+        queue.activated('first')
+        async with queue.auth('second'):
+            return await asyncio.wait_for(reauthenticate(queue), 1)
+
+    assert asyncio.run(scenario())
+
+def test_auth_slots_limit_concurrent_admissions():
+    async def scenario():
+        queue = StartupQueue(rate=100, max_auth=1)
+        queue.plan(2)
+        in_flight = []
+        peak = []
+
+        async def admit(session_name):
+            queue.reserve(session_name)
+            async with queue.auth(session_name):
+                in_flight.append(session_name)
+                peak.append(len(in_flight))
+                await asyncio.sleep(0.01)
+                in_flight.remove(session_name)
+            queue.activated(session_name)
+
+        await asyncio.gather(admit('first'), admit('second'))
+        return peak
+
+    assert asyncio.run(scenario()) == [1, 1]
+
+def test_fleet_completes_when_sessions_are_activated_or_discarded():
+    queue = StartupQueue(rate=100)
+    queue.plan(2)
+    queue.reserve('first')
+    queue.reserve('second')
+    queue.discard('second')
+    queue.activated('first')
+    assert queue._started_at is None
+
+def test_deferred_auth_does_not_wait_for_a_slot():
+    async def scenario():
+        queue = StartupQueue(rate=100, max_auth=1)
+        queue.plan(2)
+        queue.reserve('first')
+        queue.reserve('second')
+        async with queue.auth('first', defer=True):
+            with pytest.raises(AuthDeferred) as deferred:
+                async with queue.auth('second', defer=True):
+                    pass
+        async with queue.auth('second', defer=True):
+            pass
+        return deferred.value.delay
+
+    assert asyncio.run(scenario()) > 0
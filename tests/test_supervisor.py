@@ -0,0 +1,60 @@
+import asyncio
+from time import monotonic
+from types import SimpleNamespace
+
+from bot.core.supervisor import Supervisor, in_shard, shard_of
+
+async def _idle(shard):
+    pass
+
+def test_shards_partition_sessions():
+    names = [f"session{index}" for index in range(200)]
+    shards = 3
+    owners = [[index for index in range(shards) if in_shard(name, (index, shards))] for name in names]
+    assert all(len(owner) == 1 for owner in owners)
+    assert all(owner == [shard_of(name, shards)] for name, owner in zip(names, owners))
+    assert len({owner[0] for owner in owners}) == shards
+    assert in_shard('session0', None)
+
+def test_missing_worker_is_started_when_due(monkeypatch):
+    supervisor = Supervisor(_idle, processes=1)
+    started = []
+    monkeypatch.setattr(supervisor, '_start', started.append)
+    supervisor._check(0)
+    assert started == [0]
+
+def test_stopped_supervisor_does_not_restart_workers(monkeypatch):
+    supervisor = Supervisor(_idle, processes=2)
+    started = []
+    monkeypatch.setattr(supervisor, '_start', started.append)
+    asyncio.run(supervisor.stop())
+    for index in range(supervisor.processes):
+        supervisor._check(index)
+    assert started == []
+
+def exited(exitcode):
+    return SimpleNamespace(is_alive=lambda: False, exitcode=exitcode, close=lambda: None)
+
+def test_crashed_worker_is_restarted_after_backoff(monkeypatch):
+    supervisor = Supervisor(_idle, processes=1)
+    started = []
+    monkeypatch.setattr(supervisor, '_start', started.append)
+    supervisor._workers[0] = exited(1)
+    supervisor._check(0)
+    assert supervisor._workers[0] is None and not supervisor._finished[0]
+    assert 1 <= supervisor._restart_at[0] - monotonic() <= 4
+
+    supervisor._check(0)
+    assert started == []
+    supervisor._restart_at[0] = 0
+    supervisor._check(0)
+    assert started == [0]
+
+def test_cleanly_exited_worker_is_not_restarted(monkeypatch):
+    supervisor = Supervisor(_idle, processes=1)
+    started = []
+    monkeypatch.setattr(supervisor, '_start', started.append)
+    supervisor._workers[0] = exited(0)
+    supervisor._check(0)
+    supervisor._check(0)
+    assert supervisor._finished[0] and started == []
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from bot.core.api_result import Outcome
+from bot.exceptions import RequestDeferred
+from bot.utils import circuit_breaker
+from tests.helpers import FakeResponse
+
+SYNC_URL = "https://deferral.test/api/game/sync"
+
+def test_retry_is_deferred_and_resumed(make_bot):
+    bot = make_bot([FakeResponse(503), FakeResponse(200, {'currentEnergy': 10})])
+    bot._defer_waits = True
+
+    with pytest.raises(RequestDeferred) as deferred:
+        asyncio.run(bot.make_request('post', SYNC_URL))
+    assert deferred.value.delay >= 0
+    assert bot._deferred_attempts == {SYNC_URL: 1}
+
+    result = asyncio.run(bot.make_request('post', SYNC_URL))
+    assert result.outcome is Outcome.OK
+    assert result.data == {'currentEnergy': 10}
+    assert bot._deferred_attempts == {}
+
+def test_deferred_retries_respect_max_attempts(make_bot):
+    bot = make_bot([FakeResponse(503) for _ in range(4)])
+    bot._defer_waits = True
+
+    for _ in range(3):
+        with pytest.raises(RequestDeferred):
+            asyncio.run(bot.make_request('post', SYNC_URL))
+    result = asyncio.run(bot.make_request('post', SYNC_URL))
+    assert result.outcome is Outcome.TRANSIENT
+    assert len(bot._http_client.requests) == 4
+    assert bot._deferred_attempts == {}
+
+def test_open_circuit_defers_without_sending(make_bot):
+    url = "https://open-circuit.test/api/game/sync"
+    breaker = circuit_breaker.get_breaker(url)
+    for _ in range(breaker.failure_threshold):
+        breaker.record(True)
+    bot = make_bot([FakeResponse(200)])
+    bot._defer_waits = True
+
+    with pytest.raises(RequestDeferred) as deferred:
+        asyncio.run(bot.make_request('post', url))
+    assert deferred.value.delay >= breaker.base_cooldown - 1
+    assert bot._http_client.requests == []
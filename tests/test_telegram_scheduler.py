@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from bot.exceptions import InvalidSession, TelegramDeferred
+from bot.utils.telegram_scheduler import LOW, NORMAL, URGENT, TelegramScheduler
+
+def test_connections_are_bounded_and_granted_by_priority():
+    async def scenario():
+        scheduler = TelegramScheduler(max_connections=1)
+        order = []
+        holder = scheduler.connection('holder')
+        await holder.__aenter__()
+
+        async def connect(name, priority):
+            async with scheduler.connection(name, priority):
+                order.append(name)
+
+        tasks = [asyncio.create_task(connect(name, priority))
+                 for name, priority in (('low', LOW), ('normal', NORMAL), ('urgent', URGENT), ('normal2', NORMAL))]
+        await asyncio.sleep(0)
+        assert scheduler._active == 1 and not order
+        await holder.__aexit__(None, None, None)
+        await asyncio.gather(*tasks)
+        return order, scheduler._active
+
+    assert asyncio.run(scenario()) == (['urgent', 'normal', 'normal2', 'low'], 0)
+
+def test_flood_wait_defers_the_session_instead_of_sleeping():
+    async def scenario():
+        scheduler = TelegramScheduler(max_connections=1, max_flood_waits=3)
+        with pytest.raises(TelegramDeferred) as deferred:
+            async with scheduler.connection('alpha'):
+                scheduler.flood_wait('alpha', 30)
+        assert deferred.value.delay == 33
+        assert scheduler._active == 0
+
+        with pytest.raises(TelegramDeferred) as deferred:
+            async with scheduler.connection('alpha'):
+                pass
+        assert 32 < deferred.value.delay <= 33
+
+        async with scheduler.connection('beta'):
+            pass
+
+    asyncio.run(scenario())
+
+def test_repeated_flood_waits_invalidate_the_session():
+    scheduler = TelegramScheduler(max_flood_waits=2)
+    for _ in range(2):
+        with pytest.raises(TelegramDeferred):
+            scheduler.flood_wait('alpha', 1)
+    with pytest.raises(InvalidSession):
+        scheduler.flood_wait('alpha', 1)
+
+def test_success_resets_the_flood_count():
+    scheduler = TelegramScheduler(max_flood_waits=1)
+    with pytest.raises(TelegramDeferred):
+        scheduler.flood_wait('alpha', 1)
+    scheduler.succeeded('alpha')
+    with pytest.raises(TelegramDeferred):
+        scheduler.flood_wait('alpha', 1)
+
+def test_cancelled_waiter_does_not_leak_a_connection():
+    async def scenario():
+        scheduler = TelegramScheduler(max_connections=1)
+        holder = scheduler.connection('holder')
+        await holder.__aenter__()
+        waiter = asyncio.create_task(scheduler.connection('waiter').__aenter__())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await holder.__aexit__(None, None, None)
+        return scheduler._active
+
+    assert asyncio.run(scenario()) == 0
+
+def test_deferred_connection_does_not_queue_at_capacity():
+    async def scenario():
+        scheduler = TelegramScheduler(max_connections=1)
+        async with scheduler.connection('holder'):
+            with pytest.raises(TelegramDeferred) as deferred:
+                async with scheduler.connection('alpha', defer=True):
+                    pass
+            assert not scheduler._queue
+        async with scheduler.connection('alpha', defer=True):
+            active = scheduler._active
+        return deferred.value.delay, active, scheduler._active
+
+    delay, active, after = asyncio.run(scenario())
+    assert delay > 0 and active == 1 and after == 0